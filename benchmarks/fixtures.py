@@ -0,0 +1,213 @@
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do "
+         "eiusmod tempor incididunt ut labore et dolore magna aliqua").split()
+
+
+class FixtureSite:
+    """
+    A synthetic, deterministic website served by `FixtureServer`.
+
+    Pages live at `/page/<n>` and link to `fanout` other pages. Every
+    `slow_every`-th page is delayed by `slow_ms` before it is sent, and every
+    `dynamic_every`-th page renders its content with JavaScript after
+    `dynamic_ms`, so stability waits have something to wait for. `/` links to
+    every page and `/login` serves a login form that redirects to
+    `/dashboard`.
+
+    Attributes:
+        pages (int): Number of pages.
+        page_bytes (int): Approximate size of each page body.
+        fanout (int): Links per page.
+        slow_every (int): Period of slow pages; 0 disables them.
+        slow_ms (int): Server delay of slow pages.
+        dynamic_every (int): Period of dynamic pages; 0 disables them.
+        dynamic_ms (int): Client-side render delay of dynamic pages.
+    """
+
+    def __init__(self, pages=100, page_bytes=20000, fanout=10, slow_every=0,
+                 slow_ms=200, dynamic_every=0, dynamic_ms=200):
+        self.pages = pages
+        self.page_bytes = page_bytes
+        self.fanout = fanout
+        self.slow_every = slow_every
+        self.slow_ms = slow_ms
+        self.dynamic_every = dynamic_every
+        self.dynamic_ms = dynamic_ms
+
+    def config(self):
+        """Returns the site parameters, for recording next to results."""
+        return dict(vars(self))
+
+    def links(self, number):
+        """Returns the page numbers linked from page `number`."""
+        return [(number * 7 + step * 13 + 1) % self.pages
+                for step in range(min(self.fanout, self.pages))]
+
+    def is_slow(self, number):
+        return bool(self.slow_every) and number % self.slow_every == 0
+
+    def is_dynamic(self, number):
+        return bool(self.dynamic_every) and number % self.dynamic_every == 0
+
+    def _paragraphs(self, number):
+        paragraphs = []
+        size = 0
+        index = number
+        while size < self.page_bytes:
+            words = " ".join(WORDS[(index + offset) % len(WORDS)]
+                             for offset in range(60))
+            paragraph = f"<p>{words}.</p>\n"
+            paragraphs.append(paragraph)
+            size += len(paragraph)
+            index += 1
+        return "".join(paragraphs)
+
+    def page(self, number):
+        """Renders page `number`."""
+        links = "".join(f'<li><a href="/page/{target}">Page {target}</a></li>'
+                        for target in self.links(number))
+        body = f"<h1>Page {number}</h1>\n{self._paragraphs(number)}"
+        if self.is_dynamic(number):
+            body = ('<div id="app"></div><script>setTimeout(() => {'
+                    f'document.getElementById("app").innerHTML = {json.dumps(body)};'
+                    f'}}, {self.dynamic_ms});</script>')
+        return ("<!DOCTYPE html><html><head>"
+                f"<title>Fixture page {number}</title></head><body>"
+                "<header><nav><a href=\"/\">Home</a></nav></header>"
+                f"<main>{body}</main><ul>{links}</ul>"
+                "<footer>Fixture site</footer></body></html>")
+
+    def index(self):
+        """Renders the home page, which links to every page."""
+        links = "".join(f'<li><a href="/page/{number}">Page {number}</a></li>'
+                        for number in range(self.pages))
+        return ("<!DOCTYPE html><html><head><title>Fixture site</title></head>"
+                f"<body><ul>{links}</ul></body></html>")
+
+    @staticmethod
+    def login():
+        """Renders the login form."""
+        return ("<!DOCTYPE html><html><head><title>Sign in</title></head><body>"
+                '<form method="post" action="/login">'
+                '<label>Email <input id="username" name="username" type="text"></label>'
+                '<label>Password <input id="password" name="password" type="password"></label>'
+                '<button id="login" type="submit">Log in</button>'
+                "</form></body></html>")
+
+    @staticmethod
+    def dashboard():
+        """Renders the page shown after logging in."""
+        return ("<!DOCTYPE html><html><head><title>Dashboard</title></head>"
+                "<body><h1>Welcome back</h1></body></html>")
+
+
+def _make_handler(site):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=b"", headers=None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        def _send_html(self, html):
+            body = html.encode("utf-8")
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, headers={"ETag": etag})
+                return
+            self._send(200, body, {"Content-Type": "text/html; charset=utf-8",
+                                   "ETag": etag})
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == "/":
+                self._send_html(site.index())
+            elif path == "/login":
+                self._send_html(site.login())
+            elif path == "/dashboard":
+                self._send_html(site.dashboard())
+            elif path.startswith("/page/") and path[6:].isdigit() \
+                    and int(path[6:]) < site.pages:
+                number = int(path[6:])
+                if site.is_slow(number):
+                    time.sleep(site.slow_ms / 1000)
+                self._send_html(site.page(number))
+            else:
+                self._send(404)
+
+        do_HEAD = do_GET
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if urlparse(self.path).path == "/login":
+                self._send(303, headers={"Location": "/dashboard"})
+            else:
+                self._send(404)
+
+    return FixtureHandler
+
+
+class FixtureServer:
+    """
+    Serves a `FixtureSite` on a local port from a background thread.
+
+    Example:
+        >>> with FixtureServer(FixtureSite(pages=50)) as server:
+        ...     await engine.navigate_to(server.url("/page/1"))
+
+    Attributes:
+        site (FixtureSite): The site being served.
+        host (str): Interface to bind.
+        port (int): Bound port; 0 picks a free one on start.
+    """
+
+    def __init__(self, site, host="127.0.0.1", port=0):
+        self.site = site
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Starts serving and returns the base URL."""
+        self._server = ThreadingHTTPServer((self.host, self.port),
+                                           _make_handler(self.site))
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self.url("/")
+
+    def stop(self):
+        """Stops the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def url(self, path="/"):
+        """Returns the absolute URL of `path` on the server."""
+        return f"http://{self.host}:{self.port}{path}"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,89 @@
+"""
+Guards pyvigate's import time and keeps heavy dependencies lazy.
+
+Usage:
+    python benchmarks/import_time.py --budget-ms 300 --output import_time.json
+
+Each target is imported in a fresh interpreter several times and the best
+time is kept. The run fails if any target loads a heavy dependency
+(Playwright, llama_index, parsers, provider SDKs) at import time, or takes
+longer than the budget, so a stray top-level import shows up in CI.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = (
+    "pyvigate",
+    "pyvigate.core",
+    "pyvigate.ai",
+    "pyvigate.services",
+    "pyvigate.services.scraping",
+    "pyvigate.services.caching",
+    "pyvigate.services.crawling",
+    "pyvigate.services.parsing",
+    "pyvigate.services.fetching",
+    "pyvigate.instrumentation",
+)
+
+HEAVY_MODULES = ("playwright", "llama_index", "bs4", "lxml", "selectolax",
+                 "tiktoken", "openai", "httpx", "pyarrow")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {target}
+elapsed = (time.perf_counter() - started) * 1000
+heavy = sorted({{name.split(".")[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{"ms": elapsed, "heavy": heavy}}))
+"""
+
+
+def probe(target, repeat):
+    """Imports `target` in `repeat` fresh interpreters and keeps the best time."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(target=target, heavy=HEAVY_MODULES)],
+            check=True, capture_output=True, text=True, env=env).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if best is None or result["ms"] < best["ms"]:
+            best = result
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=300.0)
+    parser.add_argument("--output", default="import_time.json")
+    args = parser.parse_args(argv)
+
+    results = {}
+    failed = False
+    for target in TARGETS:
+        result = probe(target, args.repeat)
+        results[target] = result
+        problems = []
+        if result["heavy"]:
+            problems.append("loads " + ", ".join(result["heavy"]))
+        if result["ms"] > args.budget_ms:
+            problems.append(f"over the {args.budget_ms:.0f} ms budget")
+        failed = failed or bool(problems)
+        print(f"{target:>28}: {result['ms']:7.1f} ms"
+              + (f"  FAIL: {'; '.join(problems)}" if problems else ""))
+
+    with open(args.output, "w") as file:
+        json.dump({"budget_ms": args.budget_ms, "imports": results}, file, indent=2)
+    print(f"Results written to {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
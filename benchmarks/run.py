@@ -0,0 +1,302 @@
+"""
+Benchmarks pyvigate's page paths against a local fixture site.
+
+Usage:
+    python benchmarks/run.py --pages 200 --iterations 50 --output results.json
+    python benchmarks/run.py --baseline results.json --output new.json
+
+Each benchmark records pages/sec, a latency distribution per call and
+memory use, and all results are written as JSON together with the site
+parameters so that runs can be compared. Memory is traced in a separate,
+shorter pass after the timed one, so tracing does not slow the timings.
+The LLM is replaced by a stub, so the login benchmark measures pyvigate
+and the browser, not an API.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from fixtures import FixtureServer, FixtureSite
+
+# Benchmark the checkout this script lives in, not an installed copy.
+# pyvigate itself is imported by the benchmarks, so --help and argument
+# errors work even where the package cannot be imported.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+BENCHMARKS = ("navigate", "scrape", "cache_all_links", "login")
+
+LOGIN_SELECTORS = {
+    "Email/Username Textarea": "#username",
+    "Password Textarea": "#password",
+    "Log In/ Sign In button": "#login",
+}
+
+
+class StubLlmAgent:
+    """Stands in for `LlmAgent`, answering selector queries instantly."""
+
+    def __init__(self, selectors=None):
+        self.selectors = selectors or LOGIN_SELECTORS
+        self.calls = 0
+
+    def create_vector_store_index(self, index_path=None):
+        return index_path
+
+    def query(self, index, query_text):
+        self.calls += 1
+        return repr(self.selectors)
+
+    async def acreate_vector_store_index(self, index_path=None):
+        return self.create_vector_store_index(index_path)
+
+    async def aquery(self, index, query_text):
+        return self.query(index, query_text)
+
+    async def acomplete(self, prompt):
+        return self.query(None, prompt)
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an ascending list."""
+    rank = math.ceil(fraction * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+def max_rss_bytes():
+    """Peak resident set size of this process, or None if unavailable."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+async def measure(name, call, iterations, memory_iterations=5):
+    """
+    Times `iterations` awaited calls of `call(i)` and summarizes them.
+
+    `call` may return the number of pages it handled; None counts as one.
+    The Python allocation peak is taken over `memory_iterations` further
+    calls once timing is done, as tracemalloc slows every allocation.
+
+    Returns:
+        dict: Pages/sec, latency distribution in ms and memory figures.
+    """
+    latencies = []
+    pages = 0
+    started = time.perf_counter()
+    for iteration in range(iterations):
+        call_started = time.perf_counter()
+        handled = await call(iteration)
+        latencies.append((time.perf_counter() - call_started) * 1000)
+        pages += 1 if handled is None else handled
+    elapsed = time.perf_counter() - started
+
+    python_peak = None
+    if memory_iterations:
+        tracemalloc.start()
+        for iteration in range(iterations, iterations + memory_iterations):
+            await call(iteration)
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    ordered = sorted(latencies)
+    return {
+        "name": name,
+        "iterations": iterations,
+        "pages": pages,
+        "seconds": elapsed,
+        "pages_per_second": pages / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": sum(ordered) / len(ordered),
+            "p50": percentile(ordered, 0.50),
+            "p95": percentile(ordered, 0.95),
+            "p99": percentile(ordered, 0.99),
+            "min": ordered[0],
+            "max": ordered[-1],
+        },
+        "memory": {
+            "python_peak_bytes": python_peak,
+            "max_rss_bytes": max_rss_bytes(),
+        },
+    }
+
+
+async def bench_navigate(engine, server, args, workdir):
+    site = server.site
+
+    async def call(iteration):
+        await engine.navigate_to(server.url(f"/page/{iteration % site.pages}"))
+
+    return await measure("navigate", call, args.iterations, args.memory_iterations)
+
+
+async def bench_scrape(engine, server, args, workdir):
+    from pyvigate.services.scraping import Scraping
+
+    site = server.site
+    scraping = Scraping(engine.page, data_dir=os.path.join(workdir, "data"))
+
+    async def call(iteration):
+        await scraping.extract_data_from_page(
+            server.url(f"/page/{iteration % site.pages}"))
+
+    return await measure("scrape", call, args.iterations, args.memory_iterations)
+
+
+async def bench_cache_all_links(engine, server, args, workdir):
+    from pyvigate.services.caching import Caching
+
+    site = server.site
+    caching = Caching(cache_dir=os.path.join(workdir, "html_cache"))
+    iterations = max(1, args.iterations // max(1, site.fanout))
+    cache_page_content = caching.cache_page_content
+    cached = []
+
+    async def counting_cache_page_content(page, url):
+        cached.append(url)
+        return await cache_page_content(page, url)
+
+    caching.cache_page_content = counting_cache_page_content
+
+    async def call(iteration):
+        cached.clear()
+        await caching.cache_all_links(
+            engine.page, server.url(f"/page/{iteration % site.pages}"))
+        # The start page plus every link the crawl actually cached.
+        return 1 + len(cached)
+
+    return await measure("cache_all_links", call, iterations,
+                         args.memory_iterations)
+
+
+async def bench_login(engine, server, args, workdir):
+    from pyvigate.core.login import Login
+
+    agent = StubLlmAgent()
+    login = Login(agent,
+                  credentials_file=os.path.join(workdir, "credentials.json"),
+                  cache_dir=os.path.join(workdir, "login_cache"))
+
+    async def call(iteration):
+        context = await engine.browser.new_context()
+        try:
+            page = await context.new_page()
+            await login.perform_login(page, server.url("/login"),
+                                      "user@example.com", "secret")
+        finally:
+            await context.close()
+
+    result = await measure("login", call, args.iterations, args.memory_iterations)
+    result["llm_calls"] = agent.calls
+    return result
+
+
+RUNNERS = {
+    "navigate": bench_navigate,
+    "scrape": bench_scrape,
+    "cache_all_links": bench_cache_all_links,
+    "login": bench_login,
+}
+
+
+def compare(baseline, results):
+    """Prints throughput and p95 changes against a baseline run."""
+    previous = baseline.get("benchmarks", {})
+    for name, result in results["benchmarks"].items():
+        if name not in previous:
+            continue
+        old = previous[name]
+        speedup = (result["pages_per_second"] / old["pages_per_second"]
+                   if old["pages_per_second"] else float("nan"))
+        print(f"{name:>16}: {old['pages_per_second']:8.1f} -> "
+              f"{result['pages_per_second']:8.1f} pages/s ({speedup:.2f}x), "
+              f"p95 {old['latency_ms']['p95']:.1f} -> "
+              f"{result['latency_ms']['p95']:.1f} ms")
+
+
+async def run(args):
+    from pyvigate.core.engine import PlaywrightEngine
+
+    site = FixtureSite(pages=args.pages, page_bytes=args.page_bytes,
+                       fanout=args.fanout, slow_every=args.slow_every,
+                       slow_ms=args.slow_ms, dynamic_every=args.dynamic_every,
+                       dynamic_ms=args.dynamic_ms)
+    names = args.benchmarks.split(",") if args.benchmarks else BENCHMARKS
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "memory_iterations": args.memory_iterations,
+            "site": site.config(),
+        },
+        "benchmarks": {},
+    }
+
+    with FixtureServer(site) as server, \
+            tempfile.TemporaryDirectory() as workdir:
+        engine = PlaywrightEngine(headless=True)
+        await engine.start_browser()
+        try:
+            # Warm the browser and server up before measuring.
+            await engine.navigate_to(server.url("/"))
+            for name in names:
+                result = await RUNNERS[name](engine, server, args, workdir)
+                results["benchmarks"][name] = result
+                print(f"{name:>16}: {result['pages_per_second']:8.1f} pages/s, "
+                      f"p50 {result['latency_ms']['p50']:.1f} ms, "
+                      f"p95 {result['latency_ms']['p95']:.1f} ms")
+        finally:
+            await engine.stop_browser()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--benchmarks", default="",
+                        help=f"Comma-separated subset of {', '.join(BENCHMARKS)}.")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--memory-iterations", type=int, default=5,
+                        help="Untimed calls traced for memory; 0 to skip.")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--page-bytes", type=int, default=20000)
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--slow-every", type=int, default=0)
+    parser.add_argument("--slow-ms", type=int, default=200)
+    parser.add_argument("--dynamic-every", type=int, default=0)
+    parser.add_argument("--dynamic-ms", type=int, default=200)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="Earlier results file to compare with.")
+    args = parser.parse_args(argv)
+
+    unknown = set(filter(None, args.benchmarks.split(","))) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run(args))
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            compare(json.load(file), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1 @@
-from .core.engine import PlaywrightEnginefrom .core.login import Loginfrom .services.caching import Cachingfrom .services.scraping import Scrapingfrom .ai.query_engine import QueryEngine
\ No newline at end of file
+from typing import TYPE_CHECKINGfrom ._lazy import attach__all__ = ["PlaywrightEngine", "Login", "Caching", "Scraping", "QueryEngine"]__getattr__, __dir__ = attach(__name__, {    "PlaywrightEngine": ".core.engine",    "Login": ".core.login",    "Caching": ".services.caching",    "Scraping": ".services.scraping",    "QueryEngine": ".ai.query_engine",})if TYPE_CHECKING:    from .core.engine import PlaywrightEngine    from .core.login import Login    from .services.caching import Caching    from .services.scraping import Scraping    from .ai.query_engine import QueryEngine
\ No newline at end of file
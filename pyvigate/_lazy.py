@@ -0,0 +1,35 @@
+import importlib
+import sys
+
+
+def attach(package, exports):
+    """
+    Builds PEP 562 `__getattr__` and `__dir__` hooks that import a
+    package's public names on first access.
+
+    Importing a package then costs nothing beyond the package itself, and
+    heavy dependencies such as Playwright or llama_index are only loaded
+    when something that needs them is used.
+
+    Args:
+        package (str): The package `__name__`.
+        exports (dict): Public name to the relative module defining it, or
+            to a `(module, attribute)` pair when the names differ.
+
+    Returns:
+        tuple: The `__getattr__` and `__dir__` functions for the package.
+    """
+    def __getattr__(name):
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        target = exports[name]
+        module_name, attribute = target if isinstance(target, tuple) else (target, name)
+        value = getattr(importlib.import_module(module_name, package), attribute)
+        # Cache on the package so later lookups skip this hook.
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
@@ -1,2 +1,23 @@
-from .query_engine import QueryEngine
-from .prompt_engineering import PromptEngineering
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from .._lazy import attach
+
+__all__ = ["QueryEngine", "LlmAgent", "PromptEngineering", "EmbeddingPipeline",
+           "ResponseCache", "MapReducePipeline"]
+
+__getattr__, __dir__ = attach(__name__, {
+    "QueryEngine": ".query_engine",
+    "LlmAgent": ".llm_agent",
+    "PromptEngineering": ".prompt_engineering",
+    "EmbeddingPipeline": ".embedding",
+    "ResponseCache": ".response_cache",
+    "MapReducePipeline": ".map_reduce",
+})
+
+if TYPE_CHECKING:
+    from .query_engine import QueryEngine
+    from .llm_agent import LlmAgent
+    from .prompt_engineering import PromptEngineering
+    from .embedding import EmbeddingPipeline
+    from .response_cache import ResponseCache
+    from .map_reduce import MapReducePipeline
\ No newline at end of file
@@ -0,0 +1,332 @@
+import asyncio
+import json
+import random
+import socket
+import time
+import urllib.error
+import urllib.request
+
+from ..instrumentation import span
+from .tokens import count_tokens
+
+
+class EmbeddingHTTPError(Exception):
+    """
+    Raised when an embedding endpoint answers with an HTTP error.
+
+    Attributes:
+        status_code (int): The HTTP status code.
+        retry_after (float): Seconds the server asked to wait, if given.
+    """
+
+    def __init__(self, status_code, message="", retry_after=None):
+        super().__init__(f"Embedding request failed with HTTP {status_code}: {message}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+# Statuses worth retrying: timeouts and server-side failures.
+TRANSIENT_STATUSES = {408, 425, 500, 502, 503, 504}
+# Exception classes of common provider SDKs and HTTP clients, by name, so
+# that none of them has to be imported.
+THROTTLED_ERROR_NAMES = {"RateLimitError"}
+TRANSIENT_ERROR_NAMES = {"APIConnectionError", "APITimeoutError", "InternalServerError",
+                         "ServiceUnavailableError", "TransportError"}
+
+
+def _status_code(error):
+    """Returns the HTTP status of an exception or its `response`, if any."""
+    for candidate in (error, getattr(error, "response", None)):
+        for name in ("status_code", "status", "code"):
+            status = getattr(candidate, name, None)
+            if isinstance(status, int):
+                return status
+    return None
+
+
+def _error_names(error):
+    return {cls.__name__ for cls in type(error).__mro__}
+
+
+def is_throttled(error):
+    """
+    Tells whether an exception signals provider rate limiting.
+
+    A 429 status code on the exception or its `response`, or a provider
+    `RateLimitError`, counts as throttling. Only exceptions without any
+    status code are judged by a rate-limit message.
+
+    Args:
+        error (Exception): The exception raised by an embedding call.
+
+    Returns:
+        bool: True if the call should be retried after backing off.
+    """
+    status = _status_code(error)
+    if status is not None:
+        return status == 429
+    if _error_names(error) & THROTTLED_ERROR_NAMES:
+        return True
+    message = str(error).lower()
+    return "rate limit" in message or "too many requests" in message
+
+
+def is_transient(error):
+    """
+    Tells whether an exception is a transient failure worth retrying.
+
+    Timeouts and 5xx statuses count, as do connection errors, including
+    `urllib.error.URLError` and the connection errors of common SDKs.
+
+    Args:
+        error (Exception): The exception raised by an embedding call.
+
+    Returns:
+        bool: True if the call may succeed when repeated.
+    """
+    status = _status_code(error)
+    if status is not None:
+        return status in TRANSIENT_STATUSES
+    if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError,
+                          socket.timeout, urllib.error.URLError)):
+        return True
+    return bool(_error_names(error) & TRANSIENT_ERROR_NAMES)
+
+
+def _retry_after(error):
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        retry_after = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(retry_after) if retry_after is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class OpenAICompatibleEmbedder:
+    """
+    Minimal client for OpenAI-style `/embeddings` endpoints.
+
+    Works against hosted providers and local fake servers alike, which makes
+    the embedding pipeline testable without network access or API spend.
+
+    Attributes:
+        base_url (str): Endpoint base URL, e.g. "http://127.0.0.1:8000/v1".
+        model (str): Embedding model name sent with each request.
+        api_key (str): Bearer token, if the endpoint requires one.
+        timeout (float): Request timeout in seconds.
+    """
+
+    def __init__(self, base_url, model="text-embedding-ada-002", api_key=None,
+                 timeout=60):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def _post(self, texts):
+        body = json.dumps({"input": texts, "model": self.model}).encode("utf-8")
+        request = urllib.request.Request(f"{self.base_url}/embeddings", data=body,
+                                         method="POST")
+        request.add_header("Content-Type", "application/json")
+        if self.api_key:
+            request.add_header("Authorization", f"Bearer {self.api_key}")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as error:
+            raise EmbeddingHTTPError(error.code, error.reason,
+                                     retry_after=error.headers.get("Retry-After"))
+        data = sorted(payload["data"], key=lambda item: item["index"])
+        return [item["embedding"] for item in data]
+
+    async def __call__(self, texts):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self._post, texts)
+
+
+class LlamaIndexEmbedder:
+    """
+    Adapts a llama_index embedding model to the pipeline's batch interface.
+
+    Attributes:
+        embed_model: A llama_index `BaseEmbedding` instance.
+    """
+
+    def __init__(self, embed_model):
+        self.embed_model = embed_model
+
+    async def __call__(self, texts):
+        return await self.embed_model.aget_text_embedding_batch(texts)
+
+
+class EmbeddingPipeline:
+    """
+    Embeds many texts with token-budgeted batches, bounded concurrency and
+    rate-limit aware retries.
+
+    Texts are grouped into batches that stay under `max_batch_tokens` and
+    `max_batch_size`. Up to `concurrency` batches are in flight at once.
+    Throttled or transiently failing batches are retried with exponential
+    backoff and jitter, honouring Retry-After when the provider sends it,
+    capped at `max_backoff`. A throttled batch pauses every batch, not just
+    itself, so requests already queued do not keep hitting the limit.
+
+    Attributes:
+        embed_batch (callable): Async or sync callable mapping a list of texts
+            to a list of vectors.
+        max_batch_tokens (int): Token budget per request.
+        max_batch_size (int): Maximum number of texts per request.
+        concurrency (int): Maximum requests in flight.
+        max_retries (int): Retries per batch before giving up.
+        backoff (float): Initial backoff in seconds, doubled on each retry.
+        max_backoff (float): Upper bound for a single backoff.
+        stats (dict): Throughput counters of the last `embed` call.
+    """
+
+    def __init__(self, embed_batch, max_batch_tokens=8000, max_batch_size=256,
+                 concurrency=4, max_retries=6, backoff=1.0, max_backoff=60.0,
+                 encoding=None):
+        """
+        Initializes the pipeline.
+
+        Args:
+            embed_batch (callable): Batch embedding function, for example an
+                `OpenAICompatibleEmbedder` or `LlamaIndexEmbedder`.
+            max_batch_tokens (int, optional): Token budget per request. Defaults to 8000.
+            max_batch_size (int, optional): Texts per request. Defaults to 256.
+            concurrency (int, optional): Requests in flight. Defaults to 4.
+            max_retries (int, optional): Retries per batch. Defaults to 6.
+            backoff (float, optional): Initial backoff in seconds. Defaults to 1.0.
+            max_backoff (float, optional): Maximum backoff in seconds. Defaults to 60.0.
+            encoding (optional): tiktoken encoding for exact token counts.
+        """
+        self.embed_batch = embed_batch
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.encoding = encoding
+        self.stats = {}
+        self._resume_at = 0.0
+
+    def make_batches(self, texts, token_counts=None):
+        """
+        Splits texts into batches within the token and size budgets.
+
+        A single text larger than the token budget forms its own batch.
+
+        Args:
+            texts (list): Texts to embed.
+            token_counts (list, optional): Token count of each text, if
+                already known.
+
+        Returns:
+            list: Lists of indexes into `texts`, one list per batch.
+        """
+        if token_counts is None:
+            token_counts = [count_tokens(text, self.encoding) for text in texts]
+        batches = []
+        current = []
+        current_tokens = 0
+        for position, tokens in enumerate(token_counts):
+            too_many_tokens = current_tokens + tokens > self.max_batch_tokens
+            if current and (too_many_tokens or len(current) >= self.max_batch_size):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(position)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _call(self, texts):
+        result = self.embed_batch(texts)
+        if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
+            result = await result
+        return result
+
+    async def _wait_for_pause(self):
+        """Sleeps until a pause set by a throttled request is over."""
+        while True:
+            remaining = self._resume_at - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(remaining)
+
+    async def _embed_with_retries(self, texts):
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_pause()
+            self.stats["requests"] += 1
+            try:
+                vectors = await self._call(texts)
+            except Exception as error:
+                throttled = is_throttled(error)
+                if attempt == self.max_retries or not (throttled or is_transient(error)):
+                    raise
+                if throttled:
+                    self.stats["throttled"] += 1
+                self.stats["retries"] += 1
+                wait = _retry_after(error)
+                if wait is None:
+                    wait = min(delay, self.max_backoff) * (0.5 + random.random() / 2)
+                    delay *= 2
+                wait = min(wait, self.max_backoff)
+                if throttled:
+                    # Hold back the other batches too until the limit resets.
+                    self._resume_at = max(self._resume_at, time.monotonic() + wait)
+                    await self._wait_for_pause()
+                else:
+                    await asyncio.sleep(wait)
+                continue
+            if len(vectors) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}.")
+            return vectors
+
+    async def embed(self, texts):
+        """
+        Embeds all texts, preserving their order.
+
+        Args:
+            texts (list): Texts to embed.
+
+        Returns:
+            list: One vector per text.
+        """
+        texts = list(texts)
+        token_counts = [count_tokens(text, self.encoding) for text in texts]
+        batches = self.make_batches(texts, token_counts)
+        self.stats = {
+            "texts": len(texts),
+            "tokens": sum(token_counts),
+            "batches": len(batches),
+            "requests": 0,
+            "retries": 0,
+            "throttled": 0,
+            "seconds": 0.0,
+            "texts_per_second": 0.0,
+            "tokens_per_second": 0.0,
+        }
+        vectors = [None] * len(texts)
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def run(batch):
+            async with limit:
+                with span("embed.batch", texts=len(batch)):
+                    batch_vectors = await self._embed_with_retries([texts[i] for i in batch])
+            for position, vector in zip(batch, batch_vectors):
+                vectors[position] = vector
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run(batch) for batch in batches))
+        elapsed = time.perf_counter() - started
+        self.stats["seconds"] = elapsed
+        if elapsed > 0:
+            self.stats["texts_per_second"] = len(texts) / elapsed
+            self.stats["tokens_per_second"] = self.stats["tokens"] / elapsed
+        return vectors
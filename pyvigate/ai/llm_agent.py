@@ -1,4 +1,15 @@
-from llama_index.core import Settings, SimpleDirectoryReader, VectorStoreIndex
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import weakref
+
+from ..dedup import NearDuplicateIndex, html_to_text
+from ..instrumentation import span
+
+# Fingerprint files a caller may keep next to cached pages; never indexed.
+DEDUP_FILE = "near_duplicates.json"
 
 
 class LlmAgent:
@@ -17,7 +28,12 @@ class LlmAgent:
                  azure_endpoint=None,
                  azure_api_version=None,
                  azure_llm_deployment_name=None,
-                 azure_embedding_deployment_name=None):
+                 azure_embedding_deployment_name=None,
+                 embedding_pipeline=None,
+                 response_cache=None,
+                 max_concurrency=8,
+                 dedup=False,
+                 dedup_distance=3):
         """
         Initializes QueryEngine with specific service configurations.
 
@@ -31,6 +47,18 @@ class LlmAgent:
             embedding_type (str): Type of embedding service ('azure' or 'together').
             endpoint (str, optional): Endpoint URL for the service, for Azure.
             api_version (str, optional): API version for the service, for Azure.
+            embedding_pipeline (EmbeddingPipeline, optional): Batches and
+                throttles embedding requests when building or updating
+                an index.
+            response_cache (ResponseCache, optional): Reuses answers to
+                repeated queries and prompts over unchanged documents.
+            max_concurrency (int, optional): Maximum LLM calls and index
+                builds in flight through the async methods. Defaults to 8.
+            dedup (bool, optional): Leaves documents that nearly duplicate
+                an indexed one out of the index, so they are neither
+                embedded nor retrieved. Defaults to False.
+            dedup_distance (int, optional): SimHash bits two documents may
+                differ by and still count as duplicates. Defaults to 3.
         """
         self.directory_path = directory_path
         self.api_key = api_key
@@ -42,16 +70,28 @@ class LlmAgent:
         self.api_version = azure_api_version
         self.azure_llm_deployment_name = azure_llm_deployment_name
         self.azure_embedding_deployment_name = azure_embedding_deployment_name
+        self.embedding_pipeline = embedding_pipeline
+        self.response_cache = response_cache
+        self.max_concurrency = max_concurrency
+        self.dedup = dedup
+        self.dedup_distance = dedup_distance
+        self._limit = None
+        self.llm = None
+        self.embed_model = None
+        self.index_fingerprint = None
+        self._fingerprints = weakref.WeakKeyDictionary()
 
-    def create_vector_store_index(self, index_path=None):
+    def _init_services(self):
         """
-        Initializes the specified LLM and embedding services based on config.
-        Args:
-            index_path (str): path to index. Defaults to None.
+        Creates the LLM and embedding clients once and registers them
+        as the llama_index defaults.
         """
+        from llama_index.core import Settings
 
-        if index_path is None:
-            index_path = self.directory_path
+        if self.llm is not None and self.embed_model is not None:
+            Settings.llm = self.llm
+            Settings.embed_model = self.embed_model
+            return
 
         if self.llm_type == 'azure':
             from llama_index.llms.azure_openai import AzureOpenAI
@@ -84,12 +124,413 @@ class LlmAgent:
         Settings.llm = self.llm
         Settings.embed_model = self.embed_model
 
-        documents = SimpleDirectoryReader(index_path).load_data()
-        return VectorStoreIndex.from_documents(documents)
+    def create_vector_store_index(self, index_path=None):
+        """
+        Initializes the specified LLM and embedding services based on config.
+        Args:
+            index_path (str or PackStore): directory, or page store, to
+                index. Defaults to None.
+        """
+        from llama_index.core import VectorStoreIndex
+
+        if index_path is None:
+            index_path = self.directory_path
+
+        self._init_services()
+        with span("index.build", path=self._source_path(index_path)) as build_span:
+            documents = self._read_documents(index_path)
+            build_span.set("documents", len(documents))
+            if self.dedup:
+                self._assign_document_ids(documents)
+                documents, _ = self._drop_near_duplicates(
+                    documents, NearDuplicateIndex(max_distance=self.dedup_distance))
+            if self.embedding_pipeline is None:
+                index = VectorStoreIndex.from_documents(documents)
+            else:
+                index = VectorStoreIndex.from_documents([])
+                self._insert_documents(index, documents)
+        self._set_fingerprint(index, self._hash_directory(index_path))
+        return index
+
+    def update_vector_store_index(self, index_path=None, persist_dir=None):
+        """
+        Loads a persisted index and brings it in line with the directory.
+
+        Files are tracked by the SHA-256 of their content in a manifest next
+        to the persisted index. Only new or changed files are read and
+        embedded, and documents of deleted files are removed. When nothing
+        changed, the index is loaded from disk without any embedding calls.
+        With `dedup`, near-duplicate documents are listed in the manifest
+        but not embedded, and are read again if the document they duplicate
+        goes away. Their fingerprints are kept next to the manifest.
+
+        Args:
+            index_path (str or PackStore): directory, or page store, to
+                index. Defaults to `directory_path`.
+            persist_dir (str): where the index and manifest are stored.
+                Defaults to `<index_path>_index`.
+
+        Returns:
+            VectorStoreIndex: The up-to-date index.
+        """
+        from llama_index.core import (StorageContext,
+                                      VectorStoreIndex, load_index_from_storage)
+
+        if index_path is None:
+            index_path = self.directory_path
+        if persist_dir is None:
+            persist_dir = os.path.normpath(self._source_path(index_path)) + "_index"
+
+        self._init_services()
+        manifest_path = os.path.join(persist_dir, "manifest.json")
+        dedup_path = os.path.join(persist_dir, DEDUP_FILE)
+        manifest = {}
+        if not os.path.exists(manifest_path) and os.path.exists(dedup_path):
+            # Fingerprints without a manifest describe an index that is gone.
+            os.remove(dedup_path)
+        dedup = (NearDuplicateIndex(dedup_path, max_distance=self.dedup_distance)
+                 if self.dedup else None)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r") as file:
+                manifest = json.load(file)
+            storage_context = StorageContext.from_defaults(persist_dir=persist_dir)
+            index = load_index_from_storage(storage_context)
+        else:
+            index = VectorStoreIndex.from_documents([])
+
+        current = self._hash_directory(index_path)
+        removed = [name for name in manifest if name not in current]
+        changed = [name for name, digest in current.items()
+                   if manifest.get(name, {}).get("hash") != digest]
+
+        stale = removed + changed
+        while stale:
+            entry = manifest.pop(stale.pop(), {})
+            for doc_id in entry.get("doc_ids", []):
+                index.delete_ref_doc(doc_id, delete_from_docstore=True)
+            if dedup is None:
+                continue
+            for key in entry.get("doc_ids", []) + entry.get("duplicates", []):
+                # Duplicates of a removed document have nothing left to
+                # stand in for them, so their files are read again.
+                for orphan in dedup.remove(key):
+                    name = orphan.rsplit("#", 1)[0]
+                    if name in current and name not in changed:
+                        changed.append(name)
+                        stale.append(name)
+
+        if changed:
+            with span("index.update", path=self._source_path(index_path),
+                      files=len(changed)):
+                documents = self._read_documents(index_path, changed)
+                self._assign_document_ids(documents)
+                documents, duplicates = self._drop_near_duplicates(documents, dedup)
+                self._insert_documents(index, documents)
+            for name in changed:
+                manifest[name] = {"hash": current[name], "doc_ids": [], "duplicates": []}
+            for key in [document.id_ for document in documents]:
+                manifest[key.rsplit("#", 1)[0]]["doc_ids"].append(key)
+            for key in duplicates:
+                manifest[key.rsplit("#", 1)[0]]["duplicates"].append(key)
+
+        if changed or removed or not os.path.exists(manifest_path):
+            index.storage_context.persist(persist_dir=persist_dir)
+            with open(manifest_path, "w") as file:
+                json.dump(manifest, file)
+            if dedup is not None:
+                dedup.save()
+
+        self._set_fingerprint(index, {name: entry["hash"]
+                                      for name, entry in manifest.items()})
+        return index
+
+    @staticmethod
+    def _source_path(source):
+        """Returns the directory of a document source."""
+        return source if isinstance(source, str) else source.path
+
+    @staticmethod
+    def _read_documents(source, names=None):
+        """
+        Loads documents from a directory, or from a reader such as a
+        `PackStore` that has `load_data(keys)`, optionally only `names`.
+        """
+        if not isinstance(source, str):
+            return source.load_data(names)
+        from llama_index.core import SimpleDirectoryReader
+
+        if names is None:
+            return SimpleDirectoryReader(source, exclude=[DEDUP_FILE]).load_data()
+        input_files = [os.path.join(source, name) for name in names]
+        return SimpleDirectoryReader(input_files=input_files).load_data()
+
+    @staticmethod
+    def _assign_document_ids(documents):
+        """Names documents `<file name>#<n>` so they can be found per file."""
+        counts = {}
+        for document in documents:
+            name = document.metadata.get("file_name") or os.path.basename(
+                document.metadata.get("file_path", ""))
+            document.id_ = f"{name}#{counts.get(name, 0)}"
+            counts[name] = counts.get(name, 0) + 1
+
+    @staticmethod
+    def _drop_near_duplicates(documents, dedup):
+        """
+        Splits documents into those to index and the keys of those that
+        nearly duplicate an indexed document, according to `dedup`, the
+        agent's own `NearDuplicateIndex` keyed by document id.
+        """
+        if dedup is None:
+            return documents, []
+        kept, duplicates = [], []
+        with span("index.dedup", documents=len(documents)) as dedup_span:
+            for document in documents:
+                if dedup.add(document.id_, html_to_text(document.text)) is None:
+                    kept.append(document)
+                else:
+                    duplicates.append(document.id_)
+            dedup_span.set("duplicates", len(duplicates))
+        return kept, duplicates
+
+    def _set_fingerprint(self, index, hashes):
+        """Records the content hash of the documents behind an index."""
+        self.index_fingerprint = hashlib.sha256(json.dumps(
+            hashes, sort_keys=True).encode("utf-8")).hexdigest()
+        self._fingerprints[index] = self.index_fingerprint
+
+    def _insert_documents(self, index, documents):
+        """
+        Inserts documents into an index, embedding their nodes through the
+        `embedding_pipeline` when one is configured.
+        """
+        if self.embedding_pipeline is None:
+            for document in documents:
+                index.insert(document)
+            return
+
+        from llama_index.core import Settings
+        from llama_index.core.ingestion import run_transformations
+        from llama_index.core.schema import MetadataMode
+
+        nodes = run_transformations(documents, Settings.transformations)
+        texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
+        embeddings = self._run_coroutine(self.embedding_pipeline.embed(texts))
+        for node, embedding in zip(nodes, embeddings):
+            node.embedding = embedding
+        index.insert_nodes(nodes)
+        for document in documents:
+            index.docstore.set_document_hash(document.id_, document.hash)
+
+    @staticmethod
+    def _run_coroutine(coroutine):
+        """
+        Runs a coroutine to completion from synchronous code, using a helper
+        thread when called while an event loop is already running.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+
+        outcome = {}
+
+        def target():
+            try:
+                outcome["result"] = asyncio.run(coroutine)
+            except BaseException as error:
+                outcome["error"] = error
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
+
+    @staticmethod
+    def _hash_directory(index_path):
+        """
+        Maps each visible file in the directory, or each page of a store,
+        to its content hash.
+        """
+        if not isinstance(index_path, str):
+            return index_path.hashes()
+        hashes = {}
+        for name in sorted(os.listdir(index_path)):
+            path = os.path.join(index_path, name)
+            if name.startswith(".") or name == DEDUP_FILE or not os.path.isfile(path):
+                continue
+            with open(path, "rb") as file:
+                hashes[name] = hashlib.sha256(file.read()).hexdigest()
+        return hashes
+
+    def _limiter(self):
+        """Returns the semaphore bounding concurrent async calls."""
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.max_concurrency)
+        return self._limit
+
+    async def _in_thread(self, func, *args):
+        """Runs blocking llama_index work in a worker thread."""
+        loop = asyncio.get_event_loop()
+        async with self._limiter():
+            return await loop.run_in_executor(None, func, *args)
+
+    async def acreate_vector_store_index(self, index_path=None):
+        """
+        Builds an index like `create_vector_store_index` without blocking
+        the event loop, so browser work carries on meanwhile.
+
+        Args:
+            index_path (str): path to index. Defaults to `directory_path`.
+
+        Returns:
+            VectorStoreIndex: The new index.
+        """
+        return await self._in_thread(self.create_vector_store_index, index_path)
+
+    async def aupdate_vector_store_index(self, index_path=None, persist_dir=None):
+        """
+        Async version of `update_vector_store_index`.
+
+        Returns:
+            VectorStoreIndex: The up-to-date index.
+        """
+        return await self._in_thread(self.update_vector_store_index,
+                                     index_path, persist_dir)
+
+    def _query_key(self, index, query_text):
+        """Returns the response cache key of a query, or None to bypass it."""
+        fingerprint = self._fingerprints.get(index)
+        if self.response_cache is None or fingerprint is None:
+            return None
+        return self.response_cache.make_key(self.model_name, query_text, fingerprint)
+
+    @staticmethod
+    def _cached_response(text):
+        """Wraps a cached answer in a llama_index `Response`."""
+        from llama_index.core.base.response.schema import Response
+        return Response(response=text)
 
     def query(self, index, query_text):
         """
         Queries an index with text and returns the results.
+
+        With a `response_cache`, answers are reused for the same model,
+        query and document content, and a cached answer is returned as a
+        `Response` carrying only the text.
+        """
+        key = self._query_key(index, query_text)
+        if key is None:
+            with span("llm.query", cache="bypass"):
+                return index.as_query_engine().query(query_text)
+
+        with span("llm.query") as query_span:
+            fresh = []
+
+            def call():
+                response = index.as_query_engine().query(query_text)
+                fresh.append(response)
+                return str(response)
+
+            text = self.response_cache.get_or_call(key, call)
+            query_span.set("cache", "miss" if fresh else "hit")
+        return fresh[0] if fresh else self._cached_response(text)
+
+    async def aquery(self, index, query_text):
+        """
+        Queries an index without blocking the event loop.
+
+        Uses llama_index's native async query path, with at most
+        `max_concurrency` calls in flight. Identical concurrent queries are
+        answered by one call when a `response_cache` is set.
+
+        Args:
+            index (VectorStoreIndex): The index to query.
+            query_text (str): The question.
+
+        Returns:
+            The query response.
         """
-        query_engine = index.as_query_engine()
-        return query_engine.query(query_text)
+        key = self._query_key(index, query_text)
+
+        async def call():
+            async with self._limiter():
+                return await index.as_query_engine().aquery(query_text)
+
+        if key is None:
+            with span("llm.query", cache="bypass"):
+                return await call()
+
+        with span("llm.query") as query_span:
+            fresh = []
+
+            async def cached_call():
+                fresh.append(await call())
+                return str(fresh[0])
+
+            text = await self.response_cache.aget_or_call(key, cached_call)
+            query_span.set("cache", "miss" if fresh else "hit")
+        return fresh[0] if fresh else self._cached_response(text)
+
+    def complete(self, prompt):
+        """
+        Sends a prompt, such as one built by `ScrapePrompts`, to the LLM.
+
+        With a `response_cache`, identical prompts to the same model are
+        answered once.
+
+        Args:
+            prompt (str): The prompt text.
+
+        Returns:
+            str: The completion text.
+        """
+        self._init_services()
+        with span("llm.complete") as complete_span:
+            if self.response_cache is None:
+                return self.llm.complete(prompt).text
+
+            fresh = []
+
+            def call():
+                fresh.append(self.llm.complete(prompt).text)
+                return fresh[0]
+
+            key = self.response_cache.make_key(self.model_name, prompt)
+            text = self.response_cache.get_or_call(key, call)
+            complete_span.set("cache", "miss" if fresh else "hit")
+            return text
+
+    async def acomplete(self, prompt):
+        """
+        Async version of `complete`, bounded by `max_concurrency`. Suitable
+        as the completion function of `ScrapePrompts.extract` and friends.
+
+        Args:
+            prompt (str): The prompt text.
+
+        Returns:
+            str: The completion text.
+        """
+        self._init_services()
+
+        async def call():
+            async with self._limiter():
+                return (await self.llm.acomplete(prompt)).text
+
+        with span("llm.complete") as complete_span:
+            if self.response_cache is None:
+                return await call()
+
+            fresh = []
+
+            async def cached_call():
+                fresh.append(await call())
+                return fresh[0]
+
+            key = self.response_cache.make_key(self.model_name, prompt)
+            text = await self.response_cache.aget_or_call(key, cached_call)
+            complete_span.set("cache", "miss" if fresh else "hit")
+            return text
@@ -0,0 +1,164 @@
+import asyncio
+import inspect
+
+from ..instrumentation import span
+from .tokens import count_tokens, get_encoding, split_tokens, truncate_tokens
+
+
+class MapReducePipeline:
+    """
+    Runs a prompt over content too large for one call.
+
+    The content is split into overlapping chunks that, together with the
+    prompt template, fit within `max_prompt_tokens`. The map prompts run
+    concurrently, and their answers are merged by a reduce prompt. If the
+    merged answers are themselves over budget, they are reduced again in
+    groups until one answer remains. Content that fits is sent in a single
+    call.
+
+    Attributes:
+        complete (callable): Async or sync callable mapping a prompt to the
+            completion text, e.g. `LlmAgent.complete`. Sync callables run
+            in worker threads.
+        max_prompt_tokens (int): Token budget of each prompt.
+        overlap_tokens (int): Tokens shared by consecutive chunks.
+        concurrency (int): Maximum prompts in flight.
+        encoding: tiktoken encoding used to count tokens, if available.
+            Looked up on first use, as loading it may download its
+            vocabulary.
+        calls (list): Token usage of every call of the last run.
+    """
+
+    def __init__(self, complete, max_prompt_tokens=3000, overlap_tokens=200,
+                 concurrency=4, model_name="gpt-3.5-turbo", encoding=None):
+        """
+        Initializes the pipeline.
+
+        Args:
+            complete (callable): Prompt completion function.
+            max_prompt_tokens (int, optional): Prompt budget. Defaults to 3000.
+            overlap_tokens (int, optional): Chunk overlap. Defaults to 200.
+            concurrency (int, optional): Prompts in flight. Defaults to 4.
+            model_name (str, optional): Model used to pick the tokenizer.
+            encoding (optional): tiktoken encoding; looked up from
+                `model_name` by default.
+        """
+        self.complete = complete
+        self.max_prompt_tokens = max_prompt_tokens
+        self.overlap_tokens = overlap_tokens
+        self.concurrency = concurrency
+        self.model_name = model_name
+        self._encoding = encoding
+        self.calls = []
+        self._limit = None
+
+    @property
+    def encoding(self):
+        if self._encoding is None:
+            self._encoding = get_encoding(self.model_name) or False
+        return self._encoding or None
+
+    def chunk(self, template, content, **kwargs):
+        """
+        Splits content so that `template` filled with any chunk fits the budget.
+
+        Args:
+            template (str): Template with a `{content}` placeholder.
+            content (str): The content to split.
+            **kwargs: Other template placeholders.
+
+        Returns:
+            list: The content chunks.
+        """
+        overhead = count_tokens(template.format(content="", **kwargs), self.encoding)
+        budget = self.max_prompt_tokens - overhead
+        if budget <= self.overlap_tokens:
+            raise ValueError(f"The prompt template alone uses {overhead} of "
+                             f"{self.max_prompt_tokens} tokens.")
+        return split_tokens(content, budget, overlap=self.overlap_tokens,
+                            encoding=self.encoding)
+
+    async def _call(self, stage, index, prompt):
+        async with self._limit:
+            with span("llm.prompt", stage=stage) as prompt_span:
+                if inspect.iscoroutinefunction(self.complete):
+                    result = await self.complete(prompt)
+                else:
+                    loop = asyncio.get_event_loop()
+                    result = await loop.run_in_executor(None, self.complete, prompt)
+                result = str(result)
+                usage = {
+                    "stage": stage,
+                    "index": index,
+                    "prompt_tokens": count_tokens(prompt, self.encoding),
+                    "completion_tokens": count_tokens(result, self.encoding),
+                }
+                prompt_span.set("tokens", usage["prompt_tokens"] + usage["completion_tokens"])
+        self.calls.append(usage)
+        return result
+
+    async def run(self, template, content, reduce_template, **kwargs):
+        """
+        Answers `template` over `content`, chunking and merging as needed.
+
+        Args:
+            template (str): Map template with a `{content}` placeholder.
+            content (str): The (possibly very long) content.
+            reduce_template (str): Template with a `{content}` placeholder
+                that receives the partial answers, separated by blank lines.
+            **kwargs: Other placeholders, shared by both templates.
+
+        Returns:
+            dict: The final `result`, the per-call token usage in `calls`,
+            and the totals `prompt_tokens`, `completion_tokens` and `chunks`.
+        """
+        self.calls = []
+        self._limit = asyncio.Semaphore(self.concurrency)
+        chunks = self.chunk(template, content, **kwargs)
+        answers = await asyncio.gather(*(
+            self._call("map", index, template.format(content=chunk, **kwargs))
+            for index, chunk in enumerate(chunks)))
+
+        while len(answers) > 1:
+            groups = self._group(reduce_template, answers, **kwargs)
+            answers = await asyncio.gather(*(
+                self._call("reduce", index, reduce_template.format(
+                    content="\n\n".join(group), **kwargs))
+                for index, group in enumerate(groups)))
+
+        return {
+            "result": answers[0],
+            "calls": self.calls,
+            "chunks": len(chunks),
+            "prompt_tokens": sum(call["prompt_tokens"] for call in self.calls),
+            "completion_tokens": sum(call["completion_tokens"] for call in self.calls),
+        }
+
+    def _group(self, reduce_template, answers, **kwargs):
+        """
+        Packs consecutive answers into groups that fit a reduce prompt.
+        Answers over half the budget are truncated so that every group
+        merges at least two of them. If token counts still leave each
+        answer in its own group, answers are merged in pairs anyway, so
+        every round makes progress.
+        """
+        overhead = count_tokens(reduce_template.format(content="", **kwargs), self.encoding)
+        budget = self.max_prompt_tokens - overhead
+        if budget < 4:
+            raise ValueError(f"The reduce template alone uses {overhead} of "
+                             f"{self.max_prompt_tokens} tokens.")
+        answers = [truncate_tokens(answer, budget // 2 - 1, self.encoding)
+                   for answer in answers]
+        groups = [[]]
+        used = 0
+        for answer in answers:
+            tokens = count_tokens(answer, self.encoding) + 1
+            if groups[-1] and used + tokens > budget:
+                groups.append([])
+                used = 0
+            groups[-1].append(answer)
+            used += tokens
+        if len(groups) >= len(answers):
+            # Re-encoding a truncated answer can overshoot its share.
+            groups = [answers[start:start + 2] for start in range(0, len(answers), 2)]
+        return groups
@@ -0,0 +1,4 @@
+from .llm_agent import LlmAgent
+
+# QueryEngine is the name the README and earlier releases use for LlmAgent.
+QueryEngine = LlmAgent
@@ -0,0 +1,350 @@
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+
+# Caches with unsaved changes are flushed at exit, or when collected,
+# without being kept alive.
+_open_caches = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_caches():
+    for cache in list(_open_caches):
+        cache.flush()
+
+
+class ResponseCache:
+    """
+    Persistent cache of LLM responses with single-flight deduplication.
+
+    Responses are keyed by model, prompt or query text and the content
+    fingerprint of the documents being queried, so an answer is reused only
+    while the question and its sources are unchanged. Entries expire after
+    `ttl` seconds, and the least recently used entries are evicted beyond
+    `max_entries` or `max_bytes`. Concurrent calls for the same key share a
+    single in-flight provider call.
+
+    Entries are kept in least-recently-used order with a running size, so
+    eviction never rescans the cache. The file is written at most once
+    every `save_interval` seconds, and on `flush`, `close` or interpreter
+    exit; the async path writes it in a worker thread, off the event loop.
+    Writes go through a unique temporary file one at a time, and a snapshot
+    older than the file on disk is never written over it.
+
+    Attributes:
+        path (str): JSON file the cache is persisted to, or None to keep it
+            in memory only.
+        ttl (float): Seconds an entry stays valid; None never expires.
+        max_entries (int): Maximum number of entries kept.
+        max_bytes (int): Maximum total size of cached responses.
+        save_interval (float): Minimum seconds between automatic saves.
+        entries (dict): Key to entry with `response`, `size`, `created_at`
+            and `last_access`, least recently used first.
+        stats (dict): Counts of `hits`, `misses` and `shared` calls, i.e.
+            callers that waited on another caller's in-flight request.
+    """
+
+    def __init__(self, path="llm_cache.json", ttl=None, max_entries=10000,
+                 max_bytes=64 * 1024 * 1024, autosave=True, save_interval=1.0):
+        """
+        Loads the cache from `path` if it exists.
+
+        Args:
+            path (str, optional): Cache file. Defaults to "llm_cache.json".
+            ttl (float, optional): Entry lifetime in seconds.
+            max_entries (int, optional): Entry limit. Defaults to 10000.
+            max_bytes (int, optional): Size limit. Defaults to 64 MiB.
+            autosave (bool, optional): Save after changes. Defaults to True.
+            save_interval (float, optional): Minimum seconds between
+                automatic saves. Defaults to 1 second; 0 saves every change.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.autosave = autosave
+        self.save_interval = save_interval
+        self.entries = {}
+        self.stats = {"hits": 0, "misses": 0, "shared": 0}
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._async_inflight = {}
+        self._bytes = 0
+        self._dirty = False
+        self._saving = False
+        self._saved_at = 0.0
+        self._write_lock = threading.Lock()
+        self._generation = 0
+        self._written = 0
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                entries = json.load(file)
+            self.entries = dict(sorted(entries.items(),
+                                       key=lambda item: item[1]["last_access"]))
+            self._bytes = sum(entry["size"] for entry in self.entries.values())
+        if autosave and path:
+            _open_caches.add(self)
+
+    @staticmethod
+    def make_key(model, text, fingerprint=None):
+        """
+        Builds the cache key of a call.
+
+        Args:
+            model (str): Model name.
+            text (str): Prompt or query text.
+            fingerprint (str, optional): Content hash of the queried documents.
+
+        Returns:
+            str: A SHA-256 hex digest.
+        """
+        payload = json.dumps([model, text, fingerprint])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Returns the cached response for a key.
+
+        Args:
+            key (str): Key from `make_key`.
+
+        Returns:
+            str: The response, or None if missing or expired.
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl is not None and time.time() - entry["created_at"] > self.ttl:
+                self._bytes -= self.entries.pop(key)["size"]
+                self._changed()
+                return None
+            # Move the entry to the most recently used end.
+            self.entries[key] = self.entries.pop(key)
+            entry["last_access"] = time.time()
+            self._dirty = True
+            return entry["response"]
+
+    def put(self, key, response):
+        """
+        Stores a response and evicts entries beyond the limits.
+
+        Args:
+            key (str): Key from `make_key`.
+            response (str): The response text.
+        """
+        with self._lock:
+            self._store(key, response)
+            self._changed()
+
+    async def aput(self, key, response):
+        """
+        Async version of `put` that writes the cache file in a worker
+        thread, so the event loop is not blocked by serialization.
+
+        Args:
+            key (str): Key from `make_key`.
+            response (str): The response text.
+        """
+        with self._lock:
+            self._store(key, response)
+            self._dirty = True
+            if not self._save_due() or self._saving:
+                return
+            # A shallow copy is enough: entries are replaced, not mutated,
+            # apart from their `last_access`.
+            snapshot = dict(self.entries)
+            self._generation += 1
+            generation = self._generation
+            self._saving = True
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        try:
+            await asyncio.get_event_loop().run_in_executor(None, self._write, snapshot, generation)
+        except BaseException:
+            self._dirty = True
+            raise
+        finally:
+            self._saving = False
+
+    def _store(self, key, response):
+        now = time.time()
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous["size"]
+        entry = self.entries[key] = {
+            "response": response,
+            "size": len(response.encode("utf-8")),
+            "created_at": now,
+            "last_access": now,
+        }
+        self._bytes += entry["size"]
+        self._evict()
+
+    def _evict(self):
+        while self.entries and (len(self.entries) > self.max_entries
+                                or self._bytes > self.max_bytes):
+            self._bytes -= self.entries.pop(next(iter(self.entries)))["size"]
+
+    def clear(self):
+        """Removes every entry."""
+        with self._lock:
+            self.entries = {}
+            self._bytes = 0
+            self._changed()
+
+    def _save_due(self):
+        return (self.autosave and bool(self.path)
+                and time.monotonic() - self._saved_at >= self.save_interval)
+
+    def _changed(self):
+        self._dirty = True
+        if self._save_due():
+            self._save()
+
+    def save(self):
+        """Writes the cache to `path`."""
+        with self._lock:
+            self._save()
+
+    def flush(self):
+        """Writes the cache if it has unsaved changes."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def close(self):
+        """Writes pending changes and stops flushing the cache at exit."""
+        self.flush()
+        _open_caches.discard(self)
+
+    def __del__(self):
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def _save(self):
+        self._generation += 1
+        self._write(self.entries, self._generation)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def _write(self, entries, generation):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._write_lock:
+            if generation < self._written:
+                return
+            descriptor, temp_path = tempfile.mkstemp(
+                dir=directory or ".", prefix=os.path.basename(self.path) + ".",
+                suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                    json.dump(entries, file)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            self._written = generation
+
+    def get_or_call(self, key, call):
+        """
+        Returns the cached response for `key`, or calls `call()` to produce
+        and store it. Threads asking for the same key while a call is in
+        flight wait for its result instead of calling again.
+
+        Args:
+            key (str): Key from `make_key`.
+            call (callable): Returns the response text on a miss.
+
+        Returns:
+            str: The response.
+        """
+        while True:
+            cached = self.get(key)
+            if cached is not None:
+                self.stats["hits"] += 1
+                return cached
+            with self._lock:
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    leader = True
+                else:
+                    leader = False
+            if not leader:
+                # Once the leader is done, the answer is cached; if it
+                # failed, the next pass elects a new leader.
+                event.wait()
+                cached = self.get(key)
+                if cached is not None:
+                    self.stats["shared"] += 1
+                    return cached
+                continue
+            try:
+                self.stats["misses"] += 1
+                response = call()
+                self.put(key, response)
+                return response
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+                event.set()
+
+    async def aget_or_call(self, key, call):
+        """
+        Async version of `get_or_call`. Coroutines asking for the same key
+        while a call is in flight await its result.
+
+        Args:
+            key (str): Key from `make_key`.
+            call (callable): Coroutine function returning the response text.
+
+        Returns:
+            str: The response.
+        """
+        while True:
+            cached = self.get(key)
+            if cached is not None:
+                self.stats["hits"] += 1
+                return cached
+            future = self._async_inflight.get(key)
+            if future is None:
+                break
+            self.stats["shared"] += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not us; elect a new one.
+                if not future.cancelled():
+                    raise
+
+        future = asyncio.get_event_loop().create_future()
+        self._async_inflight[key] = future
+        try:
+            self.stats["misses"] += 1
+            response = await call()
+            await self.aput(key, response)
+            future.set_result(response)
+            return response
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            # Mark the exception retrieved when no one else was waiting.
+            future.exception()
+            raise
+        finally:
+            del self._async_inflight[key]
@@ -0,0 +1,107 @@
+def get_encoding(model_name="gpt-3.5-turbo"):
+    """
+    Returns the tiktoken encoding for a model, if tiktoken is installed.
+
+    Args:
+        model_name (str): Name of the language or embedding model.
+
+    Returns:
+        The tiktoken encoding, or None when tiktoken is unavailable or its
+        vocabulary cannot be loaded, e.g. offline.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text, encoding=None):
+    """
+    Counts the tokens in a text.
+
+    Uses the given tiktoken encoding when available and otherwise falls back
+    to the common estimate of four characters per token.
+
+    Args:
+        text (str): The text to measure.
+        encoding (optional): A tiktoken encoding from `get_encoding`.
+
+    Returns:
+        int: The (estimated) number of tokens.
+    """
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(1, (len(text) + 3) // 4)
+
+
+def split_tokens(text, max_tokens, overlap=0, encoding=None):
+    """
+    Splits a text into chunks of at most `max_tokens` tokens, each starting
+    `overlap` tokens before the end of the previous one.
+
+    With a tiktoken encoding the split is exact. Without one, chunks are
+    sized by the four-characters-per-token estimate and end on whitespace
+    where possible.
+
+    Args:
+        text (str): The text to split.
+        max_tokens (int): Token budget per chunk.
+        overlap (int, optional): Tokens shared by consecutive chunks.
+        encoding (optional): A tiktoken encoding from `get_encoding`.
+
+    Returns:
+        list: The chunks, in order. A text within budget is a single chunk.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive.")
+    if not 0 <= overlap < max_tokens:
+        raise ValueError("overlap must be at least 0 and less than max_tokens.")
+
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return [text]
+        step = max_tokens - overlap
+        return [encoding.decode(tokens[start:start + max_tokens])
+                for start in range(0, len(tokens) - overlap, step)]
+
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return [text]
+    overlap_chars = overlap * 4
+    chunks = []
+    start = 0
+    while True:
+        end = start + max_chars
+        if end >= len(text):
+            chunks.append(text[start:])
+            return chunks
+        # Prefer to break on whitespace in the second half of the window.
+        cut = max(text.rfind("\n", start + max_chars // 2, end),
+                  text.rfind(" ", start + max_chars // 2, end))
+        if cut > start + overlap_chars:
+            end = cut
+        chunks.append(text[start:end])
+        start = end - overlap_chars
+
+
+def truncate_tokens(text, max_tokens, encoding=None):
+    """
+    Cuts a text down to at most `max_tokens` tokens.
+
+    Args:
+        text (str): The text to truncate.
+        max_tokens (int): Token budget.
+        encoding (optional): A tiktoken encoding from `get_encoding`.
+
+    Returns:
+        str: The text, unchanged when it is within budget.
+    """
+    return split_tokens(text, max_tokens, encoding=encoding)[0]
@@ -1 +1 @@
-from .engine import PlaywrightEnginefrom .login import Login
\ No newline at end of file
+from typing import TYPE_CHECKINGfrom .._lazy import attach__all__ = ["PlaywrightEngine", "Login", "LoginOrchestrator", "BrowserService",           "get_browser_service", "PagePool", "RequestBlocker", "ScenarioRunner",           "SelectorStore", "SessionStore", "StabilityDetector", "track_network", "wait_for_stable",           "prune_login_form"]__getattr__, __dir__ = attach(__name__, {    "PlaywrightEngine": ".engine",    "Login": ".login",    "LoginOrchestrator": ".login_orchestrator",    "BrowserService": ".browser_service",    "get_browser_service": ".browser_service",    "PagePool": ".pool",    "RequestBlocker": ".routing",    "ScenarioRunner": ".scenarios",    "SelectorStore": ".selector_store",    "SessionStore": ".session",    "StabilityDetector": ".stability",    "track_network": ".stability",    "wait_for_stable": ".stability",    "prune_login_form": ".form_pruning",})if TYPE_CHECKING:    from .engine import PlaywrightEngine    from .login import Login    from .login_orchestrator import LoginOrchestrator    from .browser_service import BrowserService, get_browser_service    from .pool import PagePool    from .routing import RequestBlocker    from .scenarios import ScenarioRunner    from .selector_store import SelectorStore    from .session import SessionStore    from .stability import StabilityDetector, track_network, wait_for_stable    from .form_pruning import prune_login_form
\ No newline at end of file
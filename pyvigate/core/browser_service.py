@@ -0,0 +1,284 @@
+import asyncio
+import time
+
+from ..instrumentation import span
+
+
+class BrowserService:
+    """
+    A long-lived Playwright driver and browser shared by many jobs.
+
+    Launching the driver and a browser dominates the cost of short jobs, so
+    the service starts them once and hands out cheap browser contexts
+    instead. The browser is health-checked before new contexts are created
+    and recycled after `max_pages` page loads or once its processes use
+    more than `max_memory_mb`. Every document a page loads counts towards
+    the page budget, so pages that are reused, e.g. by a `PagePool`, spend
+    it too; same-document navigations do not. Recycling happens when the
+    next context is opened: it launches a fresh browser for new contexts
+    and closes the old one when its last context closes, so running jobs
+    are never cut off. Long-lived contexts keep the old browser until they
+    are reopened; `PagePool` does so for idle pages, using
+    `needs_recycle` and `is_current`.
+
+    Memory is measured with psutil when it is installed; without it the
+    memory threshold is ignored.
+
+    Attributes:
+        browser_type (str): "chromium", "firefox" or "webkit".
+        headless (bool): Whether browsers run headless.
+        launch_options (dict): Extra options for `browser_type.launch`.
+        max_pages (int): Page loads before the browser is recycled.
+        max_memory_mb (float): Browser memory that triggers recycling.
+        health_check_interval (float): Seconds between health probes.
+        playwright: The Playwright driver handle, once started.
+        browser: The browser new contexts are opened in.
+        stats (dict): Counts of `launches`, `recycles`, `failed_checks`,
+            `contexts`, `pages` opened and `navigations`, i.e. documents
+            loaded.
+    """
+
+    def __init__(self, browser_type="chromium", headless=True, launch_options=None,
+                 max_pages=1000, max_memory_mb=None, health_check_interval=30.0):
+        """
+        Initializes the service. Nothing is launched until `start`.
+
+        Args:
+            browser_type (str, optional): Browser to launch. Defaults to "chromium".
+            headless (bool, optional): Run headless. Defaults to True.
+            launch_options (dict, optional): Extra launch options.
+            max_pages (int, optional): Recycle after this many page loads.
+                Defaults to 1000.
+            max_memory_mb (float, optional): Recycle above this browser memory.
+            health_check_interval (float, optional): Seconds between health
+                probes. Defaults to 30.
+        """
+        self.browser_type = browser_type
+        self.headless = headless
+        self.launch_options = launch_options or {}
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.health_check_interval = health_check_interval
+        self.playwright = None
+        self.browser = None
+        self.stats = {"launches": 0, "recycles": 0, "failed_checks": 0,
+                      "contexts": 0, "pages": 0, "navigations": 0}
+        self._loads = {}
+        self._last_check = 0.0
+        self._open_contexts = {}
+        self._draining = set()
+        self._lock = None
+
+    async def start(self):
+        """
+        Starts the driver and launches the browser.
+
+        Returns:
+            BrowserService: The started service, for chaining.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.playwright is None:
+                from playwright.async_api import async_playwright
+                self.playwright = await async_playwright().start()
+            if self.browser is None:
+                await self._launch()
+        return self
+
+    async def _launch(self):
+        with span("browser.launch", browser=self.browser_type):
+            launcher = getattr(self.playwright, self.browser_type)
+            self.browser = await launcher.launch(headless=self.headless,
+                                                 **self.launch_options)
+        self.stats["launches"] += 1
+        self._loads[self.browser] = 0
+        self._last_check = time.monotonic()
+        self._open_contexts[self.browser] = 0
+
+    async def is_healthy(self, timeout=5.0):
+        """
+        Checks that the browser is connected and can open a context.
+
+        Args:
+            timeout (float, optional): Seconds allowed for the probe. Defaults to 5.
+
+        Returns:
+            bool: True if the browser responded.
+        """
+        if self.browser is None or not self.browser.is_connected():
+            return False
+        try:
+            context = await asyncio.wait_for(self.browser.new_context(), timeout)
+            await context.close()
+        except Exception:
+            return False
+        return True
+
+    def memory_mb(self):
+        """
+        Returns the resident memory of the browser processes in MiB.
+
+        Returns:
+            float: The memory in use, or None if psutil is unavailable.
+        """
+        try:
+            import psutil
+        except ImportError:
+            return None
+        total = 0
+        for child in psutil.Process().children(recursive=True):
+            try:
+                name = child.name().lower()
+                if any(part in name for part in ("chrom", "headless_shell",
+                                                 "firefox", "webkit")):
+                    total += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+
+    def _over_page_budget(self, browser=None):
+        loads = self._loads.get(self.browser if browser is None else browser, 0)
+        return bool(self.max_pages) and loads >= self.max_pages
+
+    def _over_memory(self):
+        if self.max_memory_mb is None:
+            return False
+        memory = self.memory_mb()
+        return memory is not None and memory > self.max_memory_mb
+
+    def needs_recycle(self):
+        """Tells whether the page or memory budget of the browser is spent."""
+        return self._over_page_budget() or self._over_memory()
+
+    def is_current(self, context):
+        """
+        Tells whether a context was opened on the browser now handed out.
+
+        Args:
+            context (BrowserContext): A context from `new_context`.
+
+        Returns:
+            bool: False once the browser has been recycled or replaced.
+        """
+        return getattr(context, "browser", None) is self.browser
+
+    async def recycle(self):
+        """
+        Replaces the browser. The old one closes once its contexts are closed.
+        """
+        old = self.browser
+        await self._launch()
+        self.stats["recycles"] += 1
+        if old is not None:
+            if self._open_contexts.get(old):
+                self._draining.add(old)
+            else:
+                await self._close_browser(old)
+
+    async def _close_browser(self, browser):
+        self._open_contexts.pop(browser, None)
+        self._loads.pop(browser, None)
+        self._draining.discard(browser)
+        try:
+            await browser.close()
+        except Exception:
+            pass
+
+    async def _ensure_browser(self):
+        """Starts, heals or recycles the browser before it is handed out."""
+        if self.browser is None:
+            await self.start()
+        async with self._lock:
+            if not self.browser.is_connected():
+                self.stats["failed_checks"] += 1
+                self._open_contexts.pop(self.browser, None)
+                self._loads.pop(self.browser, None)
+                await self._launch()
+            elif time.monotonic() - self._last_check >= self.health_check_interval:
+                # Probing and measuring memory cost a round-trip, so they
+                # run once per interval rather than for every context.
+                self._last_check = time.monotonic()
+                if not await self.is_healthy():
+                    self.stats["failed_checks"] += 1
+                    await self.recycle()
+                elif self._over_memory():
+                    await self.recycle()
+            if self._over_page_budget():
+                await self.recycle()
+        return self.browser
+
+    async def new_context(self, **context_options):
+        """
+        Opens a browser context on the shared browser.
+
+        Navigations in the context count towards the browser's page budget,
+        and the context keeps a recycled browser alive until it is closed.
+
+        Args:
+            **context_options: Options passed to `browser.new_context`.
+
+        Returns:
+            BrowserContext: The new context.
+        """
+        browser = await self._ensure_browser()
+        context = await browser.new_context(**context_options)
+        self.stats["contexts"] += 1
+        self._open_contexts[browser] = self._open_contexts.get(browser, 0) + 1
+
+        def on_load(page):
+            # "load" fires once per new document in the main frame, not for
+            # same-document (history API or fragment) navigations.
+            self.stats["navigations"] += 1
+            if browser in self._loads:
+                self._loads[browser] += 1
+
+        def on_page(page):
+            self.stats["pages"] += 1
+            page.on("load", on_load)
+
+        def on_close(closed_context):
+            if browser not in self._open_contexts:
+                # The browser was already closed or replaced after a crash.
+                return
+            self._open_contexts[browser] -= 1
+            if browser in self._draining and self._open_contexts[browser] <= 0:
+                asyncio.ensure_future(self._close_browser(browser))
+
+        context.on("page", on_page)
+        context.on("close", on_close)
+        return context
+
+    async def stop(self):
+        """Closes every browser and stops the driver."""
+        for browser in list(self._open_contexts):
+            await self._close_browser(browser)
+        self.browser = None
+        if self.playwright is not None:
+            await self.playwright.stop()
+            self.playwright = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+
+_shared_service = None
+
+
+def get_browser_service(**options):
+    """
+    Returns the process-wide `BrowserService`, creating it on first use.
+
+    Args:
+        **options: Options for `BrowserService`, used only on creation.
+
+    Returns:
+        BrowserService: The shared service. Call `start` before use.
+    """
+    global _shared_service
+    if _shared_service is None:
+        _shared_service = BrowserService(**options)
+    return _shared_service
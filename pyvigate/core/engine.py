@@ -1,4 +1,10 @@
-from playwright.async_api import async_playwright
+import copy
+
+from ..instrumentation import span
+from .pool import PagePool
+from .routing import RequestBlocker
+from .scenarios import ScenarioRunner
+from .stability import StabilityDetector, track_network
 
 
 class PlaywrightEngine:
@@ -7,34 +13,254 @@ class PlaywrightEngine:
 
     Attributes:
         headless (bool): Whether to run the browser in headless mode.
-        browser: Instance of the browser being used.
+        browser: Instance of the browser being used. With a
+            `browser_service` it is looked up on every access, so it follows
+            the service when the browser is recycled.
         page: Current page object from the browser.
+        pool (PagePool): Pool of pages for concurrent work, if started.
+        request_blocker (RequestBlocker): Network blocking rules applied to
+            every page the engine opens, if any.
     """
 
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, request_blocker=None, browser_service=None):
         """
         Initializes the Playwright engine with optional headless mode.
 
         Args:
             headless (bool, optional): Run browser in headless mode. Defaults to True.
+            request_blocker (RequestBlocker, optional): Rules for aborting
+                unwanted requests such as images, fonts and trackers.
+            browser_service (BrowserService, optional): Shared, long-lived
+                browser to open contexts in instead of launching one.
         """
         self.headless = headless
-        self.browser = None
+        self.playwright = None
+        self._browser = None
+        self.context = None
         self.page = None
+        self.pool = None
+        self.request_blocker = request_blocker
+        self.browser_service = browser_service
+
+    @property
+    def browser(self):
+        if self.browser_service is not None:
+            # The service may have recycled its browser since we started.
+            return self.browser_service.browser if self.context is not None else None
+        return self._browser
+
+    @browser.setter
+    def browser(self, browser):
+        self._browser = browser
 
     async def start_browser(self):
         """
         Starts a Playwright browser session based on the headless preference.
+
+        With a `browser_service`, the engine only opens its own context on
+        the shared browser, which takes milliseconds instead of a launch.
+        """
+        if self.browser_service is not None:
+            self.context = await self.new_context()
+        else:
+            from playwright.async_api import async_playwright
+
+            self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(headless=self.headless)
+            self.context = await self.browser.new_context()
+            await self._setup_context(self.context)
+        self.page = await self.context.new_page()
+
+    async def new_context(self, **context_options):
+        """
+        Opens a browser context with the engine's settings applied.
+
+        Args:
+            **context_options: Options passed to `browser.new_context`.
+
+        Returns:
+            BrowserContext: The new context, from the `browser_service` if set.
         """
-        playwright = await async_playwright().start()
-        self.browser = await playwright.chromium.launch(headless=self.headless)
-        self.page = await self.browser.new_page()
+        if self.browser_service is not None:
+            context = await self.browser_service.new_context(**context_options)
+        else:
+            context = await self.browser.new_context(**context_options)
+        await self._setup_context(context)
+        return context
+
+    async def _setup_context(self, context):
+        """Applies engine-wide settings to a newly created browser context."""
+        await track_network(context)
+        if self.request_blocker is not None:
+            await self.request_blocker.attach(context)
+
+    async def block_requests(self, preset=None, resource_types=None,
+                             patterns=None, third_party=False):
+        """
+        Blocks unwanted network requests on every page the engine opens.
+
+        The rules apply to the engine's page and to every context of a
+        running page pool, replacing any earlier blocker, as well as to
+        contexts opened later.
+
+        Args:
+            preset (str or list, optional): Named rule set(s) such as
+                "text-only", "no-media", "no-ads" or "no-third-party".
+            resource_types (list, optional): Resource types to block, e.g.
+                ["image", "font"].
+            patterns (list, optional): URL globs or compiled regexes to block.
+            third_party (bool, optional): Block requests to other domains.
+
+        Returns:
+            RequestBlocker: The blocker, whose `stats` report blocked requests
+            and the estimated bytes saved.
+        """
+        blocker = RequestBlocker(preset=preset, resource_types=resource_types,
+                                 patterns=patterns, third_party=third_party)
+        contexts = [self.page.context] if self.page else []
+        if self.pool:
+            contexts += [context for context in self.pool.contexts
+                         if context not in contexts]
+        for context in contexts:
+            if self.request_blocker is not None:
+                await self.request_blocker.detach(context)
+            await blocker.attach(context)
+        self.request_blocker = blocker
+        return blocker
 
     async def stop_browser(self):
         """
         Closes the current browser session and all associated pages.
+
+        With a `browser_service` only the engine's own contexts are closed
+        and the shared browser keeps running. Otherwise the browser and the
+        Playwright driver are shut down.
+        """
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+        if self.browser_service is not None:
+            if self.context is not None:
+                await self.context.close()
+        else:
+            await self.browser.close()
+            if self.playwright is not None:
+                await self.playwright.stop()
+                self.playwright = None
+        self.context = None
+        self.page = None
+        self.browser = None
+
+    async def start_pool(self, size=4, isolated=True, **context_options):
+        """
+        Opens a pool of pages on the running browser for concurrent work.
+
+        Args:
+            size (int, optional): Number of pages to keep open. Defaults to 4.
+            isolated (bool, optional): Give each page its own browser context.
+                Defaults to True.
+            **context_options: Options passed to `browser.new_context`.
+
+        Returns:
+            PagePool: The started page pool.
+        """
+        if not self.browser:
+            raise Exception("Browser isn't started. Call start_browser first.")
+        if self.pool:
+            await self.pool.close()
+        self.pool = await PagePool(self.browser_service or self.browser,
+                                   size=size, isolated=isolated,
+                                   context_options=context_options,
+                                   context_setup=self._setup_context).start()
+        return self.pool
+
+    async def new_authenticated_context(self, session_store, url, account,
+                                        **context_options):
+        """
+        Opens a browser context restored from a saved login session.
+
+        Args:
+            session_store (SessionStore): Store holding the saved sessions.
+            url (str): Any URL on the host the session belongs to.
+            account (str): The account identifier used when saving.
+            **context_options: Extra options passed to `browser.new_context`.
+
+        Returns:
+            BrowserContext: An authenticated context, or None if no valid
+            session is saved for the account.
+        """
+        storage_state = session_store.load(url, account)
+        if storage_state is None:
+            return None
+        return await self.new_context(storage_state=storage_state,
+                                      **context_options)
+
+    def bind(self, page):
+        """
+        Returns a view of this engine that drives a different page.
+
+        The view shares the browser and pool with this engine, so every
+        engine method can be used against pages checked out of the pool.
+
+        Args:
+            page (Page): The page the returned engine should act on.
+
+        Returns:
+            PlaywrightEngine: An engine bound to `page`.
+        """
+        engine = copy.copy(self)
+        engine.page = page
+        return engine
+
+    async def navigate_many(self, urls, handler=None, return_exceptions=False):
+        """
+        Navigates to many URLs concurrently using the page pool.
+
+        Args:
+            urls (list): The URLs to visit.
+            handler (callable, optional): Coroutine function called as
+                `handler(page, url)` after navigation. Defaults to returning
+                the page HTML.
+            return_exceptions (bool, optional): Collect exceptions in the
+                results instead of raising. Defaults to False.
+
+        Returns:
+            list: One result per URL, in the order given.
+        """
+        if not self.pool:
+            raise Exception("Page pool isn't started. Call start_pool first.")
+
+        async def visit(page, url):
+            await self.bind(page).navigate_to(url)
+            if handler is None:
+                return await page.content()
+            return await handler(page, url)
+
+        return await self.pool.map(visit, urls,
+                                   return_exceptions=return_exceptions)
+
+    async def execute_actions_many(self, action_sequences, return_exceptions=False):
         """
-        await self.browser.close()
+        Executes several action sequences concurrently using the page pool.
+
+        Args:
+            action_sequences (list): A list of action sequences, each in the
+                format accepted by `execute_actions`.
+            return_exceptions (bool, optional): Collect exceptions in the
+                results instead of raising. Defaults to False.
+
+        Returns:
+            list: One entry per sequence; None on success, or the exception
+            when `return_exceptions` is set.
+        """
+        if not self.pool:
+            raise Exception("Page pool isn't started. Call start_pool first.")
+
+        async def run(page, action_sequence):
+            await self.bind(page).execute_actions(action_sequence)
+
+        return await self.pool.map(run, action_sequences,
+                                   return_exceptions=return_exceptions)
 
     async def navigate_to(self, url):
         """
@@ -48,7 +274,13 @@ class PlaywrightEngine:
         """
         if not self.page:
             raise Exception("Browser isn't started. Call start_browser first.")
-        await self.page.goto(url)
+        with span("navigate", url=url) as navigate_span:
+            response = await self.page.goto(url)
+            if response is not None:
+                navigate_span.set("status", response.status)
+                length = response.headers.get("content-length")
+                if length and length.isdigit():
+                    navigate_span.set("bytes", int(length))
         return self.page
 
     async def click_selector(self, selector):
@@ -77,7 +309,8 @@ class PlaywrightEngine:
         Args:
             timeout (int, optional): Maximum time to wait for navigation. Defaults to 30000 ms.
         """
-        await self.page.wait_for_load_state("networkidle", timeout=timeout)
+        with span("wait.navigation"):
+            await self.page.wait_for_load_state("networkidle", timeout=timeout)
 
     async def wait_for_selector(self, selector, timeout=30000):
         """
@@ -87,7 +320,22 @@ class PlaywrightEngine:
             selector (str): The selector of the element to wait for.
             timeout (int, optional): Maximum time to wait for the element. Defaults to 30000 ms.
         """
-        await self.page.wait_for_selector(selector, state="attached", timeout=timeout)
+        with span("wait.selector", selector=selector):
+            await self.page.wait_for_selector(selector, state="attached", timeout=timeout)
+
+    async def wait_for_stable(self, quiet_ms=300, timeout=30000):
+        """
+        Waits until the page has no DOM changes or network activity.
+
+        Args:
+            quiet_ms (int, optional): How long the page must stay quiet. Defaults to 300 ms.
+            timeout (int, optional): Maximum time to wait. Defaults to 30000 ms.
+
+        Returns:
+            bool: True if the page became stable, False on timeout.
+        """
+        detector = StabilityDetector(quiet_ms=quiet_ms, timeout_ms=timeout)
+        return await detector.wait(self.page)
 
     async def take_screenshot(self, path="screenshot.png"):
         """
@@ -107,32 +355,88 @@ class PlaywrightEngine:
         """
         await self.page.pdf(path=path)
 
-    async def execute_actions(self, action_sequence: list):
+    async def run_scenarios(self, scenarios, concurrency=4, step_timeout=30000,
+                            step_retries=0, **context_options):
         """
-        Executes a sequence of actions based on the action method strings.
-    
+        Runs many action sequences in parallel in isolated browser contexts.
+
         Args:
-            action_sequence (list): A list of dictionaries where each dictionary
-            represents an action and its corresponding arguments.
+            scenarios (list): Action sequences, or dicts with `name` and `steps`.
+                Steps may set their own `timeout` (ms) and `retries`.
+            concurrency (int, optional): Scenarios run at once. Defaults to 4.
+            step_timeout (int, optional): Default step timeout. Defaults to 30000 ms.
+            step_retries (int, optional): Default step retries. Defaults to 0.
+            **context_options: Options for each scenario's browser context.
+
+        Returns:
+            list: One result per scenario with its status, duration and
+            per-step latency, attempts and errors.
+        """
+        runner = ScenarioRunner(self, concurrency=concurrency,
+                                step_timeout=step_timeout,
+                                step_retries=step_retries, **context_options)
+        return await runner.run(scenarios)
+
+    async def login_many(self, llm_agent, accounts, concurrency=8,
+                         cache_root="login_cache", **options):
+        """
+        Logs many accounts in concurrently in isolated browser contexts.
+
+        Args:
+            llm_agent (LlmAgent): Agent used to detect login selectors.
+            accounts (list): `(url, username, password)` tuples or dicts.
+            concurrency (int, optional): Logins run at once. Defaults to 8.
+            cache_root (str, optional): Root of the per-account cache
+                namespaces. Defaults to "login_cache".
+            **options: Further `LoginOrchestrator` options.
+
+        Returns:
+            list: One result per account with its status, final URL,
+            attempts, duration and error.
+        """
+        from .login_orchestrator import LoginOrchestrator
+
+        orchestrator = LoginOrchestrator(self, llm_agent, concurrency=concurrency,
+                                         cache_root=cache_root, **options)
+        return await orchestrator.run(accounts)
+
+    def action_methods(self):
         """
-        action_methods = {
+        Maps the action names accepted by `execute_actions` to engine methods.
+
+        Returns:
+            dict: Action name to bound coroutine method.
+        """
+        return {
             'navigate_to': self.navigate_to,
             'click_selector': self.click_selector,
             'take_screenshot': self.take_screenshot,
             'wait_for_selector': self.wait_for_selector,
             'wait_for_navigation': self.wait_for_navigation,
+            'wait_for_stable': self.wait_for_stable,
             'generate_pdf': self.generate_pdf,
             'fill_form': self.fill_form
             # Add other action mappings as needed.
         }
+
+    async def execute_actions(self, action_sequence: list):
+        """
+        Executes a sequence of actions based on the action method strings.
+        The whole sequence is checked first, and a ValueError is raised for
+        an unknown action before any action runs.
+    
+        Args:
+            action_sequence (list): A list of dictionaries where each dictionary
+            represents an action and its corresponding arguments.
+        """
+        action_methods = self.action_methods()
+        for action in action_sequence:
+            if action.get("action") not in action_methods:
+                raise ValueError(f"No method found for action: {action.get('action')}")
     
         for action in action_sequence:
             action_name = action.get("action")
             args = action.get("args", [])
             kwargs = action.get("kwargs", {})
     
-            if action_name in action_methods:
-                method = action_methods[action_name]
-                await method(*args, **kwargs)
-            else:
-                print(f"No method found for action: {action_name}")
+            await action_methods[action_name](*args, **kwargs)
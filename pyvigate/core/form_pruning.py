@@ -0,0 +1,122 @@
+import re
+from html import escape
+
+
+CONTROL_TAGS = ["input", "button", "select", "textarea", "label", "a"]
+KEPT_ATTRIBUTES = ("id", "name", "type", "placeholder", "autocomplete", "for", "role",
+                   "title", "data-testid", "action", "method", "href")
+SUBMIT_TEXT_RE = re.compile(r"\b(log\s*in|sign\s*in|login|signin|continue|next|submit)\b",
+                            re.IGNORECASE)
+MAX_TEXT_CHARS = 80
+MAX_CLASSES = 3
+MAX_LOOSE_CONTROLS = 60
+
+
+def _form_score(form):
+    """Ranks a form by how much it looks like a login form."""
+    score = 0
+    for field in form.find_all("input"):
+        field_type = (field.get("type") or "text").lower()
+        if field_type == "password":
+            score += 10
+        elif field_type in ("email", "text", "tel"):
+            score += 2
+    if SUBMIT_TEXT_RE.search(form.get_text(" ", strip=True)):
+        score += 1
+    return score
+
+
+def _is_control(tag):
+    """Matches form controls and elements that act as buttons, e.g. in SPAs."""
+    return tag.name in CONTROL_TAGS or tag.get("role") == "button"
+
+
+def _is_relevant(element):
+    if element.name == "input":
+        return (element.get("type") or "").lower() != "hidden"
+    if element.name == "a":
+        return (element.get("role") == "button"
+                or bool(SUBMIT_TEXT_RE.search(element.get_text(" ", strip=True))))
+    return True
+
+
+def _render_tag(element, close=True):
+    """Renders an element with only the attributes useful for selectors."""
+    attributes = []
+    for name in KEPT_ATTRIBUTES:
+        value = element.get(name)
+        if value:
+            attributes.append(f'{name}="{escape(str(value))}"')
+    for name, value in element.attrs.items():
+        if name.startswith("aria-") and value:
+            attributes.append(f'{name}="{escape(str(value))}"')
+    classes = element.get("class") or []
+    if isinstance(classes, str):
+        classes = classes.split()
+    if classes:
+        attributes.append(f'class="{escape(" ".join(classes[:MAX_CLASSES]))}"')
+    field_type = (element.get("type") or "").lower()
+    if element.get("value") and field_type in ("submit", "button", "checkbox", "radio"):
+        attributes.append(f'value="{escape(element["value"])}"')
+
+    opening = "<" + " ".join([element.name] + attributes) + ">"
+    if element.name == "input" or not close:
+        return opening
+    text = " ".join(element.get_text(" ", strip=True).split())[:MAX_TEXT_CHARS]
+    return f"{opening}{escape(text)}</{element.name}>"
+
+
+def prune_login_form(soup, max_forms=2):
+    """
+    Reduces a page to the markup needed to find its login fields.
+
+    The forms that look most like login forms (a password field, then
+    text or email fields and a "log in"-like button) are kept, with their
+    inputs, buttons, selects, textareas, labels and `role="button"`
+    elements listed flat under them.
+    Once a form has a password field, forms without one are left out.
+    Only the attributes that selectors are built from are kept, such as id,
+    name, type, placeholder, href, aria-* and a few classes. Labels and
+    buttons are shortened to their text. Scripts, styles, SVGs, hidden
+    inputs and tokens, and every other element are dropped. Controls
+    outside a form are also kept when no form has a password field, or
+    when they look like a submit button, as single-page apps often render
+    login fields without a `<form>`.
+
+    Args:
+        soup (BeautifulSoup): The parsed page.
+        max_forms (int, optional): Most forms kept. Defaults to 2.
+
+    Returns:
+        str: The compact markup, or an empty string if the page has no
+        form controls.
+    """
+    forms = sorted((form for form in soup.find_all("form") if _form_score(form) > 0),
+                   key=_form_score, reverse=True)
+    has_password = bool(forms) and _form_score(forms[0]) >= 10
+    if has_password:
+        # Forms without a password field, e.g. search boxes, are noise then.
+        forms = [form for form in forms if _form_score(form) >= 10]
+    forms = forms[:max_forms]
+    lines = []
+    for form in forms:
+        lines.append(_render_tag(form, close=False))
+        lines.extend("  " + _render_tag(element)
+                     for element in form.find_all(_is_control) if _is_relevant(element))
+        lines.append("</form>")
+
+    loose = 0
+    for element in soup.find_all(_is_control):
+        if loose >= MAX_LOOSE_CONTROLS:
+            break
+        if element.find_parent("form") is not None or not _is_relevant(element):
+            continue
+        looks_like_submit = (element.name in ("button", "a")
+                             or element.get("role") == "button"
+                             or (element.get("type") or "").lower() == "submit") \
+            and SUBMIT_TEXT_RE.search(element.get_text(" ", strip=True)
+                                      or element.get("value") or "")
+        if not has_password or looks_like_submit:
+            lines.append(_render_tag(element))
+            loose += 1
+    return "\n".join(lines)
@@ -1,12 +1,20 @@
-import asyncio
+from __future__ import annotations
+
 import json
-from bs4 import BeautifulSoup
-from playwright.async_api import Page
+from typing import TYPE_CHECKING
 import ast
-import hashlib
 import os
 import shutil
 
+from ..instrumentation import span
+from .form_pruning import prune_login_form
+from .selector_store import SelectorStore, form_fingerprint
+from .stability import StabilityDetector
+from ..services.parsing import make_soup
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
 
 class Login:
     """
@@ -14,49 +22,73 @@ class Login:
 
     Attributes:
         llm_agent: An instance of QueryEngine used for selector detection.
-        credentials_file (str): Path to a JSON file storing login credentials.
+        credentials_file (str): Path to a JSON file storing login credentials,
+            or None to not store them.
         cache_dir (str): Directory path for caching webpage contents.
+        persist (bool): Whether files from earlier runs are kept in `cache_dir`.
+        stability_detector (StabilityDetector): Detector used to wait for
+            the login page to settle.
+        selector_store (SelectorStore): Store of previously detected
+            selectors, consulted before asking the AI.
+        session_store (SessionStore): Store of authenticated storage states
+            used to skip the login form when a session is still valid.
+        page_store (PackStore): If set, pages are cached in this compressed
+            store instead of as files in `cache_dir`.
+        prune_forms (bool): Whether only the login form markup, rather than
+            the whole page, is sent to the AI.
     """
 
     def __init__(self, llm_agent=None,
                  credentials_file="demo_credentials.json",
-                 cache_dir="html_cache"):
+                 cache_dir="html_cache",
+                 persist=True,
+                 stability_detector=None,
+                 selector_store=None,
+                 session_store=None,
+                 page_store=None,
+                 prune_forms=True):
 
         self.llm_agent = llm_agent
         self.credentials_file = credentials_file
         self.cache_dir = cache_dir
+        self.persist = persist
+        self.stability_detector = stability_detector or StabilityDetector()
+        self.selector_store = selector_store
+        self.session_store = session_store
+        self.page_store = page_store
+        self.prune_forms = prune_forms
         self._setup_directories()
 
     def _setup_directories(self):
         """Sets up necessary directories for caching."""
-        if os.path.exists(self.cache_dir):
+        if os.path.exists(self.cache_dir) and not self.persist:
             shutil.rmtree(self.cache_dir)
-        os.makedirs(self.cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
 
-    async def is_page_stable(self, page: Page, interval=0.1, checks=4):
+    async def is_page_stable(self, page: Page, interval=None, checks=None):
         """
         Verifies if the webpage content is stable over a series of intervals.
 
+        The page is watched from inside the browser by the login's
+        `StabilityDetector`, and counts as stable once it has had no DOM
+        changes or network activity for the detector's quiet window, or for
+        `interval * checks` seconds when either is given.
+
         Args:
             page (Page): The Playwright page instance to check.
-            interval (float): The delay between checks.
-            checks (int): The number of checks to determine stability.
+            interval (float, optional): The delay between checks. Defaults
+                to 0.1 when only `checks` is given.
+            checks (int, optional): The number of checks to determine
+                stability. Defaults to 4 when only `interval` is given.
 
         Returns:
             bool: True if stable, False otherwise.
         """
-        last_html_hash = ""
-        stable_checks = 0
-        while stable_checks < checks:
-            await asyncio.sleep(interval)
-            current_html = await page.content()
-            current_hash = hashlib.md5(current_html.encode()).hexdigest()
-            if current_hash == last_html_hash:
-                stable_checks += 1
-            else:
-                stable_checks = 0
-            last_html_hash = current_hash
-        return stable_checks >= checks
+        quiet_ms = None
+        if interval is not None or checks is not None:
+            quiet_ms = (0.1 if interval is None else interval) \
+                * (4 if checks is None else checks) * 1000
+        return await self.stability_detector.wait(page, quiet_ms=quiet_ms)
 
     async def perform_login(self,
                             page: Page, url: str,
@@ -74,16 +106,13 @@ class Login:
         Returns:
             Page: The page instance after the login action.
         """
-        await page.goto(url)
+        with span("navigate", url=url):
+            await page.goto(url)
         await self.is_page_stable(page)
         content = await page.content()
-        soup = BeautifulSoup(content, "html.parser")
-
-        # Cache the page content for AI analysis
-        cache_filename = self.cache_page_content(soup, page.url)
+        soup = make_soup(content)
 
-        # Use the AI to get selectors
-        login_selectors = await self.get_selectors_from_ai(cache_filename)
+        login_selectors = await self.get_selectors(page, soup)
 
         # Perform login actions
         await page.fill(login_selectors["Email/Username Textarea"], username)
@@ -93,19 +122,99 @@ class Login:
 
         # Optionally, save the actual URL after login
         self.save_login_state(url, username, password, page.url)
+        if self.session_store is not None:
+            # Only keep sessions that actually got past the login form.
+            await self.is_page_stable(page)
+            if not await self.is_login_page(page):
+                await self.session_store.save(page.context, url, username)
         return page
 
+    async def is_login_page(self, page: Page):
+        """
+        Tells whether the page is showing a login form.
+
+        Args:
+            page (Page): The Playwright page instance to check.
+
+        Returns:
+            bool: True if a visible password field is present.
+        """
+        for field in await page.query_selector_all("input[type='password']"):
+            if await field.is_visible():
+                return True
+        return False
+
+    async def login_with_session(self, browser, url: str,
+                                 username: str, password: str,
+                                 **context_options):
+        """
+        Opens an authenticated page, reusing a saved session when possible.
+
+        A saved storage state for the account is restored into a new
+        browser context and checked by loading `url`. If the session is
+        missing, expired or the login form is still shown, the full login
+        flow is run in a fresh context and the new session is saved once
+        the login form is gone. A context is closed again if opening the
+        page fails.
+
+        Args:
+            browser (Browser): The Playwright browser, or a `BrowserService`,
+                to open contexts in.
+            url (str): The URL of the login page.
+            username (str): The username for login.
+            password (str): The password for login.
+            **context_options: Options passed to `browser.new_context`.
+
+        Returns:
+            Page: An authenticated page in its own browser context.
+        """
+        if self.session_store is None:
+            raise Exception("login_with_session requires a session_store.")
+
+        storage_state = self.session_store.load(url, username)
+        if storage_state is not None:
+            context = await browser.new_context(storage_state=storage_state,
+                                                **context_options)
+            try:
+                page = await context.new_page()
+                with span("navigate", url=url):
+                    await page.goto(url)
+                await self.is_page_stable(page)
+                logged_in = not await self.is_login_page(page)
+            except BaseException:
+                await context.close()
+                raise
+            if logged_in:
+                return page
+            await context.close()
+            self.session_store.invalidate(url, username)
+
+        context = await browser.new_context(**context_options)
+        try:
+            page = await context.new_page()
+            return await self.perform_login(page, url, username, password)
+        except BaseException:
+            await context.close()
+            raise
+
     def cache_page_content(self, soup, current_url):
         """
         Caches the HTML content of the current page for AI analysis.
 
         Args:
-            soup (BeautifulSoup): BeautifulSoup instance
+            soup (BeautifulSoup or str): BeautifulSoup instance, or markup
+                such as the output of `prune_login_form`.
             current_url (str): The current page URL.
 
         Returns:
-            str: The filepath of the cached content.
+            str: The filepath of the cached content, or its key in
+            `page_store`.
         """
+        if self.page_store is not None:
+            self.page_store.put(current_url, str(soup))
+            self.cache_filename = current_url
+            return current_url
+
         cache_filename = f"{self.cache_dir}/{self._get_filename_from_url(current_url)}_cached.html"
         self.cache_filename = cache_filename
 
@@ -113,12 +222,63 @@ class Login:
             file.write(str(soup))
         return cache_filename
 
-    async def get_selectors_from_ai(self, cache_filename):
+    async def get_selectors(self, page: Page, soup):
+        """
+        Returns login selectors for the page, asking the AI only when needed.
+
+        Selectors remembered in the `selector_store` for the same host and
+        form structure are reused if they still resolve on the live page.
+        Otherwise the page is cached and analysed by the AI, and the answer
+        is stored once it resolves.
+
+        Args:
+            page (Page): The Playwright page showing the login form.
+            soup (BeautifulSoup): The parsed page content.
+
+        Returns:
+            dict: A dictionary of login selectors.
+        """
+        with span("login.selectors", url=page.url) as selectors_span:
+            fingerprint = None
+            if self.selector_store is not None:
+                fingerprint = form_fingerprint(soup)
+                stored = self.selector_store.get(page.url, fingerprint)
+                if stored and await SelectorStore.validate(page, stored):
+                    selectors_span.set("cache", "hit")
+                    return stored
+            selectors_span.set("cache", "miss")
+
+            pruned = ""
+            if self.prune_forms:
+                with span("login.prune") as prune_span:
+                    pruned = prune_login_form(soup)
+                    prune_span.set("bytes", len(pruned))
+
+            # Cache the page content for AI analysis
+            cache_filename = self.cache_page_content(pruned or soup, page.url)
+
+            # Use the AI to get selectors
+            login_selectors = await self.get_selectors_from_ai(
+                cache_filename, content=pruned or None)
+
+            if self.selector_store is not None:
+                if await SelectorStore.validate(page, login_selectors):
+                    self.selector_store.put(page.url, fingerprint, login_selectors)
+                else:
+                    self.selector_store.invalidate(page.url, fingerprint)
+            return login_selectors
+
+    async def get_selectors_from_ai(self, cache_filename, content=None):
         """
         Uses AI to analyze cached page content and extract login selectors.
 
+        Compact content, such as a pruned login form, is sent to the LLM in
+        a single prompt. Otherwise the cached page is indexed and queried;
+        with a `page_store`, only this page is indexed, not the whole store.
+
         Args:
             cache_filename (str): The filepath of the cached page content.
+            content (str, optional): Markup to send to the LLM directly.
 
         Returns:
             dict: A dictionary of detected login selectors.
@@ -134,9 +294,15 @@ class Login:
                                       'Log In/ Sign In button': value'
                                       }
                                       """
-        index = self.llm_agent.create_vector_store_index(
-            index_path=self.cache_dir)
-        response = self.llm_agent.query(index, query_text)
+        if content:
+            response = await self.llm_agent.acomplete(f"{query_text}\n{content}")
+        else:
+            index_path = self.cache_dir
+            if self.page_store is not None:
+                index_path = self.page_store.subset([cache_filename])
+            index = await self.llm_agent.acreate_vector_store_index(
+                index_path=index_path)
+            response = await self.llm_agent.aquery(index, query_text)
         login_selectors = ast.literal_eval(str(response))
         return login_selectors
 
@@ -150,6 +316,8 @@ class Login:
             password (str): The password used for login.
             actual_url (str): The URL after successful login.
         """
+        if self.credentials_file is None:
+            return
         credentials = {
             "url": url,
             "username": username,
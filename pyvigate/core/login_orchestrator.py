@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+import os
+import time
+from urllib.parse import urlparse
+
+from ..instrumentation import span
+from .login import Login
+
+# `Login` arguments the orchestrator sets per account.
+RESERVED_LOGIN_OPTIONS = ("llm_agent", "credentials_file", "cache_dir")
+
+
+class _ContextOpener:
+    """Opens contexts through the engine and remembers them for cleanup."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.contexts = []
+
+    async def new_context(self, **context_options):
+        context = await self.engine.new_context(**context_options)
+        self.contexts.append(context)
+        return context
+
+
+class LoginOrchestrator:
+    """
+    Logs many accounts in at once, each in its own browser context and
+    with its own cache namespace.
+
+    A single `Login` keeps one credentials file and one cache directory,
+    so concurrent logins would overwrite each other's cached pages and mix
+    them in one index. Here every account gets its own `Login` whose cache
+    directory is a namespace under `cache_root`, derived from the host and
+    a hash of the account name. An account listed more than once is logged
+    in once and shares its result. At most `concurrency` logins run at a
+    time. Each one is bounded by `timeout` and retried up to `retries`
+    times, and it produces a result dict instead of raising.
+
+    Attributes:
+        engine (PlaywrightEngine): A started engine, or anything with
+            `new_context`, whose browser the contexts are opened in.
+        llm_agent (LlmAgent): Agent used to detect login selectors.
+        concurrency (int): Maximum logins running at once.
+        cache_root (str): Directory holding one cache namespace per account.
+        timeout (int): Per-attempt timeout in milliseconds.
+        retries (int): Extra attempts after a failed login.
+        keep_pages (bool): Whether authenticated pages are returned open.
+        save_credentials (bool): Whether each namespace keeps a credentials
+            file like `Login` does.
+        login_options (dict): Options passed to every `Login`, e.g.
+            `selector_store`, `session_store` or `prune_forms`.
+        context_options (dict): Options for each account's browser context.
+    """
+
+    def __init__(self, engine, llm_agent=None, concurrency=8,
+                 cache_root="login_cache", timeout=60000, retries=0,
+                 keep_pages=False, save_credentials=False, login_options=None,
+                 **context_options):
+        """
+        Initializes the orchestrator.
+
+        Args:
+            engine (PlaywrightEngine): A started engine.
+            llm_agent (LlmAgent, optional): Agent for selector detection.
+            concurrency (int, optional): Logins run at once. Defaults to 8.
+            cache_root (str, optional): Root of the per-account cache
+                namespaces. Defaults to "login_cache".
+            timeout (int, optional): Per-attempt timeout. Defaults to 60000 ms.
+            retries (int, optional): Retries per account. Defaults to 0.
+            keep_pages (bool, optional): Return authenticated pages open in
+                each result's `page`; the caller closes their contexts.
+                Defaults to False.
+            save_credentials (bool, optional): Write a credentials file in
+                each namespace. Defaults to False.
+            login_options (dict, optional): Extra `Login` options. The
+                orchestrator sets `llm_agent`, `credentials_file` and
+                `cache_dir` itself, so they are rejected here.
+            **context_options: Options for each account's browser context.
+        """
+        reserved = sorted(set(login_options or {}) & set(RESERVED_LOGIN_OPTIONS))
+        if reserved:
+            raise ValueError(f"login_options cannot set {', '.join(reserved)}; "
+                             "use llm_agent, cache_root and save_credentials instead.")
+        self.engine = engine
+        self.llm_agent = llm_agent
+        self.concurrency = concurrency
+        self.cache_root = cache_root
+        self.timeout = timeout
+        self.retries = retries
+        self.keep_pages = keep_pages
+        self.save_credentials = save_credentials
+        self.login_options = login_options or {}
+        self.context_options = context_options
+
+    def namespace(self, url, username):
+        """
+        Returns the cache namespace of an account.
+
+        The account name is hashed so it does not appear in paths.
+
+        Args:
+            url (str): The login page URL.
+            username (str): The account's username.
+
+        Returns:
+            str: The namespace, `<host>/<hash>`.
+        """
+        host = urlparse(url).netloc or "local"
+        account_key = hashlib.sha256(f"{host}|{username}".encode("utf-8")).hexdigest()[:16]
+        return f"{host}/{account_key}"
+
+    def login_for(self, url, username):
+        """
+        Creates the `Login` of one account, scoped to its namespace.
+
+        Args:
+            url (str): The login page URL.
+            username (str): The account's username.
+
+        Returns:
+            Login: A login whose cache and credentials live in the namespace.
+        """
+        directory = os.path.join(self.cache_root, *self.namespace(url, username).split("/"))
+        credentials_file = None
+        if self.save_credentials:
+            os.makedirs(directory, exist_ok=True)
+            credentials_file = os.path.join(directory, "credentials.json")
+        return Login(self.llm_agent, credentials_file=credentials_file,
+                     cache_dir=os.path.join(directory, "html"), **self.login_options)
+
+    @staticmethod
+    def _parse_account(account):
+        if isinstance(account, dict):
+            return account["url"], account["username"], account["password"]
+        url, username, password = account
+        return url, username, password
+
+    async def _attempt(self, login, opener, url, username, password):
+        """Runs one login attempt and returns the authenticated page."""
+        if login.session_store is not None:
+            page = await login.login_with_session(opener, url, username, password,
+                                                  **self.context_options)
+        else:
+            context = await opener.new_context(**self.context_options)
+            page = await login.perform_login(await context.new_page(), url,
+                                             username, password)
+        await login.is_page_stable(page)
+        if await login.is_login_page(page):
+            raise Exception("Login form still shown after submitting")
+        return page
+
+    async def login_account(self, account):
+        """
+        Logs one account in.
+
+        Args:
+            account (tuple or dict): `(url, username, password)`, or a dict
+                with those keys.
+
+        Returns:
+            dict: The `url`, `username`, `namespace`, `status` ("logged_in"
+            or "failed"), `final_url`, `attempts`, `duration_ms` and
+            `error`, plus the open `page` when `keep_pages` is set.
+        """
+        url, username, password = self._parse_account(account)
+        result = {
+            "url": url,
+            "username": username,
+            "namespace": self.namespace(url, username),
+            "status": "failed",
+            "final_url": None,
+            "attempts": 0,
+            "duration_ms": 0.0,
+            "error": None,
+        }
+        started = time.perf_counter()
+        with span("login.account", url=url) as account_span:
+            login = self.login_for(url, username)
+            for attempt in range(self.retries + 1):
+                result["attempts"] = attempt + 1
+                # Contexts are opened through the engine, so they pick up
+                # its request blocking and browser service.
+                opener = _ContextOpener(self.engine)
+                page = None
+                try:
+                    page = await asyncio.wait_for(
+                        self._attempt(login, opener, url, username, password),
+                        self.timeout / 1000 if self.timeout else None)
+                    result.update(status="logged_in", final_url=page.url, error=None)
+                except asyncio.TimeoutError:
+                    result["error"] = f"Login timed out after {self.timeout} ms"
+                except Exception as error:
+                    result["error"] = f"{type(error).__name__}: {error}"
+                finally:
+                    for context in opener.contexts:
+                        if self.keep_pages and page is not None and context is page.context:
+                            continue
+                        try:
+                            await context.close()
+                        except Exception:
+                            pass
+                if page is not None:
+                    if self.keep_pages:
+                        result["page"] = page
+                    break
+            account_span.set("status", result["status"])
+            account_span.set("attempts", result["attempts"])
+        result["duration_ms"] = (time.perf_counter() - started) * 1000
+        return result
+
+    async def run(self, accounts):
+        """
+        Logs accounts in concurrently, at most `concurrency` at a time.
+
+        Accounts sharing a namespace, i.e. the same host and username, are
+        logged in once, so they never race on one cache directory.
+
+        Args:
+            accounts (list): Accounts as accepted by `login_account`.
+
+        Returns:
+            list: One result dict per account, in the order given.
+        """
+        limit = asyncio.Semaphore(self.concurrency)
+        tasks = {}
+
+        async def run_limited(account):
+            async with limit:
+                return await self.login_account(account)
+
+        namespaces = []
+        for account in accounts:
+            url, username, _ = self._parse_account(account)
+            namespace = self.namespace(url, username)
+            namespaces.append(namespace)
+            if namespace not in tasks:
+                tasks[namespace] = asyncio.ensure_future(run_limited(account))
+        results = dict(zip(tasks, await asyncio.gather(*tasks.values())))
+        return [dict(results[namespace]) for namespace in namespaces]
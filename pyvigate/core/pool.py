@@ -0,0 +1,190 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class PagePool:
+    """
+    Maintains a fixed number of browser pages over a single browser process
+    and hands them out to concurrent tasks.
+
+    Each page lives in its own browser context by default, so cookies and
+    storage do not leak between tasks running side by side.
+
+    Over a `BrowserService`, a page is moved to a fresh context when it is
+    checked out after the browser's budget is spent or the browser has been
+    recycled, so long-running pools follow recycling too. A shared context
+    is reopened once all of its pages are idle.
+
+    Attributes:
+        browser: The Playwright browser the pages are opened in, or a
+            `BrowserService` sharing one.
+        size (int): Number of pages kept in the pool.
+        isolated (bool): Whether each page gets its own browser context.
+        context_options (dict): Keyword arguments passed to `new_context`.
+        context_setup (callable): Coroutine function awaited with every new
+            context, e.g. to install request routing.
+    """
+
+    def __init__(self, browser, size=4, isolated=True, context_options=None,
+                 context_setup=None):
+        """
+        Initializes the pool. Pages are only opened by `start`.
+
+        Args:
+            browser: A started Playwright browser or `BrowserService`.
+            size (int, optional): Number of pages to keep. Defaults to 4.
+            isolated (bool, optional): Open one context per page. Defaults to True.
+            context_options (dict, optional): Options for each new browser context.
+            context_setup (callable, optional): Coroutine function called with
+                each new context before pages are opened in it.
+        """
+        if size < 1:
+            raise ValueError("PagePool size must be at least 1.")
+        self.browser = browser
+        self.size = size
+        self.isolated = isolated
+        self.context_options = context_options or {}
+        self.context_setup = context_setup
+        self.contexts = []
+        self.pages = []
+        self._available = None
+
+    async def start(self):
+        """
+        Opens the browser contexts and pages that make up the pool.
+
+        Returns:
+            PagePool: The started pool, for chaining.
+        """
+        self._available = asyncio.Queue()
+        shared_context = None
+        if not self.isolated:
+            shared_context = await self._new_context()
+
+        for _ in range(self.size):
+            context = shared_context
+            if context is None:
+                context = await self._new_context()
+            page = await context.new_page()
+            self.pages.append(page)
+            self._available.put_nowait(page)
+        return self
+
+    async def _new_context(self):
+        context = await self.browser.new_context(**self.context_options)
+        if self.context_setup is not None:
+            await self.context_setup(context)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        """
+        Closes every page and context owned by the pool.
+        """
+        for context in self.contexts:
+            await context.close()
+        self.contexts = []
+        self.pages = []
+        self._available = None
+
+    async def acquire(self):
+        """
+        Checks a page out of the pool, waiting until one is free.
+
+        Returns:
+            Page: A Playwright page reserved for the caller.
+        """
+        if self._available is None:
+            raise Exception("Page pool isn't started. Call start first.")
+        page = await self._available.get()
+        if not self._is_stale(page):
+            return page
+        try:
+            return await self._reopen(page)
+        except BaseException:
+            # The old page still works; recycling is retried next time.
+            self._available.put_nowait(page)
+            raise
+
+    def _is_stale(self, page):
+        """Tells whether a page's context is on a spent or replaced browser."""
+        needs_recycle = getattr(self.browser, "needs_recycle", None)
+        if needs_recycle is None:
+            return False
+        return needs_recycle() or not self.browser.is_current(page.context)
+
+    async def _reopen(self, page):
+        """Moves an idle page, or all pages of a shared context, to a new context."""
+        if self.isolated:
+            old_context = page.context
+            context = await self._new_context()
+            new_page = await context.new_page()
+            self.pages[self.pages.index(page)] = new_page
+        else:
+            if self._available.qsize() < self.size - 1:
+                # Other pages of the shared context are still in use.
+                return page
+            idle = [self._available.get_nowait() for _ in range(self._available.qsize())]
+            old_context = page.context
+            try:
+                context = await self._new_context()
+                self.pages = [await context.new_page() for _ in range(self.size)]
+            except BaseException:
+                for idle_page in idle:
+                    self._available.put_nowait(idle_page)
+                raise
+            new_page = self.pages[0]
+            for idle_page in self.pages[1:]:
+                self._available.put_nowait(idle_page)
+        if old_context in self.contexts:
+            self.contexts.remove(old_context)
+        try:
+            await old_context.close()
+        except Exception:
+            pass
+        return new_page
+
+    def release(self, page):
+        """
+        Returns a previously acquired page to the pool.
+
+        Args:
+            page (Page): The page obtained from `acquire`.
+        """
+        if self._available is not None:
+            self._available.put_nowait(page)
+
+    @asynccontextmanager
+    async def page(self):
+        """
+        Async context manager that acquires a page and releases it on exit.
+
+        Example:
+            >>> async with pool.page() as page:
+            ...     await page.goto("https://example.com")
+        """
+        page = await self.acquire()
+        try:
+            yield page
+        finally:
+            self.release(page)
+
+    async def map(self, func, items, return_exceptions=False):
+        """
+        Runs `func(page, item)` for every item, at most `size` at a time.
+
+        Args:
+            func (callable): Coroutine function taking a page and an item.
+            items (iterable): Items to process.
+            return_exceptions (bool, optional): Return raised exceptions in the
+                result list instead of propagating the first one. Defaults to False.
+
+        Returns:
+            list: Results in the same order as `items`.
+        """
+        async def run(item):
+            async with self.page() as page:
+                return await func(page, item)
+
+        return await asyncio.gather(*(run(item) for item in items),
+                                    return_exceptions=return_exceptions)
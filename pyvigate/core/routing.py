@@ -0,0 +1,202 @@
+import re
+from fnmatch import fnmatch
+from urllib.parse import urlparse
+
+
+# Rough transfer sizes used to estimate what a blocked request would have
+# cost. Playwright cannot report the size of a response that never happens.
+ESTIMATED_BYTES = {
+    "image": 45000,
+    "media": 500000,
+    "font": 35000,
+    "stylesheet": 20000,
+    "script": 30000,
+    "xhr": 5000,
+    "fetch": 5000,
+    "websocket": 0,
+    "eventsource": 0,
+    "manifest": 1000,
+    "texttrack": 5000,
+    "other": 5000,
+}
+
+TRACKER_PATTERNS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*adservice.google.*",
+    "*facebook.net*",
+    "*connect.facebook.com*",
+    "*hotjar.com*",
+    "*segment.io*",
+    "*cdn.segment.com*",
+    "*mixpanel.com*",
+    "*amplitude.com*",
+    "*scorecardresearch.com*",
+    "*quantserve.com*",
+    "*adnxs.com*",
+    "*criteo.com*",
+    "*taboola.com*",
+    "*outbrain.com*",
+]
+
+PRESETS = {
+    "text-only": {
+        "resource_types": ["image", "media", "font", "stylesheet"],
+        "patterns": TRACKER_PATTERNS,
+    },
+    "no-media": {
+        "resource_types": ["image", "media", "font"],
+    },
+    "no-ads": {
+        "patterns": TRACKER_PATTERNS,
+    },
+    "no-third-party": {
+        "third_party": True,
+    },
+}
+
+
+def registrable_domain(host):
+    """
+    Approximates the registrable domain of a host name.
+
+    Args:
+        host (str): A host name such as "cdn.example.co.uk".
+
+    Returns:
+        str: The last two labels, or three for short second-level labels
+        under a country code (e.g. "example.co.uk").
+    """
+    labels = (host or "").lower().rstrip(".").split(".")
+    if len(labels) > 2 and len(labels[-1]) == 2 and len(labels[-2]) <= 3:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+class RequestBlocker:
+    """
+    Aborts unwanted network requests on a page or browser context.
+
+    Requests can be blocked by Playwright resource type, by URL glob or
+    regular expression, or because they go to a third-party domain. Named
+    presets bundle common rules. The main document request is never blocked.
+
+    Attributes:
+        resource_types (set): Resource types to abort.
+        patterns (list): URL globs or compiled regular expressions to abort.
+        third_party (bool): Abort requests to other registrable domains.
+        stats (dict): Counters of allowed and blocked requests and the
+            estimated bytes saved.
+    """
+
+    def __init__(self, preset=None, resource_types=None, patterns=None,
+                 third_party=False):
+        """
+        Initializes the blocker from a preset and/or explicit rules.
+
+        Args:
+            preset (str or list, optional): Name(s) from `PRESETS`, such as
+                "text-only" or "no-third-party".
+            resource_types (list, optional): Extra resource types to block.
+            patterns (list, optional): Extra URL globs or regexes to block.
+            third_party (bool, optional): Block third-party requests.
+                Defaults to False.
+        """
+        self.resource_types = set(resource_types or [])
+        self.patterns = list(patterns or [])
+        self.third_party = third_party
+
+        presets = [preset] if isinstance(preset, str) else list(preset or [])
+        for name in presets:
+            if name not in PRESETS:
+                raise ValueError(f"Unknown request blocking preset: {name}")
+            rules = PRESETS[name]
+            self.resource_types.update(rules.get("resource_types", []))
+            self.patterns.extend(rules.get("patterns", []))
+            self.third_party = self.third_party or rules.get("third_party", False)
+
+        self.stats = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Clears the allowed/blocked counters."""
+        self.stats = {
+            "allowed": 0,
+            "blocked": 0,
+            "blocked_by_type": {},
+            "estimated_bytes_saved": 0,
+        }
+
+    async def attach(self, target):
+        """
+        Starts intercepting requests on a page or browser context.
+
+        Args:
+            target: A Playwright Page or BrowserContext.
+        """
+        await target.route("**/*", self._handle_route)
+
+    async def detach(self, target):
+        """
+        Stops intercepting requests on a page or browser context.
+
+        Args:
+            target: A Playwright Page or BrowserContext passed to `attach`.
+        """
+        await target.unroute("**/*", self._handle_route)
+
+    def _matches_pattern(self, url):
+        for pattern in self.patterns:
+            if isinstance(pattern, re.Pattern):
+                if pattern.search(url):
+                    return True
+            elif fnmatch(url, pattern):
+                return True
+        return False
+
+    def _is_third_party(self, request):
+        try:
+            page_url = request.frame.page.main_frame.url
+        except Exception:
+            return False
+        page_host = urlparse(page_url).hostname
+        if not page_host:
+            return False
+        request_host = urlparse(request.url).hostname
+        return registrable_domain(request_host) != registrable_domain(page_host)
+
+    def should_block(self, request):
+        """
+        Decides whether a request should be aborted.
+
+        Args:
+            request (Request): The intercepted Playwright request.
+
+        Returns:
+            bool: True if the request matches a blocking rule.
+        """
+        if request.resource_type == "document" and request.is_navigation_request():
+            return False
+        if request.resource_type in self.resource_types:
+            return True
+        if self.patterns and self._matches_pattern(request.url):
+            return True
+        if self.third_party and self._is_third_party(request):
+            return True
+        return False
+
+    async def _handle_route(self, route):
+        request = route.request
+        if not self.should_block(request):
+            self.stats["allowed"] += 1
+            await route.fallback()
+            return
+
+        resource_type = request.resource_type
+        by_type = self.stats["blocked_by_type"]
+        by_type[resource_type] = by_type.get(resource_type, 0) + 1
+        self.stats["blocked"] += 1
+        self.stats["estimated_bytes_saved"] += ESTIMATED_BYTES.get(resource_type, 0)
+        await route.abort("blockedbyclient")
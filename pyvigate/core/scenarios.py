@@ -0,0 +1,154 @@
+import asyncio
+import time
+
+
+PLAIN_TYPES = (bool, int, float, str, list, dict)
+
+
+class ScenarioRunner:
+    """
+    Runs many action sequences in parallel, each in its own browser context.
+
+    A scenario is either a list of action dicts, as accepted by
+    `PlaywrightEngine.execute_actions`, or a dict with a `name` and `steps`.
+    Each step may set its own `timeout` (ms) and `retries`. Every step is
+    timed and its outcome recorded; after a failed step the remaining steps
+    of that scenario are skipped. A step's `result` holds the action's
+    return value when it is plain data.
+
+    Attributes:
+        engine (PlaywrightEngine): A started engine whose browser is used.
+        concurrency (int): Maximum scenarios running at once.
+        step_timeout (int): Default per-step timeout in milliseconds.
+        step_retries (int): Default number of retries per step.
+        context_options (dict): Options passed to `browser.new_context`.
+    """
+
+    def __init__(self, engine, concurrency=4, step_timeout=30000,
+                 step_retries=0, **context_options):
+        """
+        Initializes the runner.
+
+        Args:
+            engine (PlaywrightEngine): A started engine.
+            concurrency (int, optional): Scenarios run at once. Defaults to 4.
+            step_timeout (int, optional): Default step timeout. Defaults to 30000 ms.
+            step_retries (int, optional): Default step retries. Defaults to 0.
+            **context_options: Options for each scenario's browser context.
+        """
+        self.engine = engine
+        self.concurrency = concurrency
+        self.step_timeout = step_timeout
+        self.step_retries = step_retries
+        self.context_options = context_options
+
+    async def _run_step(self, engine, step):
+        action_name = step.get("action")
+        result = {
+            "action": action_name,
+            "status": "failed",
+            "attempts": 0,
+            "latency_ms": 0.0,
+            "result": None,
+            "error": None,
+        }
+        method = engine.action_methods().get(action_name)
+        if method is None:
+            result["error"] = f"No method found for action: {action_name}"
+            return result
+
+        timeout = step.get("timeout", self.step_timeout)
+        retries = step.get("retries", self.step_retries)
+        started = time.perf_counter()
+        for attempt in range(retries + 1):
+            result["attempts"] = attempt + 1
+            try:
+                value = await asyncio.wait_for(
+                    method(*step.get("args", []), **step.get("kwargs", {})),
+                    timeout / 1000 if timeout else None)
+                # Only plain data is kept; page handles die with the context.
+                if isinstance(value, PLAIN_TYPES):
+                    result["result"] = value
+                result["status"] = "passed"
+                result["error"] = None
+                break
+            except asyncio.TimeoutError:
+                result["error"] = f"Step timed out after {timeout} ms"
+            except Exception as error:
+                result["error"] = f"{type(error).__name__}: {error}"
+        result["latency_ms"] = (time.perf_counter() - started) * 1000
+        return result
+
+    async def run_scenario(self, scenario, index=0):
+        """
+        Runs a single scenario in a fresh browser context.
+
+        Args:
+            scenario (list or dict): The steps, or a dict with `name` and `steps`.
+            index (int, optional): Position used to name unnamed scenarios.
+
+        Returns:
+            dict: The scenario `name`, `status` ("passed" or "failed"),
+            `duration_ms`, per-step results in `steps`, and `error` if the
+            browser context or page could not be opened.
+        """
+        if isinstance(scenario, dict):
+            name = scenario.get("name", f"scenario-{index}")
+            steps = scenario.get("steps", [])
+        else:
+            name = f"scenario-{index}"
+            steps = scenario
+
+        started = time.perf_counter()
+        step_results = []
+        error = None
+        context = None
+        try:
+            context = await self.engine.new_context(**self.context_options)
+            engine = self.engine.bind(await context.new_page())
+            failed = False
+            for step in steps:
+                if failed:
+                    step_results.append({"action": step.get("action"),
+                                         "status": "skipped"})
+                    continue
+                step_result = await self._run_step(engine, step)
+                step_results.append(step_result)
+                failed = step_result["status"] != "passed"
+        except Exception as setup_error:
+            error = f"{type(setup_error).__name__}: {setup_error}"
+            step_results = [{"action": step.get("action"), "status": "skipped"}
+                            for step in steps]
+        finally:
+            if context is not None:
+                await context.close()
+
+        failed = error is not None or any(step["status"] == "failed" for step in step_results)
+        return {
+            "name": name,
+            "status": "failed" if failed else "passed",
+            "duration_ms": (time.perf_counter() - started) * 1000,
+            "steps": step_results,
+            "error": error,
+        }
+
+    async def run(self, scenarios):
+        """
+        Runs scenarios in parallel, at most `concurrency` at a time.
+
+        Args:
+            scenarios (list): Scenarios as accepted by `run_scenario`.
+
+        Returns:
+            list: One result dict per scenario, in the order given.
+        """
+        if not self.engine.browser:
+            raise Exception("Browser isn't started. Call start_browser first.")
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def run_limited(index, scenario):
+            async with limit:
+                return await self.run_scenario(scenario, index=index)
+
+        return await asyncio.gather(*(run_limited(index, scenario)
+                                      for index, scenario in enumerate(scenarios)))
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+from urllib.parse import urlparse
+
+
+FORM_FIELD_TAGS = ["form", "input", "button", "select", "textarea"]
+FORM_FIELD_ATTRIBUTES = ["type", "name", "id", "autocomplete"]
+
+
+def form_fingerprint(soup):
+    """
+    Computes a structural fingerprint of the forms on a page.
+
+    Only tag names and identifying attributes of form elements are used, so
+    the fingerprint survives content changes (text, tokens, ads) but changes
+    when the login form itself is restructured.
+
+    Args:
+        soup (BeautifulSoup): The parsed page.
+
+    Returns:
+        str: A hex digest identifying the page's form structure.
+    """
+    parts = []
+    for element in soup.find_all(FORM_FIELD_TAGS):
+        if element.name == "input" and element.get("type") == "hidden":
+            continue
+        attributes = ",".join(f"{name}={element.get(name, '')}"
+                              for name in FORM_FIELD_ATTRIBUTES)
+        parts.append(f"{element.name}[{attributes}]")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+class SelectorStore:
+    """
+    Persists login selectors detected by the AI so repeat logins can skip it.
+
+    Selectors are keyed by host and by the structural fingerprint of the
+    login form, and are checked against the live page before being reused.
+
+    Attributes:
+        path (str): JSON file holding the stored selectors.
+        selectors (dict): Stored selectors by key.
+    """
+
+    def __init__(self, path="selector_store.json"):
+        """
+        Opens (or creates) a selector store backed by a JSON file.
+
+        Args:
+            path (str): File to persist the selectors in.
+        """
+        self.path = path
+        self.selectors = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as file:
+                self.selectors = json.load(file)
+
+    @staticmethod
+    def _key(url, fingerprint):
+        return f"{urlparse(url).netloc}|{fingerprint}"
+
+    def save(self):
+        """Writes the stored selectors to disk."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w") as file:
+            json.dump(self.selectors, file)
+
+    def get(self, url, fingerprint):
+        """
+        Looks up stored selectors for a page.
+
+        Args:
+            url (str): The login page URL.
+            fingerprint (str): The page's form fingerprint.
+
+        Returns:
+            dict: The stored selectors, or None on a miss.
+        """
+        return self.selectors.get(self._key(url, fingerprint))
+
+    def put(self, url, fingerprint, selectors):
+        """
+        Stores selectors for a page and saves the store.
+
+        Args:
+            url (str): The login page URL.
+            fingerprint (str): The page's form fingerprint.
+            selectors (dict): The selectors to remember.
+        """
+        self.selectors[self._key(url, fingerprint)] = selectors
+        self.save()
+
+    def invalidate(self, url, fingerprint):
+        """
+        Forgets the selectors stored for a page.
+
+        Args:
+            url (str): The login page URL.
+            fingerprint (str): The page's form fingerprint.
+        """
+        if self.selectors.pop(self._key(url, fingerprint), None) is not None:
+            self.save()
+
+    @staticmethod
+    async def validate(page, selectors):
+        """
+        Checks that every selector still matches an element on the page.
+
+        Args:
+            page (Page): The live Playwright page.
+            selectors (dict): Selectors to check.
+
+        Returns:
+            bool: True if all selectors resolve.
+        """
+        for selector in selectors.values():
+            try:
+                if await page.query_selector(selector) is None:
+                    return False
+            except Exception:
+                return False
+        return True
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import time
+from urllib.parse import urlparse
+
+
+class SessionStore:
+    """
+    Saves and restores Playwright storage state (cookies and local storage)
+    per account and host, so authenticated sessions can be reused.
+
+    Attributes:
+        directory (str): Directory holding one storage state file per session.
+        max_age (float): Seconds after which a saved session is considered
+            expired regardless of its cookies. None disables the limit.
+    """
+
+    def __init__(self, directory="sessions", max_age=None):
+        """
+        Initializes the store.
+
+        Args:
+            directory (str): Directory for the storage state files.
+            max_age (float, optional): Maximum session age in seconds.
+        """
+        self.directory = directory
+        self.max_age = max_age
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, url, account):
+        """
+        Returns the storage state file for an account on a host.
+
+        The account name is hashed so it does not appear in file names.
+
+        Args:
+            url (str): Any URL on the host.
+            account (str): The account identifier, e.g. the username.
+
+        Returns:
+            str: Path of the storage state file.
+        """
+        host = urlparse(url).netloc or url
+        account_key = hashlib.sha256(account.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, host, f"{account_key}.json")
+
+    async def save(self, context, url, account):
+        """
+        Saves the storage state of a browser context.
+
+        Args:
+            context (BrowserContext): The authenticated browser context.
+            url (str): Any URL on the host.
+            account (str): The account identifier.
+
+        Returns:
+            str: Path of the saved storage state file.
+        """
+        path = self.path(url, account)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        await context.storage_state(path=path)
+        return path
+
+    def is_expired(self, path):
+        """
+        Tells whether a saved session can no longer be used.
+
+        A session is expired when it is older than `max_age`, or when it
+        holds persistent cookies and all of them are past their expiry.
+
+        Args:
+            path (str): Path of a storage state file.
+
+        Returns:
+            bool: True if the session should not be reused.
+        """
+        if self.max_age is not None and time.time() - os.path.getmtime(path) > self.max_age:
+            return True
+        with open(path, "r") as file:
+            state = json.load(file)
+        expiries = [cookie["expires"] for cookie in state.get("cookies", [])
+                    if cookie.get("expires", -1) > 0]
+        return bool(expiries) and max(expiries) < time.time()
+
+    def load(self, url, account):
+        """
+        Returns the saved storage state for an account if it is still valid.
+
+        Args:
+            url (str): Any URL on the host.
+            account (str): The account identifier.
+
+        Returns:
+            str: Path to pass as `storage_state` to `new_context`, or None.
+        """
+        path = self.path(url, account)
+        if not os.path.exists(path):
+            return None
+        if self.is_expired(path):
+            self.invalidate(url, account)
+            return None
+        return path
+
+    def invalidate(self, url, account):
+        """
+        Deletes the saved session for an account.
+
+        Args:
+            url (str): Any URL on the host.
+            account (str): The account identifier.
+        """
+        path = self.path(url, account)
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,258 @@
+import asyncio
+import time
+import weakref
+
+from ..instrumentation import span
+
+
+# Installed with `add_init_script`, so requests are counted from the start
+# of every document, including those already in flight when a wait begins.
+NETWORK_TRACKER_SCRIPT = """
+(() => {
+    if (window.__pyvigateNetwork || typeof XMLHttpRequest === "undefined") {
+        return;
+    }
+    const network = window.__pyvigateNetwork = {
+        inflight: 0, lastActivity: performance.now()
+    };
+    const touch = () => { network.lastActivity = performance.now(); };
+
+    const originalFetch = window.fetch;
+    if (originalFetch) {
+        window.fetch = function (...args) {
+            network.inflight++;
+            touch();
+            return originalFetch.apply(this, args).finally(() => {
+                network.inflight--;
+                touch();
+            });
+        };
+    }
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function (...args) {
+        network.inflight++;
+        touch();
+        this.addEventListener("loadend", () => {
+            network.inflight--;
+            touch();
+        }, {once: true});
+        return originalSend.apply(this, args);
+    };
+})();
+"""
+
+STABILITY_SCRIPT = """
+({quietMs, timeoutMs}) => new Promise((resolve) => {
+    const start = performance.now();
+    let lastActivity = start;
+    let inflight = 0;
+    let done = false;
+    const touch = () => { lastActivity = performance.now(); };
+    // Documents loaded with the tracker report requests that started
+    // before this script ran; otherwise only new requests are counted.
+    const tracked = window.__pyvigateNetwork;
+
+    const originalFetch = window.fetch;
+    const originalSend = XMLHttpRequest.prototype.send;
+    if (!tracked) {
+        if (originalFetch) {
+            window.fetch = function (...args) {
+                inflight++;
+                touch();
+                return originalFetch.apply(this, args).finally(() => {
+                    inflight--;
+                    touch();
+                });
+            };
+        }
+        XMLHttpRequest.prototype.send = function (...args) {
+            inflight++;
+            touch();
+            this.addEventListener("loadend", () => {
+                inflight--;
+                touch();
+            }, {once: true});
+            return originalSend.apply(this, args);
+        };
+    }
+
+    const mutations = new MutationObserver(touch);
+    mutations.observe(document, {
+        subtree: true, childList: true, attributes: true, characterData: true
+    });
+    let resources = null;
+    try {
+        resources = new PerformanceObserver(touch);
+        resources.observe({type: "resource"});
+    } catch (error) {
+        resources = null;
+    }
+
+    const finish = (stable) => {
+        if (done) {
+            return;
+        }
+        done = true;
+        clearInterval(timer);
+        mutations.disconnect();
+        if (resources) {
+            resources.disconnect();
+        }
+        if (!tracked) {
+            if (originalFetch) {
+                window.fetch = originalFetch;
+            }
+            XMLHttpRequest.prototype.send = originalSend;
+        }
+        resolve({stable, elapsed: performance.now() - start, inflight});
+    };
+
+    const timer = setInterval(() => {
+        const now = performance.now();
+        if (tracked) {
+            inflight = tracked.inflight;
+            lastActivity = Math.max(lastActivity, tracked.lastActivity);
+        }
+        const quiet = inflight === 0
+            && document.readyState === "complete"
+            && now - lastActivity >= quietMs;
+        if (quiet) {
+            finish(true);
+        } else if (now - start >= timeoutMs) {
+            finish(false);
+        }
+    }, Math.max(10, Math.min(50, quietMs / 4)));
+})
+"""
+
+# Contexts that already run NETWORK_TRACKER_SCRIPT in their documents.
+_tracked_contexts = weakref.WeakSet()
+
+# Messages of the Playwright errors raised when a navigation replaces the
+# document an evaluation runs in.
+NAVIGATION_ERRORS = ("Execution context was destroyed",
+                     "Cannot find context with specified id")
+
+
+async def track_network(context):
+    """
+    Counts fetch and XHR requests from the start of every document that a
+    browser context loads from now on, so `StabilityDetector` also sees
+    requests made before it started waiting.
+
+    Args:
+        context (BrowserContext): The Playwright browser context.
+    """
+    if context in _tracked_contexts:
+        return
+    await context.add_init_script(NETWORK_TRACKER_SCRIPT)
+    _tracked_contexts.add(context)
+
+
+def is_navigation_error(error):
+    """
+    Tells whether an error from `page.evaluate` means the page navigated
+    away while the script ran.
+
+    Args:
+        error (Exception): The raised error.
+
+    Returns:
+        bool: True for Playwright's destroyed-context errors.
+    """
+    try:
+        from playwright.async_api import Error, TimeoutError
+    except ImportError:
+        return False
+    if not isinstance(error, Error) or isinstance(error, TimeoutError):
+        return False
+    return any(message in error.message for message in NAVIGATION_ERRORS)
+
+
+class StabilityDetector:
+    """
+    Waits for a page to settle using observers that run inside the page.
+
+    A MutationObserver tracks DOM changes, wrapped `fetch`/XHR calls count
+    in-flight requests and a PerformanceObserver notes finished resources.
+    The page counts as stable once the document has loaded, no requests are
+    in flight and nothing has changed for `quiet_ms`. Only a small result
+    object crosses the CDP boundary, instead of the serialized DOM.
+
+    Requests are counted from the start of a document when its context was
+    set up with `track_network`, which `wait` does for later documents of
+    the page's context. Otherwise only requests made while waiting count.
+
+    Attributes:
+        quiet_ms (int): Quiet window in milliseconds.
+        timeout_ms (int): Maximum time to wait in milliseconds.
+    """
+
+    def __init__(self, quiet_ms=300, timeout_ms=10000):
+        """
+        Initializes the detector with its default windows.
+
+        Args:
+            quiet_ms (int, optional): Quiet window. Defaults to 300 ms.
+            timeout_ms (int, optional): Give up after this long. Defaults to 10000 ms.
+        """
+        self.quiet_ms = quiet_ms
+        self.timeout_ms = timeout_ms
+
+    async def wait(self, page, quiet_ms=None, timeout_ms=None):
+        """
+        Waits until the page is quiet or the timeout expires.
+
+        Navigations that replace the document while waiting restart the
+        observers on the new document, within the same overall timeout.
+
+        Args:
+            page (Page): The Playwright page to watch.
+            quiet_ms (int, optional): Overrides the detector's quiet window.
+            timeout_ms (int, optional): Overrides the detector's timeout.
+
+        Returns:
+            bool: True if the page became stable, False on timeout.
+        """
+        quiet_ms = self.quiet_ms if quiet_ms is None else quiet_ms
+        timeout_ms = self.timeout_ms if timeout_ms is None else timeout_ms
+        with span("wait.stable", quiet_ms=quiet_ms) as wait_span:
+            await track_network(page.context)
+            stable = await self._wait(page, quiet_ms, timeout_ms)
+            wait_span.set("stable", stable)
+        return stable
+
+    async def _wait(self, page, quiet_ms, timeout_ms):
+        deadline = time.monotonic() + timeout_ms / 1000
+
+        while True:
+            remaining_ms = (deadline - time.monotonic()) * 1000
+            if remaining_ms <= 0:
+                return False
+            try:
+                result = await page.evaluate(
+                    STABILITY_SCRIPT,
+                    {"quietMs": quiet_ms, "timeoutMs": remaining_ms})
+                return bool(result["stable"])
+            except Exception as error:
+                # The execution context is destroyed when the page navigates;
+                # wait for the new document and observe it instead.
+                if not is_navigation_error(error):
+                    raise
+                await asyncio.sleep(0.05)
+
+
+async def wait_for_stable(page, quiet_ms=300, timeout_ms=10000):
+    """
+    Waits until a page is quiet using a one-off `StabilityDetector`.
+
+    Args:
+        page (Page): The Playwright page to watch.
+        quiet_ms (int, optional): Quiet window. Defaults to 300 ms.
+        timeout_ms (int, optional): Maximum wait. Defaults to 10000 ms.
+
+    Returns:
+        bool: True if the page became stable, False on timeout.
+    """
+    detector = StabilityDetector(quiet_ms=quiet_ms, timeout_ms=timeout_ms)
+    return await detector.wait(page)
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+TAG_RE = re.compile(r"<[^>]+>")
+SCRIPT_RE = re.compile(r"<(script|style|noscript)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+
+
+def html_to_text(html):
+    """Returns the visible words of an HTML page, cheaply and without a parser."""
+    return TAG_RE.sub(" ", SCRIPT_RE.sub(" ", html))
+
+
+def simhash(text, bits=64, shingle=3):
+    """
+    Computes the SimHash fingerprint of a text.
+
+    Each run of `shingle` consecutive words is hashed and votes on every
+    bit of the fingerprint, so texts sharing most of their words get
+    fingerprints that differ in only a few bits. Case, punctuation and
+    digits are ignored, so counters, dates and session IDs in the text
+    barely move the fingerprint.
+
+    Args:
+        text (str): The text to fingerprint.
+        bits (int, optional): Fingerprint width, at most 128. Defaults to 64.
+        shingle (int, optional): Words per feature. Defaults to 3.
+
+    Returns:
+        int: The fingerprint.
+    """
+    words = [word for word in WORD_RE.findall(text.lower()) if not word.isdigit()]
+    if len(words) >= shingle:
+        features = (" ".join(words[i:i + shingle])
+                    for i in range(len(words) - shingle + 1))
+    else:
+        features = iter([" ".join(words)])
+    counts = {}
+    for feature in features:
+        counts[feature] = counts.get(feature, 0) + 1
+
+    vector = [0] * bits
+    digest_size = (bits + 7) // 8
+    for feature, weight in counts.items():
+        value = int.from_bytes(hashlib.blake2b(
+            feature.encode("utf-8"), digest_size=digest_size).digest(), "big")
+        for bit in range(bits):
+            vector[bit] += weight if value >> bit & 1 else -weight
+    fingerprint = 0
+    for bit in range(bits):
+        if vector[bit] > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+class NearDuplicateIndex:
+    """
+    Finds near-duplicate pages by their SimHash fingerprints.
+
+    Fingerprints are split into `max_distance + 1` bands and each band is
+    an LSH bucket key. Two fingerprints within `max_distance` bits of each
+    other must agree on at least one whole band, so a lookup only compares
+    against the few fingerprints sharing a bucket instead of every page.
+    Each entry costs one integer plus a bucket slot per band.
+
+    Documents found to be near-duplicates are not added. They are recorded
+    as aliases of the first document seen with that content.
+
+    Attributes:
+        path (str): JSON file the index is persisted to, or None.
+        bits (int): Fingerprint width.
+        max_distance (int): Largest Hamming distance counted as a duplicate.
+        fingerprints (dict): Key to fingerprint of every unique document.
+        aliases (dict): Key of each duplicate to the key it duplicates.
+        stats (dict): Counts of `unique` and `duplicate` documents seen.
+    """
+
+    def __init__(self, path=None, bits=64, max_distance=3, shingle=3):
+        """
+        Opens an index, loading it from `path` if that file exists.
+
+        Args:
+            path (str, optional): File to persist the index to.
+            bits (int, optional): Fingerprint width. Defaults to 64.
+            max_distance (int, optional): Duplicate threshold in bits.
+                Defaults to 3.
+            shingle (int, optional): Words per SimHash feature. Defaults to 3.
+        """
+        if not 0 <= max_distance < bits:
+            raise ValueError("max_distance must be between 0 and bits - 1")
+        self.path = path
+        self.bits = bits
+        self.max_distance = max_distance
+        self.shingle = shingle
+        self.fingerprints = {}
+        self.aliases = {}
+        self.stats = {"unique": 0, "duplicate": 0}
+        bands = max_distance + 1
+        width = bits // bands
+        self._bands = [(i * width, bits - i * width if i == bands - 1 else width)
+                       for i in range(bands)]
+        self._buckets = [{} for _ in self._bands]
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        for key, fingerprint in data.get("fingerprints", {}).items():
+            self._insert(key, int(fingerprint, 16))
+        self.aliases = data.get("aliases", {})
+
+    def save(self):
+        """Writes the index to `path`."""
+        if not self.path:
+            return
+        with self._lock:
+            data = {"bits": self.bits, "max_distance": self.max_distance,
+                    "fingerprints": {key: format(value, "x")
+                                     for key, value in self.fingerprints.items()},
+                    "aliases": dict(self.aliases)}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        """Forgets every document."""
+        with self._lock:
+            self.fingerprints.clear()
+            self.aliases.clear()
+            for bucket in self._buckets:
+                bucket.clear()
+
+    def fingerprint(self, text):
+        """Returns the SimHash of `text` at this index's width."""
+        return simhash(text, self.bits, self.shingle)
+
+    def _band_keys(self, fingerprint):
+        return [fingerprint >> start & ((1 << width) - 1)
+                for start, width in self._bands]
+
+    def _insert(self, key, fingerprint):
+        self.fingerprints[key] = fingerprint
+        for bucket, band in zip(self._buckets, self._band_keys(fingerprint)):
+            bucket.setdefault(band, set()).add(key)
+
+    def _nearest(self, fingerprint):
+        best, best_distance = None, self.max_distance + 1
+        seen = set()
+        for bucket, band in zip(self._buckets, self._band_keys(fingerprint)):
+            for key in bucket.get(band, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                distance = bin(self.fingerprints[key] ^ fingerprint).count("1")
+                if distance < best_distance:
+                    best, best_distance = key, distance
+        return best
+
+    def find(self, text=None, fingerprint=None):
+        """
+        Looks up the document that `text` nearly duplicates.
+
+        Args:
+            text (str, optional): The document text.
+            fingerprint (int, optional): Its precomputed fingerprint.
+
+        Returns:
+            str: The key of the closest document within `max_distance`,
+            or None.
+        """
+        if fingerprint is None:
+            fingerprint = self.fingerprint(text)
+        with self._lock:
+            return self._nearest(fingerprint)
+
+    def add(self, key, text=None, fingerprint=None):
+        """
+        Adds a document unless it nearly duplicates one already indexed.
+
+        Re-adding a key replaces its previous fingerprint.
+
+        Args:
+            key (str): Identifies the document, e.g. its URL or file name.
+            text (str, optional): The document text.
+            fingerprint (int, optional): Its precomputed fingerprint.
+
+        Returns:
+            str: None if the document was added, otherwise the key of the
+            document it duplicates.
+        """
+        if fingerprint is None:
+            fingerprint = self.fingerprint(text)
+        with self._lock:
+            self._remove(key)
+            original = self._nearest(fingerprint)
+            if original is not None:
+                self.aliases[key] = original
+                self.stats["duplicate"] += 1
+                return original
+            self._insert(key, fingerprint)
+            self.stats["unique"] += 1
+            return None
+
+    def remove(self, key):
+        """
+        Forgets a document. Its duplicates are forgotten with it.
+
+        Returns:
+            list: Keys of the forgotten duplicates, which callers may need
+            to add again now that their original is gone.
+        """
+        with self._lock:
+            return self._remove(key)
+
+    def _remove(self, key):
+        self.aliases.pop(key, None)
+        fingerprint = self.fingerprints.pop(key, None)
+        if fingerprint is None:
+            return []
+        for bucket, band in zip(self._buckets, self._band_keys(fingerprint)):
+            keys = bucket.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del bucket[band]
+        orphans = [alias for alias, original in self.aliases.items() if original == key]
+        for alias in orphans:
+            del self.aliases[alias]
+        return orphans
+
+    def __contains__(self, key):
+        return key in self.fingerprints or key in self.aliases
+
+    def __len__(self):
+        return len(self.fingerprints)
@@ -0,0 +1,245 @@
+import functools
+import inspect
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class Span:
+    """
+    A timed operation such as a navigation, a parse or an LLM query.
+
+    Attributes:
+        name (str): Operation name, e.g. "navigate" or "llm.query".
+        attributes (dict): Extra data such as `url`, `bytes` or `cache`
+            ("hit" or "miss").
+        start (float): Start time from `time.perf_counter`.
+        duration_ms (float): Duration in milliseconds, set when the span ends.
+        error (str): Error description if the operation raised.
+    """
+
+    def __init__(self, name, attributes=None):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start = time.perf_counter()
+        self.duration_ms = None
+        self.error = None
+
+    def set(self, key, value):
+        """
+        Attaches an attribute to the span.
+
+        Args:
+            key (str): Attribute name.
+            value: Attribute value.
+        """
+        self.attributes[key] = value
+
+
+class Instrumentation:
+    """
+    Dispatches finished spans to pluggable hooks.
+
+    A hook is either a callable taking a `Span` or an object with an
+    `on_span(span)` method, such as `MetricsAggregator` or an adapter to a
+    tracing backend. With no hooks registered, spans cost two clock reads.
+
+    Attributes:
+        hooks (list): Registered hooks.
+    """
+
+    def __init__(self):
+        self.hooks = []
+
+    def add_hook(self, hook):
+        """
+        Registers a hook to receive every finished span.
+
+        Args:
+            hook: Callable or object with an `on_span` method.
+
+        Returns:
+            The hook, for chaining.
+        """
+        self.hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook):
+        """
+        Unregisters a hook.
+
+        Args:
+            hook: A hook passed to `add_hook`.
+        """
+        if hook in self.hooks:
+            self.hooks.remove(hook)
+
+    def emit(self, span):
+        """
+        Sends a finished span to every hook. Hook errors are swallowed so
+        instrumentation can never break the instrumented code.
+
+        Args:
+            span (Span): The finished span.
+        """
+        for hook in list(self.hooks):
+            try:
+                if hasattr(hook, "on_span"):
+                    hook.on_span(span)
+                else:
+                    hook(span)
+            except Exception:
+                pass
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Times the enclosed block, in sync or async code.
+
+        Example:
+            >>> with instrumentation.span("navigate", url=url) as span:
+            ...     response = await page.goto(url)
+            ...     span.set("bytes", 1024)
+
+        Args:
+            name (str): Operation name.
+            **attributes: Initial span attributes.
+
+        Yields:
+            Span: The running span.
+        """
+        span = Span(name, attributes)
+        try:
+            yield span
+        except BaseException as error:
+            span.error = f"{type(error).__name__}: {error}"
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - span.start) * 1000
+            self.emit(span)
+
+    def instrument(self, name):
+        """
+        Decorator that wraps every call of a sync or async function in a span.
+
+        Args:
+            name (str): Operation name for the spans.
+        """
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+class MetricsAggregator:
+    """
+    In-memory hook that aggregates spans per operation.
+
+    Keeps the most recent `max_samples` durations per operation for
+    percentiles, and running totals of calls, errors, bytes and cache hits
+    and misses.
+    """
+
+    def __init__(self, max_samples=10000):
+        """
+        Initializes an empty aggregator.
+
+        Args:
+            max_samples (int, optional): Durations kept per operation.
+                Defaults to 10000.
+        """
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._operations = {}
+
+    def on_span(self, span):
+        """Records a finished span."""
+        with self._lock:
+            stats = self._operations.get(span.name)
+            if stats is None:
+                stats = {
+                    "samples": deque(maxlen=self.max_samples),
+                    "count": 0,
+                    "errors": 0,
+                    "bytes": 0,
+                    "cache_hits": 0,
+                    "cache_misses": 0,
+                }
+                self._operations[span.name] = stats
+            stats["samples"].append(span.duration_ms)
+            stats["count"] += 1
+            if span.error:
+                stats["errors"] += 1
+            stats["bytes"] += span.attributes.get("bytes") or 0
+            cache = span.attributes.get("cache")
+            if cache == "hit":
+                stats["cache_hits"] += 1
+            elif cache == "miss":
+                stats["cache_misses"] += 1
+
+    @staticmethod
+    def _percentile(ordered, fraction):
+        rank = math.ceil(fraction * len(ordered))
+        return ordered[max(0, min(len(ordered), rank) - 1)]
+
+    def summary(self):
+        """
+        Summarizes every operation seen so far.
+
+        Returns:
+            dict: Operation name to `count`, `errors`, `mean_ms`, `p50_ms`,
+            `p95_ms`, `p99_ms`, `max_ms`, `bytes`, `cache_hits` and
+            `cache_misses`.
+        """
+        with self._lock:
+            report = {}
+            for name, stats in self._operations.items():
+                ordered = sorted(stats["samples"])
+                report[name] = {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "mean_ms": sum(ordered) / len(ordered),
+                    "p50_ms": self._percentile(ordered, 0.50),
+                    "p95_ms": self._percentile(ordered, 0.95),
+                    "p99_ms": self._percentile(ordered, 0.99),
+                    "max_ms": ordered[-1],
+                    "bytes": stats["bytes"],
+                    "cache_hits": stats["cache_hits"],
+                    "cache_misses": stats["cache_misses"],
+                }
+            return report
+
+    def reset(self):
+        """Forgets all recorded spans."""
+        with self._lock:
+            self._operations = {}
+
+
+instrumentation = Instrumentation()
+
+
+def get_instrumentation():
+    """
+    Returns the process-wide instrumentation that pyvigate reports to.
+
+    Returns:
+        Instrumentation: The shared instance.
+    """
+    return instrumentation
+
+
+def span(name, **attributes):
+    """Shortcut for `get_instrumentation().span(name, **attributes)`."""
+    return instrumentation.span(name, **attributes)
@@ -1 +1 @@
-from .caching.caching import Cachingfrom .scraping.scraping import Scrapingfrom .scraping.prompts import ScrapePrompts
\ No newline at end of file
+from typing import TYPE_CHECKINGfrom .._lazy import attach__all__ = ["Caching", "Scraping", "ScrapePrompts", "Crawler", "HttpFetcher"]__getattr__, __dir__ = attach(__name__, {    "Caching": ".caching.caching",    "Scraping": ".scraping.scraping",    "ScrapePrompts": ".scraping.prompts",    "Crawler": ".crawling.crawler",    "HttpFetcher": ".fetching.fetcher",})if TYPE_CHECKING:    from .caching.caching import Caching    from .scraping.scraping import Scraping    from .scraping.prompts import ScrapePrompts    from .crawling.crawler import Crawler    from .fetching.fetcher import HttpFetcher
\ No newline at end of file
@@ -1 +1,4 @@
-from .caching import Caching
\ No newline at end of file
+from .caching import Caching
+from .page_cache import PageCache
+from .pack_store import PackStore
+from ...dedup import NearDuplicateIndex
@@ -1,9 +1,17 @@
+from __future__ import annotations
+
+import hashlib
 import os
-from urllib.parse import urljoin, urlparse
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
 import shutil
 
-from bs4 import BeautifulSoup
-from playwright.async_api import Page
+from ..crawling import Crawler
+from ..parsing import extract_page_async
+from ...instrumentation import span
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
 
 
 class Caching:
@@ -12,51 +20,191 @@ class Caching:
 
     Attributes:
         cache_dir (str): Directory to store cached pages.
+        persist (bool): Whether files from earlier runs are kept.
+        page_cache (PageCache): Optional persistent store used to skip
+            fetching pages that are still fresh or unchanged.
+        parser_pool (ParserPool): Optional pool that pages are parsed in.
+        fetcher (HttpFetcher): Optional HTTP fetch tier tried before the
+            browser; it shares `page_cache` for revalidation.
+        dedup (NearDuplicateIndex): Optional index used to skip pages whose
+            main text nearly duplicates a page already cached.
+        store (PackStore): Optional compressed store that pages are written
+            to instead of one file each in `cache_dir`.
     """
 
-    def __init__(self, cache_dir="html_cache"):
+    def __init__(self, cache_dir="html_cache", persist=True, page_cache=None,
+                 parser_pool=None, fetcher=None, dedup=None, store=None):
         """
         Initializes the caching system with a specified directory.
 
         Args:
             cache_dir (str): The directory for storing cache files.
+            persist (bool): Keep existing files in `cache_dir` instead of
+                wiping it. Defaults to True.
+            page_cache (PageCache, optional): Persistent page store to consult
+                before navigating.
+            parser_pool (ParserPool, optional): Parse pages off the event loop.
+            fetcher (HttpFetcher, optional): Fetch static pages over HTTP
+                instead of navigating.
+            dedup (NearDuplicateIndex, optional): Collapse near-duplicate
+                pages, e.g. URLs differing only by query string or session
+                ID, onto the first one cached.
+            store (PackStore, optional): Pack pages into compressed segment
+                files keyed by URL.
         """
         self.cache_dir = cache_dir
+        self.persist = persist
+        self.page_cache = page_cache
+        self.parser_pool = parser_pool
+        self.fetcher = fetcher
+        self.dedup = dedup
+        self.store = store
         self._setup_directories()
 
     def _setup_directories(self):
         """Sets up necessary directories for caching."""
-        if os.path.exists(self.cache_dir):
+        if os.path.exists(self.cache_dir) and not self.persist:
             shutil.rmtree(self.cache_dir)
-        os.makedirs(self.cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
 
     async def cache_page_content(self, page: Page, url: str):
         """
         Saves the HTML content of a page to the cache directory.
 
+        When a `page_cache` is configured, fresh entries are served without
+        touching the network and stale entries are revalidated with a
+        conditional request, whose body is used if the page has changed.
+        Pages without validators, or that the request cannot serve, fall
+        back to a full navigation. With a `fetcher`, pages that need no
+        rendering are fetched over HTTP and the browser is only used for
+        the rest.
+
+        With a `dedup` index, a page that nearly duplicates one already
+        cached is not written again; the path of the original is returned.
+        Responses the fetcher finds are not HTML, such as downloads, are
+        skipped rather than navigated to.
+
         Args:
             page (Page): The page object from Playwright.
             url (str): The URL of the page to cache.
 
         Returns:
-            str: The file path of the cached content.
+            str: The file path of the cached content, or its key (the URL)
+            in `store`. None if the URL is not an HTML page.
+        """
+        with span("cache.page", url=url) as cache_span:
+            _, content = await self._load(page, url, cache_span)
+            if content is None:
+                return None
+            original = await self._duplicate_of(url, content)
+            if original is not None:
+                cache_span.set("duplicate_of", original)
+                return self._cache_path(original)
+            return self._write_to_cache(url, content)
+
+    async def _load(self, page: Page, url: str, cache_span):
+        """
+        Returns the final URL and body of `url`, taken from the fetcher or
+        `page_cache` when they can serve it and from `page` otherwise. The
+        body is None for responses that are not HTML.
         """
-        await page.goto(url)
+        if self.fetcher is not None:
+            fetched = await self.fetcher.fetch(url, page_cache=self.page_cache)
+            if fetched is not None and fetched["source"] == "non_html":
+                cache_span.set("skipped", fetched["content_type"])
+                return fetched["url"], None
+            cache_span.set("cache", "hit" if fetched and fetched["source"] != "http"
+                           else "miss")
+            if fetched is not None:
+                return fetched["url"], fetched["html"]
+        else:
+            content = await self._get_unchanged_content(page, url)
+            cache_span.set("cache", "miss" if content is None else "hit")
+            if content is not None:
+                return url, content
+        with span("navigate", url=url):
+            response = await page.goto(url)
         content = await page.content()
+        if self.page_cache is not None:
+            headers = response.headers if response else {}
+            self.page_cache.put(url, content, etag=headers.get("etag"),
+                                last_modified=headers.get("last-modified"))
+        return page.url, content
+
+    async def _get_unchanged_content(self, page: Page, url: str):
+        """
+        Returns the body of `url` from the cache, or from the conditional
+        request that revalidated it, if it need not be navigated to again.
+        """
+        if self.page_cache is None or self.page_cache.get_entry(url) is None:
+            return None
+        if not self.page_cache.is_fresh(url):
+            validators = self.page_cache.validators(url)
+            if not validators:
+                return None
+            response = await page.context.request.get(url, headers=validators,
+                                                      max_redirects=0)
+            if response.status == 200:
+                # The page changed; its new body is already here.
+                content = await response.text()
+                headers = response.headers
+                self.page_cache.put(url, content, etag=headers.get("etag"),
+                                    last_modified=headers.get("last-modified"))
+                return content
+            if response.status != 304:
+                return None
+            self.page_cache.touch(url)
+        return self.page_cache.get(url)
+
+    async def _duplicate_of(self, url: str, content: str, text=None):
+        """
+        Fingerprints the main text of a page into `dedup` and returns the
+        URL of the page it nearly duplicates, if any. `text` is the page's
+        boilerplate-stripped text, when it has already been extracted.
+        """
+        if self.dedup is None:
+            return None
+        if text is None:
+            extracted = await extract_page_async(content, url=url,
+                                                 parser_pool=self.parser_pool,
+                                                 strip_boilerplate=True)
+            text = extracted["text"]
+        return self.dedup.add(url, text)
+
+    def _cache_path(self, url: str) -> str:
+        """Returns the cache file path of a URL, or its key in `store`."""
+        if self.store is not None:
+            return url
         filename = self._get_filename_from_url(url) + "_cached.html"
-        cache_filepath = os.path.join(self.cache_dir, filename)
+        return os.path.join(self.cache_dir, filename)
 
-        with open(cache_filepath, "w", encoding="utf-8") as file:
-            file.write(content)
+    def _write_to_cache(self, url: str, content: str) -> str:
+        """Writes page content to its cache file and returns the path."""
+        if self.store is not None:
+            self.store.put(url, content)
+            return url
+        cache_filepath = self._cache_path(url)
+
+        with span("cache.file", url=url, bytes=len(content)):
+            with open(cache_filepath, "w", encoding="utf-8") as file:
+                file.write(content)
         return cache_filepath
 
     def _get_filename_from_url(self, url: str) -> str:
-        """Generates a filename from a URL."""
+        """
+        Generates a filename from a URL. URLs with a query string get a
+        short hash of it appended, so `?page=1` and `?page=2` do not
+        overwrite each other.
+        """
         parsed_url = urlparse(url)
         filename = parsed_url.netloc.replace("www.",
                                              "") + parsed_url.path.replace(
                                                  '/', '_')
-        return filename.strip('_')
+        filename = filename.strip('_')
+        if parsed_url.query:
+            digest = hashlib.sha1(parsed_url.query.encode("utf-8")).hexdigest()[:10]
+            filename = f"{filename}_{digest}"
+        return filename
 
     async def cache_all_links(self, page: Page, base_url: str):
         """
@@ -71,13 +219,62 @@ class Caching:
         """
         await page.goto(base_url)
         content = await page.content()
-        soup = BeautifulSoup(content, "html.parser")
-        links = soup.find_all("a", href=True)
-        unique_links = set([urljoin(base_url,
-                                    link.get(
-                                        "href")) for link in links if link.get(
-                                            "href")])
+        extracted = await extract_page_async(content, url=base_url,
+                                             parser_pool=self.parser_pool,
+                                             text=False)
+        unique_links = set(extracted["links"])
 
         for link in unique_links:
             if urlparse(link).netloc == urlparse(base_url).netloc:
                 await self.cache_page_content(page, link)
+        if self.dedup is not None:
+            self.dedup.save()
+        if self.page_cache is not None:
+            self.page_cache.flush()
+
+    async def crawl_and_cache(self, pool, base_url: str, max_depth=2,
+                              max_pages=100, per_host_concurrency=4,
+                              delay=0.0):
+        """
+        Crawls a site concurrently over a page pool and caches every page.
+
+        Unlike `cache_all_links`, this follows links beyond the first level,
+        deduplicates normalized URLs and keeps several pages in flight.
+        Pages are loaded like in `cache_page_content`: through the fetcher
+        and `page_cache` when configured, navigating only when needed.
+
+        Args:
+            pool (PagePool): A started page pool.
+            base_url (str): The URL to start crawling from.
+            max_depth (int): Maximum link depth from `base_url`.
+            max_pages (int): Maximum number of pages to cache.
+            per_host_concurrency (int): Maximum pages in flight per host.
+            delay (float): Minimum seconds between requests to one host.
+
+        Returns:
+            dict: Maps each visited URL to its cache file path, to None if
+            it is not an HTML page, or to the exception raised while
+            visiting it.
+        """
+        cached = {}
+
+        async def fetch(url, page):
+            with span("cache.page", url=url) as cache_span:
+                return await self._load(page, url, cache_span)
+
+        async def handler(url, page, depth):
+            original = await self._duplicate_of(url, page["html"], page["text"])
+            cached[url] = (self._cache_path(original) if original is not None
+                           else self._write_to_cache(url, page["html"]))
+
+        crawler = Crawler(pool, max_depth=max_depth, max_pages=max_pages,
+                          per_host_concurrency=per_host_concurrency,
+                          delay=delay, parser_pool=self.parser_pool,
+                          extract_text=self.dedup is not None,
+                          strip_boilerplate=True, fetch=fetch)
+        results = await crawler.crawl(base_url, handler)
+        if self.dedup is not None:
+            self.dedup.save()
+        if self.page_cache is not None:
+            self.page_cache.flush()
+        return {url: cached.get(url, error) for url, error in results.items()}
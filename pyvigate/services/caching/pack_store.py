@@ -0,0 +1,398 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+import zlib
+
+from ...instrumentation import span
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+class PackStore:
+    """
+    Append-only store of many pages in a few compressed pack files.
+
+    Writing each page to its own file costs an inode, a directory entry and
+    at least one filesystem block per page, which adds up with hundreds of
+    thousands of pages. Here pages are compressed and appended to segment
+    files of up to `segment_bytes` each. An append-only JSON-lines index
+    records the segment, offset and length of every record, so a page is
+    read back with one slice of a memory-mapped segment.
+
+    Records are compressed with zstd when the zstandard package is installed
+    (`pip install pyvigate[zstd]`) and with zlib otherwise. The codec is
+    kept per record, so stores stay readable either way. Overwritten and
+    deleted records leave garbage behind until `compact` is called.
+
+    The store can be iterated directly as `(key, body)` pairs. Its
+    `load_data` and `lazy_load_data` methods yield llama_index Documents,
+    like `SimpleDirectoryReader`.
+
+    Attributes:
+        path (str): Directory holding the segments and the index.
+        segment_bytes (int): Size at which a new segment is started.
+        codec (str): "zstd" or "zlib", the codec used for new records.
+        level (int): Compression level, or None for the codec default.
+        entries (dict): Key to record location and metadata.
+    """
+
+    INDEX_FILE = "index.jsonl"
+    SEGMENT_FORMAT = "segment-{:06d}.pack"
+
+    def __init__(self, path="page_pack", segment_bytes=256 * 1024 * 1024,
+                 codec=None, level=None):
+        """
+        Opens (or creates) a pack store in `path`.
+
+        Args:
+            path (str, optional): Directory of the store. Defaults to "page_pack".
+            segment_bytes (int, optional): Segment size limit. Defaults to 256 MiB.
+            codec (str, optional): "zstd" or "zlib". Defaults to zstd when
+                available.
+            level (int, optional): Compression level.
+        """
+        if codec is None:
+            codec = "zstd" if _zstd() is not None else "zlib"
+        if codec == "zstd" and _zstd() is None:
+            raise ImportError("zstd compression requires zstandard: "
+                              "pip install pyvigate[zstd]")
+        if codec not in ("zstd", "zlib"):
+            raise ValueError(f"Unknown codec {codec!r}")
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self.codec = codec
+        self.level = level
+        self.entries = {}
+        self._segment = 0
+        self._writer = None
+        self._index_file = None
+        self._maps = {}
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.path, self.INDEX_FILE)
+
+    def _segment_path(self, segment):
+        return os.path.join(self.path, self.SEGMENT_FORMAT.format(segment))
+
+    def _load(self):
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn last line from an interrupted write.
+                        continue
+                    if record.get("deleted"):
+                        self.entries.pop(record["key"], None)
+                    else:
+                        self.entries[record.pop("key")] = record
+        segments = [int(name[8:14]) for name in os.listdir(self.path)
+                    if name.startswith("segment-") and name.endswith(".pack")]
+        self._segment = max(segments, default=0)
+
+    def _compress(self, data):
+        if self.codec == "zstd":
+            options = {} if self.level is None else {"level": self.level}
+            return _zstd().ZstdCompressor(**options).compress(data)
+        return zlib.compress(data, 6 if self.level is None else self.level)
+
+    @staticmethod
+    def _decompress(data, codec):
+        if codec == "zstd":
+            zstandard = _zstd()
+            if zstandard is None:
+                raise ImportError("This record is zstd-compressed; "
+                                  "pip install pyvigate[zstd] to read it")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    def _get_writer(self, size):
+        """Returns the open segment, starting a new one once it is full."""
+        if self._writer is None:
+            self._segment = max(self._segment, 1)
+            self._writer = open(self._segment_path(self._segment), "ab")
+        if self._writer.tell() and self._writer.tell() + size > self.segment_bytes:
+            self._writer.close()
+            self._segment += 1
+            self._writer = open(self._segment_path(self._segment), "ab")
+        return self._writer
+
+    def _append_index(self, record):
+        if self._index_file is None:
+            self._index_file = open(self.index_path, "a", encoding="utf-8")
+        self._index_file.write(json.dumps(record) + "\n")
+        self._index_file.flush()
+
+    def put(self, key, body, metadata=None):
+        """
+        Appends a page to the store, unless the key already holds that body.
+
+        Args:
+            key (str): Identifies the page, usually its URL.
+            body (str): The page content.
+            metadata (dict, optional): JSON-serializable data kept with it.
+
+        Returns:
+            dict: The record's entry.
+        """
+        data = body.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            previous = self.entries.get(key)
+            if previous is not None and previous["hash"] == content_hash \
+                    and previous.get("metadata") == metadata:
+                return previous
+            with span("cache.write", url=key) as write_span:
+                compressed = self._compress(data)
+                writer = self._get_writer(len(compressed))
+                offset = writer.tell()
+                writer.write(compressed)
+                # Flushed before the index names it, so readers never map
+                # a record that is not on disk yet.
+                writer.flush()
+                write_span.set("bytes", len(compressed))
+            entry = {"segment": self._segment, "offset": offset,
+                     "length": len(compressed), "size": len(data),
+                     "codec": self.codec, "hash": content_hash,
+                     "stored_at": time.time()}
+            if metadata:
+                entry["metadata"] = metadata
+            self._append_index(dict(entry, key=key))
+            self.entries[key] = entry
+            return entry
+
+    def _view(self, segment, end):
+        """Returns a memory map of a segment covering at least `end` bytes."""
+        view = self._maps.get(segment)
+        if view is None or len(view) < end:
+            if view is not None:
+                view.close()
+            with open(self._segment_path(segment), "rb") as file:
+                view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = view
+        return view
+
+    def get(self, key):
+        """
+        Reads a page back.
+
+        Args:
+            key (str): The page key.
+
+        Returns:
+            str: The page content, or None if the key is not stored.
+        """
+        with span("cache.read", url=key) as read_span:
+            with self._lock:
+                entry = self.entries.get(key)
+                if entry is None:
+                    read_span.set("cache", "miss")
+                    return None
+                start = entry["offset"]
+                view = self._view(entry["segment"], start + entry["length"])
+                data = view[start:start + entry["length"]]
+            read_span.set("cache", "hit")
+            read_span.set("bytes", entry["size"])
+            return self._decompress(data, entry["codec"]).decode("utf-8")
+
+    def get_entry(self, key):
+        """Returns the location and metadata of a record, or None."""
+        return self.entries.get(key)
+
+    def delete(self, key):
+        """
+        Removes a key. Its bytes stay in the segment until `compact`.
+
+        Args:
+            key (str): The page key.
+        """
+        with self._lock:
+            if self.entries.pop(key, None) is not None:
+                self._append_index({"key": key, "deleted": True})
+
+    def hashes(self):
+        """Maps every key to the SHA-256 of its body."""
+        return {key: entry["hash"] for key, entry in self.entries.items()}
+
+    def keys(self):
+        return list(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        """Yields `(key, body)` pairs in on-disk order."""
+        ordered = sorted(self.entries.items(),
+                         key=lambda item: (item[1]["segment"], item[1]["offset"]))
+        for key, _ in ordered:
+            body = self.get(key)
+            if body is not None:
+                yield key, body
+
+    def lazy_load_data(self, keys=None):
+        """
+        Yields a llama_index Document per page, reading one page at a time.
+
+        Args:
+            keys (list, optional): Only load these keys. Defaults to all.
+
+        Yields:
+            Document: The page, with its key as `file_name` and `url`
+            metadata.
+        """
+        from llama_index.core import Document
+
+        if keys is None:
+            pages = iter(self)
+        else:
+            pages = ((key, self.get(key)) for key in keys if key in self.entries)
+        for key, body in pages:
+            metadata = dict(self.entries[key].get("metadata") or {},
+                            file_name=key, url=key)
+            yield Document(text=body, metadata=metadata)
+
+    def load_data(self, keys=None):
+        """
+        Loads pages as llama_index Documents, like `SimpleDirectoryReader`.
+
+        Args:
+            keys (list, optional): Only load these keys. Defaults to all.
+
+        Returns:
+            list: The Documents.
+        """
+        return list(self.lazy_load_data(keys))
+
+    def subset(self, keys):
+        """
+        Returns a read-only view of some pages, to index only those.
+
+        Args:
+            keys (list): The page keys in the view.
+
+        Returns:
+            PackStoreSubset: A reader over the keys that are stored.
+        """
+        return PackStoreSubset(self, keys)
+
+    def garbage_bytes(self):
+        """Returns the segment bytes no longer referenced by any key."""
+        live = sum(entry["length"] for entry in self.entries.values())
+        total = sum(os.path.getsize(self._segment_path(segment))
+                    for segment in range(1, self._segment + 1)
+                    if os.path.exists(self._segment_path(segment)))
+        return total - live
+
+    def compact(self):
+        """
+        Rewrites live records into fresh segments and drops the old ones.
+
+        Returns:
+            int: The number of bytes reclaimed.
+        """
+        with self._lock:
+            reclaimed = self.garbage_bytes()
+            old_segments = range(1, self._segment + 1)
+            self._close_files()
+            records = []
+            for key, entry in sorted(self.entries.items(),
+                                     key=lambda item: (item[1]["segment"],
+                                                       item[1]["offset"])):
+                with open(self._segment_path(entry["segment"]), "rb") as file:
+                    file.seek(entry["offset"])
+                    records.append((key, entry, file.read(entry["length"])))
+
+            self._segment += 1
+            first_new = self._segment
+            entries = {}
+            for key, entry, data in records:
+                writer = self._get_writer(len(data))
+                entries[key] = dict(entry, segment=self._segment, offset=writer.tell())
+                writer.write(data)
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+            temp_path = self.index_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as file:
+                for key, entry in entries.items():
+                    file.write(json.dumps(dict(entry, key=key)) + "\n")
+            os.replace(temp_path, self.index_path)
+            self.entries = entries
+            for segment in old_segments:
+                if segment < first_new and os.path.exists(self._segment_path(segment)):
+                    os.remove(self._segment_path(segment))
+            return reclaimed
+
+    def _close_files(self):
+        for view in self._maps.values():
+            view.close()
+        self._maps.clear()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+
+    def close(self):
+        """Closes the open segment, the index and all memory maps."""
+        with self._lock:
+            self._close_files()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PackStoreSubset:
+    """
+    Read-only view of some pages of a `PackStore`.
+
+    It reads like the store itself, so it can be passed wherever a store is
+    indexed, e.g. to index the one page being looked at.
+
+    Attributes:
+        store (PackStore): The underlying store.
+        keys (list): The page keys in the view.
+    """
+
+    def __init__(self, store, keys):
+        self.store = store
+        self.keys = [key for key in keys if key in store]
+
+    @property
+    def path(self):
+        return self.store.path
+
+    def hashes(self):
+        """Maps every key in the view to the SHA-256 of its body."""
+        return {key: self.store.entries[key]["hash"] for key in self.keys}
+
+    def lazy_load_data(self, keys=None):
+        """Yields a llama_index Document per page in the view."""
+        keys = self.keys if keys is None else [key for key in keys if key in self.keys]
+        return self.store.lazy_load_data(keys)
+
+    def load_data(self, keys=None):
+        """Loads the pages in the view as llama_index Documents."""
+        return list(self.lazy_load_data(keys))
@@ -0,0 +1,346 @@
+import atexit
+import hashlib
+import json
+import os
+import time
+import weakref
+from collections import Counter
+
+from ...instrumentation import span
+
+# Caches with unsaved changes are flushed at exit, or when collected,
+# without being kept alive.
+_open_caches = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_caches():
+    for cache in list(_open_caches):
+        cache.flush()
+
+
+class PageCache:
+    """
+    Persistent, content-addressed store of page bodies that survives runs.
+
+    Bodies are written once per distinct content hash under `objects/`, and
+    an index maps each URL to its content hash together with the validators
+    (ETag, Last-Modified) and timestamps needed to decide whether a page has
+    to be fetched again. Entries expire after `ttl` seconds, and the least
+    recently used entries are evicted once the stored bodies exceed
+    `max_bytes`.
+
+    Entries are kept in least-recently-used order, and a reference count
+    and running size are kept per body, so storing a page costs the same
+    however large the cache is. The index is written at most once every
+    `save_interval` seconds, and on `flush`, `close` or interpreter exit.
+    Bodies larger than `max_bytes` are not stored.
+
+    Attributes:
+        cache_dir (str): Root directory of the cache.
+        ttl (float): Seconds an entry is considered fresh. None never expires.
+        max_bytes (int): Size limit for stored bodies. None disables eviction.
+        save_interval (float): Minimum seconds between automatic saves.
+        entries (dict): URL to entry metadata, least recently used first.
+    """
+
+    INDEX_FILE = "index.json"
+    OBJECTS_DIR = "objects"
+
+    def __init__(self, cache_dir="page_cache", ttl=24 * 3600,
+                 max_bytes=512 * 1024 * 1024, autosave=True, save_interval=1.0):
+        """
+        Opens (or creates) a page cache in `cache_dir`.
+
+        Args:
+            cache_dir (str): Directory for the index and stored bodies.
+            ttl (float, optional): Freshness lifetime in seconds. Defaults to one day.
+            max_bytes (int, optional): Maximum total body size. Defaults to 512 MiB.
+            autosave (bool, optional): Write the index after changes.
+                Defaults to True; call `save` yourself otherwise.
+            save_interval (float, optional): Minimum seconds between
+                automatic saves. Defaults to 1 second; 0 saves every change.
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.autosave = autosave
+        self.save_interval = save_interval
+        self.entries = {}
+        self._refs = Counter()
+        self._sizes = {}
+        self._bytes = 0
+        self._dirty = False
+        self._saved_at = 0.0
+        os.makedirs(os.path.join(self.cache_dir, self.OBJECTS_DIR), exist_ok=True)
+        self._load()
+        if autosave:
+            _open_caches.add(self)
+
+    @property
+    def index_path(self):
+        return os.path.join(self.cache_dir, self.INDEX_FILE)
+
+    def _load(self):
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                entries = json.load(file)
+            self.entries = dict(sorted(entries.items(),
+                                       key=lambda item: item[1]["last_access"]))
+            for entry in self.entries.values():
+                self._add_ref(entry)
+
+    def save(self):
+        """Writes the URL index to disk atomically."""
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self.entries, file)
+        os.replace(temp_path, self.index_path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def flush(self):
+        """Writes the index if it has unsaved changes."""
+        if self._dirty:
+            self.save()
+
+    def close(self):
+        """Writes pending changes and stops flushing the cache at exit."""
+        self.flush()
+        _open_caches.discard(self)
+
+    def __del__(self):
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def _changed(self):
+        self._dirty = True
+        if self.autosave and time.monotonic() - self._saved_at >= self.save_interval:
+            self.save()
+
+    def _add_ref(self, entry):
+        if self._refs[entry["hash"]] == 0:
+            self._sizes[entry["hash"]] = entry["size"]
+            self._bytes += entry["size"]
+        self._refs[entry["hash"]] += 1
+
+    def _drop_ref(self, content_hash):
+        """Releases one use of a body, deleting it once nothing uses it."""
+        self._refs[content_hash] -= 1
+        if self._refs[content_hash] > 0:
+            return
+        del self._refs[content_hash]
+        self._bytes -= self._sizes.pop(content_hash, 0)
+        path = self._object_path(content_hash)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _mark_used(self, url):
+        """Moves a URL to the most recently used end of `entries`."""
+        entry = self.entries.pop(url)
+        entry["last_access"] = time.time()
+        self.entries[url] = entry
+        return entry
+
+    def _object_path(self, content_hash):
+        return os.path.join(self.cache_dir, self.OBJECTS_DIR,
+                            content_hash[:2], content_hash)
+
+    @staticmethod
+    def content_hash(body):
+        """Returns the SHA-256 hex digest used to address a page body."""
+        return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+    def get_entry(self, url):
+        """
+        Returns the metadata stored for a URL.
+
+        Args:
+            url (str): The page URL.
+
+        Returns:
+            dict: The entry, or None if the URL is not cached.
+        """
+        return self.entries.get(url)
+
+    def is_fresh(self, url):
+        """
+        Tells whether a URL is cached and younger than the TTL.
+
+        Args:
+            url (str): The page URL.
+
+        Returns:
+            bool: True if the cached body can be used without refetching.
+        """
+        entry = self.entries.get(url)
+        if entry is None:
+            return False
+        if self.ttl is None:
+            return True
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def validators(self, url):
+        """
+        Builds conditional request headers from the stored validators.
+
+        Args:
+            url (str): The page URL.
+
+        Returns:
+            dict: `If-None-Match`/`If-Modified-Since` headers, possibly empty.
+        """
+        entry = self.entries.get(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def get(self, url):
+        """
+        Reads the cached body of a URL, regardless of freshness.
+
+        Args:
+            url (str): The page URL.
+
+        Returns:
+            str: The page body, or None if the URL is not cached.
+        """
+        with span("cache.read", url=url) as read_span:
+            entry = self.entries.get(url)
+            if entry is None:
+                read_span.set("cache", "miss")
+                return None
+            path = self._object_path(entry["hash"])
+            if not os.path.exists(path):
+                self._remove(url)
+                self._changed()
+                read_span.set("cache", "miss")
+                return None
+            self._mark_used(url)
+            self._changed()
+            read_span.set("cache", "hit")
+            read_span.set("bytes", entry["size"])
+            with open(path, "r", encoding="utf-8") as file:
+                return file.read()
+
+    def put(self, url, body, etag=None, last_modified=None):
+        """
+        Stores a page body and its validators for a URL.
+
+        Args:
+            url (str): The page URL.
+            body (str): The page content.
+            etag (str, optional): The response ETag header.
+            last_modified (str, optional): The response Last-Modified header.
+
+        Returns:
+            dict: The new entry. Its `changed` key is False when the body is
+            identical to what was already cached for the URL. None if the
+            body is larger than `max_bytes` and was not stored; any older
+            entry for the URL is dropped then.
+        """
+        if self.max_bytes is not None and len(body.encode("utf-8")) > self.max_bytes:
+            self.remove(url)
+            return None
+        content_hash = self.content_hash(body)
+        previous = self.entries.pop(url, None)
+        path = self._object_path(content_hash)
+        if not os.path.exists(path):
+            with span("cache.write", url=url) as write_span:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temp_path = path + ".tmp"
+                with open(temp_path, "w", encoding="utf-8") as file:
+                    file.write(body)
+                os.replace(temp_path, path)
+                write_span.set("bytes", os.path.getsize(path))
+
+        now = time.time()
+        entry = {
+            "hash": content_hash,
+            "size": os.path.getsize(path),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": now,
+            "last_access": now,
+        }
+        self.entries[url] = entry
+        self._add_ref(entry)
+        if previous is not None:
+            self._drop_ref(previous["hash"])
+        self._evict_to_size(keep=url)
+        self._changed()
+        return dict(entry, changed=previous is None or previous["hash"] != content_hash)
+
+    def touch(self, url):
+        """
+        Marks a cached URL as freshly validated, e.g. after a 304 response.
+
+        Args:
+            url (str): The page URL.
+        """
+        if url in self.entries:
+            entry = self._mark_used(url)
+            entry["fetched_at"] = entry["last_access"]
+            self._changed()
+
+    def remove(self, url):
+        """
+        Drops a URL from the cache along with its body if no other URL uses it.
+
+        Args:
+            url (str): The page URL.
+        """
+        if self._remove(url):
+            self._changed()
+
+    def _remove(self, url):
+        entry = self.entries.pop(url, None)
+        if entry is None:
+            return False
+        self._drop_ref(entry["hash"])
+        return True
+
+    def total_bytes(self):
+        """Returns the combined size of all distinct stored bodies."""
+        return self._bytes
+
+    def _evict_to_size(self, keep=None):
+        """Drops least recently used entries, except `keep`, until the bodies fit."""
+        evicted = []
+        if self.max_bytes is None:
+            return evicted
+        while self._bytes > self.max_bytes and self.entries:
+            url = next(iter(self.entries))
+            if url == keep:
+                break
+            evicted.append(url)
+            self._remove(url)
+        return evicted
+
+    def evict(self):
+        """
+        Removes expired entries, then least recently used entries until the
+        stored bodies fit within `max_bytes`.
+
+        Returns:
+            list: The URLs that were evicted.
+        """
+        evicted = []
+        if self.ttl is not None:
+            # Entries that carry validators can still be revalidated cheaply,
+            # so only expired entries without them are dropped outright.
+            cutoff = time.time() - self.ttl
+            for url, entry in list(self.entries.items()):
+                if entry["fetched_at"] < cutoff and not (entry.get("etag") or entry.get("last_modified")):
+                    evicted.append(url)
+                    self._remove(url)
+
+        evicted.extend(self._evict_to_size())
+        if evicted:
+            self._changed()
+        return evicted
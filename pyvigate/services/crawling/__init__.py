@@ -0,0 +1 @@
+from .crawler import Crawler, normalize_url
\ No newline at end of file
@@ -0,0 +1,239 @@
+import asyncio
+import time
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+from ..parsing import extract_page_async
+from ..streaming import stream_results
+from ...instrumentation import span
+
+
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url, base_url=None):
+    """
+    Normalizes a URL so that equivalent addresses deduplicate to one key.
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    tracking parameters, sorts the query string and gives empty paths a "/".
+
+    Args:
+        url (str): The URL to normalize.
+        base_url (str, optional): Base used to resolve relative URLs.
+
+    Returns:
+        str: The normalized URL, or None if it is not an http(s) URL.
+    """
+    if base_url:
+        url = urljoin(base_url, url)
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return None
+
+    host = (parsed.hostname or "").lower()
+    if not host:
+        return None
+    netloc = host
+    if parsed.port and parsed.port != DEFAULT_PORTS[scheme]:
+        netloc = f"{host}:{parsed.port}"
+
+    query = [(key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+             if not key.lower().startswith(TRACKING_PARAMS)]
+    query.sort()
+    return urlunparse((scheme, netloc, parsed.path or "/", "",
+                       urlencode(query), ""))
+
+
+class Crawler:
+    """
+    Crawls a site breadth-first over a pool of pages.
+
+    Pages are pulled from an asyncio frontier queue by one worker per pooled
+    page. URLs are normalized and deduplicated before they are queued, and
+    requests to each host are limited in concurrency and spaced by a delay.
+
+    Attributes:
+        pool (PagePool): The started page pool used for navigation.
+        max_depth (int): Maximum link depth from the start URLs.
+        max_pages (int): Maximum number of pages to visit.
+        per_host_concurrency (int): Maximum pages in flight per host.
+        delay (float): Minimum seconds between requests to the same host.
+        same_domain (bool): Only follow links on the start URLs' hosts.
+        parser_pool (ParserPool): Pool that pages are parsed in, if any.
+        extract_text (bool): Whether page text is extracted for the handler.
+        strip_boilerplate (bool): Whether that text leaves out page chrome.
+        fetch (callable): Coroutine function loading pages instead of
+            navigating, e.g. through a cache.
+        seen (set): Normalized URLs already queued or visited.
+    """
+
+    def __init__(self, pool, max_depth=2, max_pages=100,
+                 per_host_concurrency=2, delay=0.0, same_domain=True,
+                 parser_pool=None, extract_text=False, strip_boilerplate=False,
+                 fetch=None):
+        """
+        Initializes the crawler with its budgets and politeness settings.
+
+        Args:
+            pool (PagePool): A started page pool.
+            max_depth (int, optional): Link depth limit. Defaults to 2.
+            max_pages (int, optional): Page budget. Defaults to 100.
+            per_host_concurrency (int, optional): Pages in flight per host.
+                Defaults to 2.
+            delay (float, optional): Seconds between requests to one host.
+                Defaults to 0.0.
+            same_domain (bool, optional): Stay on the start hosts. Defaults to True.
+            parser_pool (ParserPool, optional): Parse pages off the event loop.
+            extract_text (bool, optional): Extract page text for the handler.
+                Defaults to False.
+            strip_boilerplate (bool, optional): Leave navigation, headers,
+                footers and asides out of that text. Defaults to False.
+            fetch (callable, optional): Coroutine function called as
+                `fetch(url, page)` with a pooled page, returning the final
+                URL and HTML of `url`. The HTML is None for pages to skip,
+                e.g. downloads. Defaults to navigating the page.
+        """
+        self.pool = pool
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.per_host_concurrency = per_host_concurrency
+        self.delay = delay
+        self.same_domain = same_domain
+        self.parser_pool = parser_pool
+        self.extract_text = extract_text
+        self.strip_boilerplate = strip_boilerplate
+        self.fetch = fetch
+        self.seen = set()
+        self._allowed_hosts = set()
+        self._host_limits = {}
+        self._host_locks = {}
+        self._host_last_request = {}
+
+    def _should_visit(self, url):
+        if url in self.seen or len(self.seen) >= self.max_pages:
+            return False
+        if self.same_domain and urlparse(url).netloc not in self._allowed_hosts:
+            return False
+        return True
+
+    def _enqueue(self, frontier, url, depth):
+        if self._should_visit(url):
+            self.seen.add(url)
+            frontier.put_nowait((url, depth))
+
+    async def _wait_for_host(self, host):
+        """Spaces consecutive requests to the same host by `delay` seconds."""
+        if not self.delay:
+            return
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            elapsed = time.monotonic() - self._host_last_request.get(host, 0)
+            if elapsed < self.delay:
+                await asyncio.sleep(self.delay - elapsed)
+            self._host_last_request[host] = time.monotonic()
+
+    async def _extract(self, content, url):
+        """Parses a page once, in the parser pool if configured."""
+        return await extract_page_async(content, url=url,
+                                        parser_pool=self.parser_pool,
+                                        text=self.extract_text,
+                                        strip_boilerplate=self.strip_boilerplate)
+
+    async def _visit(self, url):
+        host = urlparse(url).netloc
+        limit = self._host_limits.setdefault(
+            host, asyncio.Semaphore(self.per_host_concurrency))
+        async with limit:
+            await self._wait_for_host(host)
+            async with self.pool.page() as page:
+                if self.fetch is not None:
+                    return await self.fetch(url, page)
+                with span("navigate", url=url):
+                    await page.goto(url)
+                return page.url, await page.content()
+
+    async def _worker(self, frontier, handler, results):
+        while True:
+            url, depth = await frontier.get()
+            try:
+                final_url, content = await self._visit(url)
+                if content is None:
+                    results[url] = None
+                    continue
+                extracted = await self._extract(content, final_url)
+                extracted["html"] = content
+                if handler is not None:
+                    await handler(url, extracted, depth)
+                results[url] = None
+                if depth < self.max_depth:
+                    for link in extracted["links"]:
+                        link = normalize_url(link)
+                        if link:
+                            self._enqueue(frontier, link, depth + 1)
+            except Exception as error:
+                results[url] = error
+            finally:
+                frontier.task_done()
+
+    async def crawl(self, start_urls, handler=None):
+        """
+        Crawls from the start URLs until the frontier or the budget runs out.
+
+        Args:
+            start_urls (str or list): URL or URLs to start from (depth 0).
+            handler (callable, optional): Coroutine function called as
+                `handler(url, page, depth)` for every visited page, where
+                `page` is a dict with the page's `html`, `title`, `links`
+                and `text` (None unless `extract_text` is set).
+
+        Returns:
+            dict: Maps each visited URL to None on success or to the
+            exception raised while visiting it. Pages skipped by `fetch`
+            map to None without reaching the handler.
+        """
+        if isinstance(start_urls, str):
+            start_urls = [start_urls]
+
+        frontier = asyncio.Queue()
+        results = {}
+        for start_url in start_urls:
+            url = normalize_url(start_url)
+            if url:
+                self._allowed_hosts.add(urlparse(url).netloc)
+                self._enqueue(frontier, url, 0)
+
+        workers = [asyncio.ensure_future(self._worker(frontier, handler, results))
+                   for _ in range(self.pool.size)]
+        try:
+            await frontier.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return results
+
+    async def stream(self, start_urls, buffer_size=None):
+        """
+        Crawls like `crawl`, yielding each page as soon as it is visited.
+
+        The crawl pauses when `buffer_size` pages are waiting to be consumed,
+        so memory stays bounded however large the site is.
+
+        Args:
+            start_urls (str or list): URL or URLs to start from (depth 0).
+            buffer_size (int, optional): Pages buffered before crawling
+                pauses. Defaults to twice the pool size.
+
+        Yields:
+            dict: The page `url`, `depth`, `html`, `title`, `links` and `text`.
+        """
+        async def produce(emit):
+            async def handler(url, page, depth):
+                await emit(dict(page, url=url, depth=depth))
+
+            await self.crawl(start_urls, handler)
+
+        async for record in stream_results(produce, buffer_size or self.pool.size * 2):
+            yield record
@@ -0,0 +1 @@
+from .fetcher import HttpFetcher
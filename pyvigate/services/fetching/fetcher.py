@@ -0,0 +1,233 @@
+import re
+from fnmatch import fnmatch
+from urllib.parse import urlparse
+
+from ...instrumentation import span
+
+
+SCRIPT_RE = re.compile(r"<script\b.*?</script\s*>", re.IGNORECASE | re.DOTALL)
+STYLE_RE = re.compile(r"<(style|noscript|template)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+TAG_RE = re.compile(r"<[^>]+>")
+BODY_RE = re.compile(r"<body\b[^>]*>(.*)</body\s*>", re.IGNORECASE | re.DOTALL)
+NOSCRIPT_RE = re.compile(r"<noscript\b[^>]*>[^<]*(enable|requires?|turn on)\s+javascript",
+                         re.IGNORECASE)
+APP_SHELL_RE = re.compile(
+    r"<div\s+id=[\"'](root|app|__next|__nuxt|svelte)[\"'][^>]*>\s*</div>", re.IGNORECASE)
+
+# Statuses that usually mean the site wants a real browser, e.g. a bot
+# challenge, rather than a genuine error.
+ESCALATE_STATUSES = {401, 403, 429, 503}
+
+
+class HttpFetcher:
+    """
+    Fetches pages over plain HTTP and leaves only pages that need
+    JavaScript to the browser.
+
+    One keep-alive connection pool is shared by all requests. With a
+    `PageCache`, fresh pages are served from disk and stale ones are
+    revalidated with a conditional GET, so an unchanged page costs one 304.
+    Whether a page needs rendering is decided by per-host `rules` first and
+    otherwise by `needs_rendering`.
+
+    Requires httpx (`pip install pyvigate[http]`).
+
+    Attributes:
+        page_cache (PageCache): Store used for fresh hits and revalidation.
+        rules (dict): Host glob, e.g. "*.example.com", to "http" (never
+            render), "browser" (always render) or "auto" (use the heuristic).
+        min_text_chars (int): Visible text below which a page with scripts
+            is assumed to render client-side.
+        timeout (float): Request timeout in seconds.
+        headers (dict): Headers sent with every request.
+        stats (dict): Counts of pages served from `cache`, `not_modified`
+            revalidations, plain `http` fetches, pages `escalated` to the
+            browser and `non_html` responses that were not returned.
+    """
+
+    DEFAULT_HEADERS = {
+        "User-Agent": ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                       "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"),
+        "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+    }
+
+    def __init__(self, page_cache=None, rules=None, min_text_chars=200,
+                 timeout=20.0, max_connections=100, headers=None):
+        """
+        Initializes the fetcher. The HTTP client is created on first use.
+
+        Args:
+            page_cache (PageCache, optional): Store for validators and bodies.
+            rules (dict, optional): Per-host rendering rules.
+            min_text_chars (int, optional): Text threshold of the heuristic.
+                Defaults to 200.
+            timeout (float, optional): Request timeout. Defaults to 20 s.
+            max_connections (int, optional): Connection pool size. Defaults to 100.
+            headers (dict, optional): Extra request headers.
+        """
+        self.page_cache = page_cache
+        self.rules = rules or {}
+        self.min_text_chars = min_text_chars
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.headers = dict(self.DEFAULT_HEADERS, **(headers or {}))
+        self.stats = {"cache": 0, "not_modified": 0, "http": 0, "escalated": 0,
+                      "non_html": 0}
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            try:
+                import httpx
+            except ImportError:
+                raise ImportError("HttpFetcher requires httpx: "
+                                  "pip install pyvigate[http]") from None
+            self._client = httpx.AsyncClient(
+                headers=self.headers, timeout=self.timeout, follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections))
+        return self._client
+
+    def rule_for(self, url):
+        """
+        Returns the rendering rule for a URL's host.
+
+        Args:
+            url (str): The page URL.
+
+        Returns:
+            str: "http", "browser" or "auto".
+        """
+        host = urlparse(url).hostname or ""
+        for pattern, rule in self.rules.items():
+            if fnmatch(host, pattern):
+                return rule
+        return "auto"
+
+    def needs_rendering(self, html, headers=None):
+        """
+        Guesses whether a page only shows its content after JavaScript runs.
+
+        A page is sent to the browser when it is an empty app shell, asks
+        the visitor to enable JavaScript, or has scripts but less than
+        `min_text_chars` of visible text.
+
+        Args:
+            html (str): The page as served over HTTP.
+            headers (dict, optional): The response headers.
+
+        Returns:
+            bool: True if the page should be loaded in a browser.
+        """
+        content_type = (headers or {}).get("content-type", "text/html")
+        if "html" not in content_type:
+            return False
+        if APP_SHELL_RE.search(html) or NOSCRIPT_RE.search(html):
+            return True
+        if "<script" not in html.lower():
+            return False
+        match = BODY_RE.search(html)
+        body = match.group(1) if match else html
+        body = STYLE_RE.sub(" ", SCRIPT_RE.sub(" ", body))
+        text = " ".join(TAG_RE.sub(" ", body).split())
+        return len(text) < self.min_text_chars
+
+    async def fetch(self, url, page_cache=None):
+        """
+        Fetches a page without a browser if it does not need one.
+
+        Args:
+            url (str): The page URL.
+            page_cache (PageCache, optional): Overrides `page_cache`.
+
+        Returns:
+            dict: The final `url`, `html`, HTTP `status` and `source`
+            ("cache", "not_modified" or "http"), or None when the page has
+            to be loaded in a browser. A response that is not HTML, e.g. a
+            download, has `source` "non_html", its `content_type` and no
+            `html`; loading it in a browser would not help.
+        """
+        page_cache = page_cache or self.page_cache
+        rule = self.rule_for(url)
+        if rule == "browser":
+            self.stats["escalated"] += 1
+            return None
+
+        with span("fetch", url=url) as fetch_span:
+            if page_cache is not None and page_cache.is_fresh(url):
+                self.stats["cache"] += 1
+                fetch_span.set("cache", "hit")
+                return {"url": url, "html": page_cache.get(url), "status": 200,
+                        "source": "cache"}
+
+            headers = page_cache.validators(url) if page_cache is not None else {}
+            response = await self._get(url, headers, fetch_span)
+            if response is None:
+                return None
+
+            if response.status_code == 304:
+                body = None
+                if page_cache is not None:
+                    page_cache.touch(url)
+                    body = page_cache.get(url)
+                if body is not None:
+                    self.stats["not_modified"] += 1
+                    fetch_span.set("cache", "hit")
+                    return {"url": url, "html": body, "status": 304,
+                            "source": "not_modified"}
+                # The stored body is gone, so the validators are useless.
+                if page_cache is not None:
+                    page_cache.remove(url)
+                response = await self._get(url, {}, fetch_span)
+                if response is None:
+                    return None
+                if response.status_code == 304:
+                    self.stats["escalated"] += 1
+                    fetch_span.set("escalated", True)
+                    return None
+
+            fetch_span.set("cache", "miss")
+            content_type = response.headers.get("content-type", "text/html")
+            if "html" not in content_type:
+                self.stats["non_html"] += 1
+                fetch_span.set("content_type", content_type)
+                return {"url": str(response.url), "html": None,
+                        "status": response.status_code, "source": "non_html",
+                        "content_type": content_type}
+            fetch_span.set("bytes", len(response.content))
+            html = response.text
+            if rule != "http" and (response.status_code in ESCALATE_STATUSES
+                                   or self.needs_rendering(html, response.headers)):
+                self.stats["escalated"] += 1
+                fetch_span.set("escalated", True)
+                return None
+
+            if page_cache is not None and response.status_code == 200:
+                page_cache.put(url, html, etag=response.headers.get("etag"),
+                               last_modified=response.headers.get("last-modified"))
+            self.stats["http"] += 1
+            return {"url": str(response.url), "html": html,
+                    "status": response.status_code, "source": "http"}
+
+    async def _get(self, url, headers, fetch_span):
+        """Sends a GET, or returns None and counts an escalation on errors."""
+        try:
+            return await self._get_client().get(url, headers=headers)
+        except ImportError:
+            raise
+        except Exception as error:
+            fetch_span.set("error", f"{type(error).__name__}: {error}")
+            self.stats["escalated"] += 1
+            return None
+
+    async def close(self):
+        """Closes the connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,2 @@
+from .parser import HtmlDocument, available_backends, make_soup, parse_html
+from .offload import ParserPool, extract_page, extract_page_async
\ No newline at end of file
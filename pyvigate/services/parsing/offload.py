@@ -0,0 +1,131 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from ...instrumentation import span
+from .parser import parse_html
+
+
+def extract_page(html, url=None, backend=None, strip_boilerplate=False,
+                 same_domain=False, text=True):
+    """
+    Parses a page and returns its content as plain, picklable data.
+
+    This is the unit of work shipped to `ParserPool` workers, so it only
+    takes and returns builtins and never a parse tree.
+
+    Args:
+        html (str): The page HTML.
+        url (str, optional): The page URL, used to resolve links.
+        backend (str, optional): Parser backend; defaults to the fastest installed.
+        strip_boilerplate (bool, optional): Drop page chrome from the text.
+        same_domain (bool, optional): Keep only links on the page's host.
+        text (bool, optional): Extract the page text. Defaults to True.
+
+    Returns:
+        dict: The page `url`, `title`, `text` (None if not requested) and
+        sorted `links`.
+    """
+    document = parse_html(html, url=url, backend=backend)
+    return {
+        "url": url,
+        "title": document.title,
+        "text": document.text(strip_boilerplate=strip_boilerplate) if text else None,
+        "links": sorted(document.links(same_domain=same_domain)),
+    }
+
+
+class ParserPool:
+    """
+    Runs HTML parsing and text extraction off the event loop.
+
+    A process pool spreads CPU-bound parsing across cores. A thread pool is
+    enough for parsers that release the GIL (lxml, selectolax) and avoids
+    pickling page HTML between processes.
+
+    Attributes:
+        kind (str): "process" or "thread".
+        max_workers (int): Number of workers, or None for the executor default.
+        backend (str): Parser backend used by the workers.
+    """
+
+    def __init__(self, max_workers=None, kind="process", backend=None):
+        """
+        Initializes the pool. Workers are started on first use.
+
+        Args:
+            max_workers (int, optional): Number of workers.
+            kind (str, optional): "process" or "thread". Defaults to "process".
+            backend (str, optional): Parser backend; defaults to the fastest installed.
+        """
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown parser pool kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.backend = backend
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def extract(self, html, url=None, strip_boilerplate=False,
+                      same_domain=False, text=True):
+        """
+        Parses a page in a worker and returns its extracted content.
+
+        Args:
+            html (str): The page HTML.
+            url (str, optional): The page URL, used to resolve links.
+            strip_boilerplate (bool, optional): Drop page chrome from the text.
+            same_domain (bool, optional): Keep only links on the page's host.
+            text (bool, optional): Extract the page text. Defaults to True.
+
+        Returns:
+            dict: See `extract_page`.
+        """
+        loop = asyncio.get_event_loop()
+        work = partial(extract_page, html, url=url, backend=self.backend,
+                       strip_boilerplate=strip_boilerplate,
+                       same_domain=same_domain, text=text)
+        return await loop.run_in_executor(self._get_executor(), work)
+
+    def close(self):
+        """Shuts the workers down."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+async def extract_page_async(html, url=None, parser_pool=None, backend=None,
+                             **options):
+    """
+    Extracts a page in `parser_pool` if given, inline otherwise, and
+    records the work as a "parse" span.
+
+    Args:
+        html (str): The page HTML.
+        url (str, optional): The page URL, used to resolve links.
+        parser_pool (ParserPool, optional): Pool to parse in.
+        backend (str, optional): Backend for inline parsing.
+        **options: `strip_boilerplate`, `same_domain` and `text`, as for
+            `extract_page`.
+
+    Returns:
+        dict: See `extract_page`.
+    """
+    with span("parse", url=url, bytes=len(html)) as parse_span:
+        if parser_pool is not None:
+            parse_span.set("pool", parser_pool.kind)
+            return await parser_pool.extract(html, url=url, **options)
+        return extract_page(html, url=url, backend=backend, **options)
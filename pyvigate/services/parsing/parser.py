@@ -0,0 +1,212 @@
+from urllib.parse import urljoin, urlparse
+
+
+# Elements that never carry page text.
+NON_TEXT_TAGS = ["script", "style", "noscript", "template", "svg", "iframe"]
+
+# Page chrome that repeats across a site and drowns out the main content.
+BOILERPLATE_TAGS = NON_TEXT_TAGS + ["nav", "header", "footer", "aside"]
+
+BACKENDS = ["selectolax", "lxml", "bs4"]
+
+
+def _backend_installed(name):
+    try:
+        if name == "selectolax":
+            import selectolax.lexbor  # noqa: F401
+        elif name == "lxml":
+            import lxml.html  # noqa: F401
+        else:
+            import bs4  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def available_backends():
+    """
+    Lists the installed parser backends, fastest first.
+
+    Returns:
+        list: Backend names out of "selectolax", "lxml" and "bs4".
+    """
+    return [name for name in BACKENDS if _backend_installed(name)]
+
+
+def make_soup(html):
+    """
+    Parses HTML with BeautifulSoup, using the lxml builder when installed.
+
+    Args:
+        html (str): The page HTML.
+
+    Returns:
+        BeautifulSoup: The parsed document.
+    """
+    from bs4 import BeautifulSoup
+    features = "lxml" if _backend_installed("lxml") else "html.parser"
+    return BeautifulSoup(html, features)
+
+
+class HtmlDocument:
+    """
+    A page parsed once and shared between link and text extraction.
+
+    The fastest installed backend is used unless one is requested:
+    selectolax (lexbor), then lxml, then BeautifulSoup. Results are cached,
+    so asking for links and text of the same page parses it only once.
+
+    Attributes:
+        html (str): The raw page HTML.
+        url (str): The URL the page was loaded from, used to resolve links.
+        backend (str): The backend that parsed the page.
+    """
+
+    def __init__(self, html, url=None, backend=None):
+        """
+        Parses the page.
+
+        Args:
+            html (str): The page HTML.
+            url (str, optional): The page URL.
+            backend (str, optional): "selectolax", "lxml" or "bs4".
+                Defaults to the fastest installed backend.
+        """
+        if backend is None:
+            backend = available_backends()[0]
+        elif backend not in BACKENDS:
+            raise ValueError(f"Unknown parser backend: {backend}")
+        self.html = html
+        self.url = url
+        self.backend = backend
+        self._hrefs = None
+        self._title = None
+        self._text = {}
+        self._boilerplate_stripped = False
+        self._tree = self._parse()
+
+    def _parse(self):
+        return getattr(self, f"_parse_{self.backend}")(self.html)
+
+    def _parse_selectolax(self, html):
+        from selectolax.lexbor import LexborHTMLParser
+        return LexborHTMLParser(html)
+
+    def _parse_lxml(self, html):
+        import lxml.html
+        if not html.strip():
+            html = "<html></html>"
+        return lxml.html.document_fromstring(html)
+
+    def _parse_bs4(self, html):
+        return make_soup(html)
+
+    def _read_hrefs_and_title(self):
+        if self._hrefs is not None:
+            return
+        tree = self._tree
+        if self.backend == "selectolax":
+            self._hrefs = [node.attributes.get("href") or "" for node in tree.css("a[href]")]
+            title = tree.css_first("title")
+            self._title = title.text(strip=True) if title is not None else ""
+        elif self.backend == "lxml":
+            self._hrefs = tree.xpath("//a/@href")
+            self._title = " ".join(tree.xpath("//title//text()")).strip()
+        else:
+            self._hrefs = [anchor["href"] for anchor in tree.find_all("a", href=True)]
+            self._title = tree.title.get_text(strip=True) if tree.title else ""
+
+    @property
+    def title(self):
+        """str: The page title, or an empty string."""
+        self._read_hrefs_and_title()
+        return self._title
+
+    def hrefs(self):
+        """
+        Returns the raw `href` values of all anchors, in document order.
+
+        Returns:
+            list: The href attribute values.
+        """
+        self._read_hrefs_and_title()
+        return list(self._hrefs)
+
+    def links(self, same_domain=True):
+        """
+        Returns the absolute URLs the page links to.
+
+        Args:
+            same_domain (bool, optional): Keep only links on the page's host.
+                Defaults to True.
+
+        Returns:
+            set: Absolute link URLs with fragments removed.
+        """
+        base_netloc = urlparse(self.url or "").netloc
+        links = set()
+        for href in self.hrefs():
+            href = href.strip()
+            if not href or href.startswith(("javascript:", "mailto:", "tel:", "#")):
+                continue
+            link = urljoin(self.url or "", href).split("#", 1)[0]
+            if same_domain and urlparse(link).netloc != base_netloc:
+                continue
+            links.add(link)
+        return links
+
+    def text(self, strip_boilerplate=False):
+        """
+        Returns the visible text of the page, whitespace-normalized.
+
+        Scripts, styles and similar non-text elements are always skipped.
+        With `strip_boilerplate`, navigation, headers, footers and asides
+        are removed too.
+
+        Args:
+            strip_boilerplate (bool, optional): Drop page chrome. Defaults to False.
+
+        Returns:
+            str: The extracted text, with pieces separated by single spaces.
+        """
+        if strip_boilerplate in self._text:
+            return self._text[strip_boilerplate]
+
+        # Stripping elements mutates the tree, so capture links first.
+        self._read_hrefs_and_title()
+        if self._boilerplate_stripped and not strip_boilerplate:
+            self._tree = self._parse()
+        self._boilerplate_stripped = strip_boilerplate
+        tags = BOILERPLATE_TAGS if strip_boilerplate else NON_TEXT_TAGS
+        tree = self._tree
+        if self.backend == "selectolax":
+            tree.strip_tags(tags)
+            root = tree.root
+            text = root.text(separator=" ", strip=True) if root is not None else ""
+        elif self.backend == "lxml":
+            for element in tree.xpath("|".join(f"//{tag}" for tag in tags)):
+                element.drop_tree()
+            text = " ".join(piece.strip() for piece in tree.itertext() if piece.strip())
+        else:
+            for element in tree.find_all(tags):
+                element.decompose()
+            text = tree.get_text(separator=" ", strip=True)
+
+        text = " ".join(text.split())
+        self._text[strip_boilerplate] = text
+        return text
+
+
+def parse_html(html, url=None, backend=None):
+    """
+    Parses a page with the fastest installed backend.
+
+    Args:
+        html (str): The page HTML.
+        url (str, optional): The page URL, used to resolve links.
+        backend (str, optional): Force a specific backend.
+
+    Returns:
+        HtmlDocument: The parsed page.
+    """
+    return HtmlDocument(html, url=url, backend=backend)
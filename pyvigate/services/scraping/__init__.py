@@ -1 +1 @@
-from .scraping import Scrapingfrom .prompts import ScrapePrompts
\ No newline at end of file
+from .scraping import Scrapingfrom .prompts import ScrapePromptsfrom .sinks import ColumnarSink, DirectorySink, JsonlSink, drain
\ No newline at end of file
@@ -1,18 +1,72 @@
+from ...ai.map_reduce import MapReducePipeline
 from ...ai.prompt_engineering import PromptEngineering
+from ...ai.tokens import count_tokens, get_encoding, truncate_tokens
 
 
 class ScrapePrompts(PromptEngineering):
+    """
+    Prompts for extracting, summarizing and answering from scraped pages.
+
+    The `*_prompt` methods build a single prompt, truncating page content
+    that would push it past `max_prompt_tokens`. The async `extract`,
+    `summarize` and `answer` methods instead cover the whole page with a
+    `MapReducePipeline` and report the tokens used.
+
+    Attributes:
+        max_prompt_tokens (int): Token budget of each prompt.
+        overlap_tokens (int): Tokens shared by consecutive chunks.
+        concurrency (int): Chunk prompts in flight.
+    """
+
+    EXTRACTION_TEMPLATE = "Given the following webpage content: \n{content}\n Extract information related to: {query}."
+    EXTRACTION_REDUCE_TEMPLATE = "Merge the following information extracted from parts of one webpage into a single answer, removing duplicates. Information related to: {query}.\n{content}"
+    SUMMARY_TEMPLATE = "Summarize the following webpage content in a concise manner: \n{content}"
+    SUMMARY_REDUCE_TEMPLATE = "Combine the following summaries of parts of one webpage into a single concise summary: \n{content}"
+    QUESTION_ANSWER_TEMPLATE = "Given the content of this webpage: \n{content}\n Answer the following question: {question}"
+    QUESTION_ANSWER_REDUCE_TEMPLATE = "The following answers were given from different parts of one webpage. Combine them into a single answer to the question: {question}\n{content}"
+
+    def __init__(self, model_name="gpt-3.5-turbo", max_prompt_tokens=3000,
+                 overlap_tokens=200, concurrency=4):
+        """
+        Initializes with a model name and a prompt budget.
+
+        Args:
+            model_name (str): Name of the language model. Defaults to 'gpt-3.5-turbo'.
+            max_prompt_tokens (int): Prompt budget. Defaults to 3000.
+            overlap_tokens (int): Chunk overlap for map-reduce. Defaults to 200.
+            concurrency (int): Chunk prompts in flight. Defaults to 4.
+        """
+        super().__init__(model_name)
+        self.max_prompt_tokens = max_prompt_tokens
+        self.overlap_tokens = overlap_tokens
+        self.concurrency = concurrency
+        self._encoding = None
+
+    @property
+    def encoding(self):
+        """The tiktoken encoding, loaded on first use as it may be downloaded."""
+        if self._encoding is None:
+            self._encoding = get_encoding(self.model_name) or False
+        return self._encoding or None
+
+    def fit_prompt(self, template, webpage_content, **kwargs):
+        """
+        Fills a template, truncating the content to keep the prompt within
+        `max_prompt_tokens`.
+        """
+        overhead = count_tokens(template.format(content="", **kwargs), self.encoding)
+        content = truncate_tokens(webpage_content, max(1, self.max_prompt_tokens - overhead),
+                                  self.encoding)
+        return self.generate_prompt(template, content=content, **kwargs)
+
     def extraction_prompt(self, webpage_content, query):
-        template = "Given the following webpage content: \n{content}\n Extract information related to: {query}."
-        return self.generate_prompt(template, content=webpage_content, query=query)
+        return self.fit_prompt(self.EXTRACTION_TEMPLATE, webpage_content, query=query)
 
     def summary_prompt(self, webpage_content):
-        template = "Summarize the following webpage content in a concise manner: \n{content}"
-        return self.generate_prompt(template, content=webpage_content)
+        return self.fit_prompt(self.SUMMARY_TEMPLATE, webpage_content)
 
     def question_answer_prompt(self, webpage_content, question):
-        template = "Given the content of this webpage: \n{content}\n Answer the following question: {question}"
-        return self.generate_prompt(template, content=webpage_content, question=question)
+        return self.fit_prompt(self.QUESTION_ANSWER_TEMPLATE, webpage_content, question=question)
 
     def data_validation_prompt(self, extracted_data, source_content):
         template = "Validate the following extracted data: {data} against this webpage content: \n{content}"
@@ -22,3 +76,62 @@ class ScrapePrompts(PromptEngineering):
         template = "{instructions}"
         return self.generate_prompt(template, content=webpage_content,
                                     instructions=custom_instructions)
+
+    def pipeline(self, complete):
+        """
+        Returns a `MapReducePipeline` using this instance's budget.
+
+        Args:
+            complete (callable): Async or sync prompt completion function,
+                e.g. `LlmAgent.complete`.
+        """
+        return MapReducePipeline(complete, max_prompt_tokens=self.max_prompt_tokens,
+                                 overlap_tokens=self.overlap_tokens,
+                                 concurrency=self.concurrency, encoding=self._encoding or None,
+                                 model_name=self.model_name)
+
+    async def extract(self, complete, webpage_content, query):
+        """
+        Extracts information related to `query` from a page of any length.
+
+        Args:
+            complete (callable): Prompt completion function.
+            webpage_content (str): The page text.
+            query (str): What to extract.
+
+        Returns:
+            dict: The `result` and token usage, see `MapReducePipeline.run`.
+        """
+        return await self.pipeline(complete).run(
+            self.EXTRACTION_TEMPLATE, webpage_content,
+            self.EXTRACTION_REDUCE_TEMPLATE, query=query)
+
+    async def summarize(self, complete, webpage_content):
+        """
+        Summarizes a page of any length.
+
+        Args:
+            complete (callable): Prompt completion function.
+            webpage_content (str): The page text.
+
+        Returns:
+            dict: The `result` and token usage, see `MapReducePipeline.run`.
+        """
+        return await self.pipeline(complete).run(
+            self.SUMMARY_TEMPLATE, webpage_content, self.SUMMARY_REDUCE_TEMPLATE)
+
+    async def answer(self, complete, webpage_content, question):
+        """
+        Answers a question about a page of any length.
+
+        Args:
+            complete (callable): Prompt completion function.
+            webpage_content (str): The page text.
+            question (str): The question.
+
+        Returns:
+            dict: The `result` and token usage, see `MapReducePipeline.run`.
+        """
+        return await self.pipeline(complete).run(
+            self.QUESTION_ANSWER_TEMPLATE, webpage_content,
+            self.QUESTION_ANSWER_REDUCE_TEMPLATE, question=question)
@@ -1,18 +1,35 @@
-from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+import asyncio
 import os
 import shutil
+import time
+
+from ..parsing import extract_page_async
+from ..streaming import stream_results
+from ...instrumentation import span
 
 
 class Scraping:
     """
-    A class for scraping web pages using BeautifulSoup.
+    A class for scraping web pages with the fastest available HTML parser.
 
     Attributes:
         data_dir (str): The directory where scraped data will be stored.
+        persist (bool): Whether files from earlier runs are kept in `data_dir`.
+        stability_detector (StabilityDetector): If set, used to wait for
+            pages to settle before their content is read.
+        strip_boilerplate (bool): Whether navigation, headers, footers and
+            asides are left out of extracted text.
+        parser_backend (str): HTML parser backend, or None for the fastest
+            installed one.
+        parser_pool (ParserPool): If set, pages are parsed in its workers
+            instead of on the event loop.
+        fetcher (HttpFetcher): If set, pages are fetched over HTTP first
+            and only loaded in the browser when they need rendering.
     """
 
-    def __init__(self, page, data_dir="data"):
+    def __init__(self, page, data_dir="data", persist=True,
+                 stability_detector=None, strip_boilerplate=False,
+                 parser_backend=None, parser_pool=None, fetcher=None):
         """
         Initializes the Scraping class with a specified data directory.
 
@@ -20,9 +37,27 @@ class Scraping:
             page (Page): A playwright page object.
             data_dir (str): The directory to store scraped data.
             Defaults to "data".
+            persist (bool): Keep existing files in `data_dir` instead of
+            wiping it. Defaults to True.
+            stability_detector (StabilityDetector): Waits for dynamic
+            pages to settle after navigation. Defaults to None.
+            strip_boilerplate (bool): Leave page chrome out of extracted
+            text. Defaults to False.
+            parser_backend (str): "selectolax", "lxml" or "bs4".
+            Defaults to the fastest installed backend.
+            parser_pool (ParserPool): Process or thread pool to parse
+            pages in. Defaults to None (parse inline).
+            fetcher (HttpFetcher): HTTP fetch tier tried before the
+            browser. Defaults to None (always use the browser).
         """
         self.page = page
         self.data_dir = data_dir
+        self.persist = persist
+        self.stability_detector = stability_detector
+        self.strip_boilerplate = strip_boilerplate
+        self.parser_backend = parser_backend
+        self.parser_pool = parser_pool
+        self.fetcher = fetcher
         self._setup_directories()
 
     async def scrape_page_content(self):
@@ -35,21 +70,41 @@ class Scraping:
         content = await self.page.content()
         return content
 
+    async def _extract(self, content, url, text=True):
+        """Parses page content once, in the parser pool if configured."""
+        return await extract_page_async(
+            content, url=url, parser_pool=self.parser_pool,
+            backend=self.parser_backend,
+            strip_boilerplate=self.strip_boilerplate, same_domain=True,
+            text=text)
+
+    async def _load(self, url, page=None):
+        """Navigates to `url` and returns its extracted title, text and links."""
+        if self.fetcher is not None:
+            fetched = await self.fetcher.fetch(url)
+            if fetched is not None and fetched["source"] == "non_html":
+                raise ValueError(f"{url} is not an HTML page "
+                                 f"({fetched['content_type']}).")
+            if fetched is not None:
+                return await self._extract(fetched["html"], fetched["url"])
+        page = page or self.page
+        with span("navigate", url=url):
+            await page.goto(url)
+        if self.stability_detector is not None:
+            await self.stability_detector.wait(page)
+        content = await page.content()
+        return await self._extract(content, url)
+
     async def extract_data_from_page(self, url):
         """
         Asynchronously extracts specific data from
-        a web page using BeautifulSoup.
+        a web page.
 
         Returns:
             str: Extracted text from the web page.
         """
-        await self.page.goto(url)
-        content = await self.page.content()
-        soup = BeautifulSoup(content, 'html.parser')
-
-        # Example extraction: Getting all text
-        page_text = soup.get_text(separator=' ', strip=True)
-        return page_text
+        extracted = await self._load(url)
+        return extracted["text"]
 
     async def scrape_and_extract_links(self, url):
         """
@@ -63,20 +118,63 @@ class Scraping:
             set: A set of unique URLs
             found on the page that match the base URL's domain.
         """
-        page = self.page
-        base_url = url
-        content = await page.content()
-        soup = BeautifulSoup(content, 'html.parser')
-        links = soup.find_all('a', href=True)
-        unique_links = {urljoin(base_url,
-                                link['href']) for link in links if urlparse(
-                                    link['href']).netloc == urlparse(
-                                        base_url).netloc}
+        content = await self.page.content()
+        extracted = await self._extract(content, url, text=False)
+        return set(extracted["links"])
+
+    async def scrape_page(self, url):
+        """
+        Asynchronously loads a web page and extracts its text and links
+        from a single parse.
+
+        Parameters:
+            url (str): The URL of the page to scrape.
+
+        Returns:
+            dict: The page `url`, `title`, `text` and same-domain `links`.
+        """
+        extracted = await self._load(url)
+        extracted["links"] = set(extracted["links"])
+        return extracted
+
+    async def stream(self, urls, pool, buffer_size=None):
+        """
+        Asynchronously scrapes many pages over a page pool, yielding
+        a record as soon as each page finishes.
+
+        Only `buffer_size` finished records are held in memory; when the
+        consumer falls behind, the pooled pages stop taking new URLs.
+
+        Parameters:
+            urls (iterable): The URLs to scrape; may be a lazy iterator.
+            pool (PagePool): A started page pool.
+            buffer_size (int): Records buffered before scraping pauses.
+            Defaults to twice the pool size.
+
+        Yields:
+            dict: A record with the page `url`, `title`, `text`, `links`
+            and `fetched_at`, or `url` and `error` if the page failed.
+        """
+        pending = iter(urls)
+
+        async def produce(emit):
+            async def worker():
+                for url in pending:
+                    async with pool.page() as page:
+                        try:
+                            record = await self._load(url, page=page)
+                            record["fetched_at"] = time.time()
+                        except Exception as error:
+                            record = {"url": url, "error": str(error)}
+                    await emit(record)
+
+            await asyncio.gather(*(worker() for _ in range(pool.size)))
 
-        return unique_links
+        async for record in stream_results(produce, buffer_size or pool.size * 2):
+            yield record
 
     def _setup_directories(self):
         """Sets up necessary directories for caching."""
-        if os.path.exists(self.data_dir):
+        if os.path.exists(self.data_dir) and not self.persist:
             shutil.rmtree(self.data_dir)
-        os.makedirs(self.data_dir)
+        os.makedirs(self.data_dir, exist_ok=True)
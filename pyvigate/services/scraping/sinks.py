@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import json
+import os
+
+
+class Sink:
+    """
+    Base class for destinations of streamed scrape records.
+
+    Records are buffered and written in bulk once `batch_size` of them have
+    accumulated, when `flush` is called, or when the sink is closed. Bulk
+    writes run in a worker thread so the event loop keeps serving pages.
+
+    Attributes:
+        batch_size (int): Number of records buffered before a write.
+        written (int): Number of records written so far.
+    """
+
+    def __init__(self, batch_size=100):
+        self.batch_size = batch_size
+        self.written = 0
+        self._buffer = []
+
+    async def write(self, record):
+        """
+        Buffers a record, flushing when the batch is full.
+
+        Args:
+            record (dict): The record to write.
+        """
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        """Writes all buffered records."""
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._write_batch, batch)
+        self.written += len(batch)
+
+    async def close(self):
+        """Flushes remaining records and releases resources."""
+        await self.flush()
+
+    def _write_batch(self, batch):
+        raise NotImplementedError
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+class JsonlSink(Sink):
+    """
+    Appends records as JSON lines to a single file.
+
+    Attributes:
+        path (str): The JSONL file.
+    """
+
+    def __init__(self, path, batch_size=100):
+        super().__init__(batch_size=batch_size)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _write_batch(self, batch):
+        lines = "".join(json.dumps(record, ensure_ascii=False, default=list) + "\n"
+                        for record in batch)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(lines)
+
+
+class ColumnarSink(Sink):
+    """
+    Writes records in columnar batches, one part file per batch.
+
+    Uses Parquet when pyarrow is installed and otherwise falls back to JSON
+    files holding one list per column. Part numbers continue after the
+    parts already in `directory`, so a second run does not overwrite them.
+
+    Attributes:
+        directory (str): Directory for the part files.
+        columns (list): Columns to keep. Defaults to every key seen so far,
+            so an error record without page fields does not drop them.
+        format (str): "parquet" or "json".
+    """
+
+    def __init__(self, directory, batch_size=1000, columns=None):
+        super().__init__(batch_size=batch_size)
+        self.directory = directory
+        self.columns = columns
+        self._fixed_columns = columns is not None
+        os.makedirs(directory, exist_ok=True)
+        self._part = self._next_part()
+        try:
+            import pyarrow  # noqa: F401
+            self.format = "parquet"
+        except ImportError:
+            self.format = "json"
+
+    def _next_part(self):
+        """Returns the number after the highest existing part file."""
+        numbers = [int(name[5:10]) for name in os.listdir(self.directory)
+                   if name.startswith("part-") and name[5:10].isdigit()]
+        return max(numbers, default=-1) + 1
+
+    def _write_batch(self, batch):
+        if not self._fixed_columns:
+            columns = dict.fromkeys(self.columns or [])
+            for record in batch:
+                columns.update(dict.fromkeys(record))
+            self.columns = list(columns)
+        table = {column: [record.get(column) for record in batch]
+                 for column in self.columns}
+        path = os.path.join(self.directory, f"part-{self._part:05d}.{self.format}")
+        self._part += 1
+
+        if self.format == "parquet":
+            import pyarrow
+            import pyarrow.parquet
+            for column, values in table.items():
+                table[column] = [sorted(value) if isinstance(value, set) else value
+                                 for value in values]
+            pyarrow.parquet.write_table(pyarrow.table(table), path)
+        else:
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(table, file, ensure_ascii=False, default=list)
+
+
+class DirectorySink(Sink):
+    """
+    Writes one file per record, e.g. for `LlmAgent` to index.
+
+    Attributes:
+        directory (str): Output directory.
+        field (str): Record field written to the file.
+        extension (str): File name extension.
+    """
+
+    def __init__(self, directory, field="text", extension=".txt", batch_size=50):
+        super().__init__(batch_size=batch_size)
+        self.directory = directory
+        self.field = field
+        self.extension = extension
+        os.makedirs(directory, exist_ok=True)
+
+    def filename(self, record):
+        """Returns a collision-free file name derived from the record URL."""
+        url = record.get("url") or ""
+        return hashlib.sha1(url.encode("utf-8")).hexdigest() + self.extension
+
+    def _write_batch(self, batch):
+        for record in batch:
+            path = os.path.join(self.directory, self.filename(record))
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(record.get(self.field) or "")
+
+
+async def drain(records, *sinks):
+    """
+    Consumes an async stream of records into one or more sinks.
+
+    Args:
+        records: Async iterator of records, e.g. from `Scraping.stream`.
+        *sinks (Sink): Destinations; each receives every record.
+
+    Returns:
+        int: Number of records consumed.
+    """
+    count = 0
+    try:
+        async for record in records:
+            for sink in sinks:
+                await sink.write(record)
+            count += 1
+    finally:
+        for sink in sinks:
+            await sink.close()
+    return count
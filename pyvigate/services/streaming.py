@@ -0,0 +1,39 @@
+import asyncio
+
+
+async def stream_results(produce, buffer_size=16):
+    """
+    Turns a callback-style producer into an async generator with backpressure.
+
+    `produce` is started as a task and handed an `emit` coroutine. Records
+    emitted go through a bounded queue, so the producer pauses whenever the
+    consumer falls `buffer_size` records behind. Closing the generator early
+    cancels the producer.
+
+    Args:
+        produce (callable): Coroutine function taking `emit`.
+        buffer_size (int, optional): Records buffered before the producer
+            waits. Defaults to 16.
+
+    Yields:
+        The records passed to `emit`, in the order they were emitted.
+    """
+    queue = asyncio.Queue(maxsize=buffer_size)
+    task = asyncio.ensure_future(produce(queue.put))
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+                continue
+            getter.cancel()
+            while not queue.empty():
+                yield queue.get_nowait()
+            # Surface any exception raised by the producer.
+            task.result()
+            return
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
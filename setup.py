@@ -21,6 +21,16 @@ setup(
     python_requires='>=3.8',
     install_requires=requirements,
     extras_require={
+        'fast': [
+            'selectolax',
+            'lxml'
+        ],
+        'http': [
+            'httpx'
+        ],
+        'zstd': [
+            'zstandard'
+        ],
         'docs': [
             'sphinx>=3.0',
             'sphinx_rtd_theme'
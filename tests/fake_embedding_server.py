@@ -0,0 +1,110 @@
+"""
+A local, OpenAI-compatible `/embeddings` endpoint for tests.
+
+It answers with deterministic vectors and can be told to throttle or fail
+the first requests, so retry and rate-limit handling can be exercised
+without network access or API spend.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_vector(text, dimensions=3):
+    """Returns the deterministic embedding the server gives `text`."""
+    return [float(len(text)), float(sum(map(ord, text)) % 997)] + [1.0] * (dimensions - 2)
+
+
+def _make_handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/v1/embeddings":
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            status = server.next_status(request["input"])
+            if status == 429:
+                headers = {}
+                if server.retry_after is not None:
+                    headers["Retry-After"] = str(server.retry_after)
+                self._send_json(429, {"error": {"message": "Rate limit reached"}}, headers)
+                return
+            if status != 200:
+                self._send_json(status, {"error": {"message": "Server error"}})
+                return
+            data = [{"index": index, "object": "embedding",
+                     "embedding": fake_vector(text, server.dimensions)}
+                    for index, text in enumerate(request["input"])]
+            self._send_json(200, {"object": "list", "data": data,
+                                  "model": request.get("model")})
+
+    return Handler
+
+
+class FakeEmbeddingServer:
+    """
+    Serves fake embeddings on a free local port from a background thread.
+
+    Example:
+        >>> with FakeEmbeddingServer(statuses=[429, 503]) as server:
+        ...     embedder = OpenAICompatibleEmbedder(server.base_url)
+
+    Attributes:
+        statuses (list): Statuses returned, in order, before requests succeed.
+        retry_after (float): Retry-After sent with 429 responses, if any.
+        dimensions (int): Length of each vector.
+        requests (list): The inputs of every request received, in order.
+    """
+
+    def __init__(self, statuses=None, retry_after=None, dimensions=3, host="127.0.0.1"):
+        self.statuses = list(statuses or [])
+        self.retry_after = retry_after
+        self.dimensions = dimensions
+        self.host = host
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    def next_status(self, texts):
+        """Records a request and returns the status to answer it with."""
+        with self._lock:
+            self.requests.append(list(texts))
+            return self.statuses.pop(0) if self.statuses else 200
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self._server.server_address[1]}/v1"
+
+    def start(self):
+        """Starts serving and returns the base URL."""
+        self._server = ThreadingHTTPServer((self.host, 0), _make_handler(self))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        """Stops the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
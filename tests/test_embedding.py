@@ -0,0 +1,120 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_embedding_server import FakeEmbeddingServer, fake_vector
+from pyvigate.ai.embedding import (EmbeddingHTTPError, EmbeddingPipeline,
+                                   OpenAICompatibleEmbedder, is_throttled, is_transient)
+
+
+def make_pipeline(server, **options):
+    options.setdefault("backoff", 0.01)
+    return EmbeddingPipeline(OpenAICompatibleEmbedder(server.base_url), **options)
+
+
+def test_batches_respect_token_and_size_budgets():
+    pipeline = EmbeddingPipeline(None, max_batch_tokens=10, max_batch_size=3)
+    texts = ["a" * 16, "b" * 16, "c" * 40, "d" * 4, "e" * 4, "f" * 4, "g" * 4]
+
+    # Four characters per token without tiktoken: 4, 4, 10, 1, 1, 1, 1.
+    assert pipeline.make_batches(texts) == [[0, 1], [2], [3, 4, 5], [6]]
+
+
+def test_embeds_in_order_through_fake_server():
+    texts = [f"text number {i}" for i in range(10)]
+    with FakeEmbeddingServer() as server:
+        pipeline = make_pipeline(server, max_batch_size=4, concurrency=2)
+        vectors = asyncio.run(pipeline.embed(texts))
+
+    assert vectors == [fake_vector(text) for text in texts]
+    assert sorted(len(batch) for batch in server.requests) == [2, 4, 4]
+    assert pipeline.stats["texts"] == 10
+    assert pipeline.stats["batches"] == 3
+    assert pipeline.stats["requests"] == 3
+    assert pipeline.stats["retries"] == 0
+
+
+def test_retries_throttled_and_failing_requests():
+    texts = ["alpha", "beta", "gamma"]
+    with FakeEmbeddingServer(statuses=[429, 503, 429], retry_after=0.01) as server:
+        pipeline = make_pipeline(server)
+        vectors = asyncio.run(pipeline.embed(texts))
+
+    assert vectors == [fake_vector(text) for text in texts]
+    assert len(server.requests) == 4
+    assert pipeline.stats["requests"] == 4
+    assert pipeline.stats["retries"] == 3
+    assert pipeline.stats["throttled"] == 2
+
+
+def test_gives_up_after_max_retries():
+    with FakeEmbeddingServer(statuses=[500] * 5) as server:
+        pipeline = make_pipeline(server, max_retries=2)
+        try:
+            asyncio.run(pipeline.embed(["text"]))
+        except EmbeddingHTTPError as error:
+            assert error.status_code == 500
+        else:
+            raise AssertionError("expected the last error to be raised")
+
+    assert len(server.requests) == 3
+
+
+def test_does_not_retry_client_errors():
+    with FakeEmbeddingServer(statuses=[400]) as server:
+        pipeline = make_pipeline(server)
+        try:
+            asyncio.run(pipeline.embed(["text"]))
+        except EmbeddingHTTPError as error:
+            assert error.status_code == 400
+        else:
+            raise AssertionError("expected a 400 to be raised")
+
+    assert len(server.requests) == 1
+
+
+def test_retry_after_is_capped_by_max_backoff():
+    with FakeEmbeddingServer(statuses=[429], retry_after=3600) as server:
+        pipeline = make_pipeline(server, max_backoff=0.05)
+        started = time.monotonic()
+        asyncio.run(pipeline.embed(["text"]))
+
+    assert time.monotonic() - started < 5
+    assert pipeline.stats["throttled"] == 1
+
+
+def test_throttling_pauses_other_batches():
+    started = time.monotonic()
+    calls = []
+
+    async def embed_batch(texts):
+        calls.append((texts[0], time.monotonic() - started))
+        if len(calls) == 1:
+            raise EmbeddingHTTPError(429, "Too Many Requests", retry_after=0.3)
+        await asyncio.sleep(0.05)
+        return [fake_vector(text) for text in texts]
+
+    pipeline = EmbeddingPipeline(embed_batch, max_batch_size=1, concurrency=2)
+    asyncio.run(pipeline.embed(["a", "b", "c", "d"]))
+
+    # "b" was already in flight; "c" starts after "b" but has to wait for
+    # the pause that "a" was throttled into.
+    first_c = next(offset for text, offset in calls if text == "c")
+    assert first_c >= 0.3
+    assert pipeline.stats["throttled"] == 1
+
+
+def test_classifies_errors_by_status_and_type():
+    class RateLimitError(Exception):
+        pass
+
+    assert is_throttled(EmbeddingHTTPError(429))
+    assert is_throttled(RateLimitError("slow down"))
+    assert not is_throttled(EmbeddingHTTPError(400, "input has 4290 tokens"))
+    assert not is_throttled(ValueError("input has 4290 tokens"))
+    assert is_transient(EmbeddingHTTPError(503))
+    assert is_transient(ConnectionResetError())
+    assert not is_transient(EmbeddingHTTPError(404))